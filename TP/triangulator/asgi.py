@@ -0,0 +1,700 @@
+"""ASGI server to triangulate point sets.
+
+Asyncio-native variant of the Flask service in ``main``: same routes, error
+codes and binary contract. Upstream fetches do not block the event loop and
+triangulations run in a thread pool, so one process can keep thousands of
+slow-upstream requests in flight. Run it with an ASGI server, e.g.
+``uvicorn asgi:app``.
+"""
+import asyncio
+import functools
+import json
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import httpx
+
+from main import (
+    BATCH_MAX_BODY,
+    BATCH_MAX_IDS,
+    COALESCING,
+    COORD_DTYPE,
+    COUNT,
+    ERRORS,
+    IN_FLIGHT,
+    INPUT_POINTS,
+    MAX_UPLOAD_BYTES,
+    METRICS_CONTENT_TYPE,
+    STAGE_SECONDS,
+    DegeneratePointSet,
+    ExecutorSaturated,
+    NonFiniteCoordinates,
+    PayloadTooLarge,
+    PointSetDecoder,
+    PointSetManager,
+    TriangulationError,
+    Triangulator,
+    _backends_body,
+    _batch_ids,
+    _batch_record,
+    _cache_when_sent,
+    _counts,
+    _encode_body,
+    _env,
+    _error_record,
+    _negotiate,
+    _requested_backend,
+    _response_headers,
+    _result_key,
+    _start_executor,
+    _timed_chunks,
+    _upload_key,
+    metrics,
+    result_cache,
+)
+
+ROUTE = re.compile(r'^/triangulation/(?P<pointSetId>[^/]+)$')
+READY_PATH = '/ready'
+BACKENDS_PATH = '/backends'
+METRICS_PATH = '/metrics'
+UPLOAD_PATH = '/triangulation'
+BATCH_PATH = '/triangulation/batch'
+
+# Upper bound on concurrent connections to the PointSetManager.
+MAX_CONNECTIONS = _env('POINT_SET_MANAGER_ASYNC_MAX_CONNECTIONS', 100, int)
+
+executor = ThreadPoolExecutor(
+    max_workers=_env('TRIANGULATION_THREADS', os.cpu_count() or 1, int),
+    thread_name_prefix='triangulate',
+)
+
+_client = None
+
+
+class AsyncSingleFlight:
+    """Deduplicate concurrent coroutines sharing a key on one event loop."""
+
+    def __init__(self):
+        """Initialize an AsyncSingleFlight."""
+        self.calls = 0
+        self.coalesced = 0
+        self._tasks = {}
+
+    async def do(self, key, fn, *args):
+        """Await ``fn(*args)`` once for all concurrent callers of ``key``.
+
+        Args:
+            key: Hashable identifier of the call.
+            fn: Coroutine function to run.
+            *args: Arguments passed to ``fn``.
+
+        Returns:
+            Result of the call shared by all concurrent callers.
+
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        # A cancelled caller must not cancel the call shared with others.
+        return await asyncio.shield(task)
+
+    def stats(self):
+        """Get the coalescing counters.
+
+        Returns:
+            Dictionary with the number of executed and coalesced calls.
+
+        """
+        return {"calls": self.calls, "coalesced": self.coalesced,
+                "in_flight": len(self._tasks)}
+
+
+inflight = AsyncSingleFlight()
+metrics.source(COALESCING, lambda: _counts(
+    inflight.stats(), executed='calls', coalesced='coalesced'))
+metrics.source(IN_FLIGHT, lambda: inflight.stats()['in_flight'])
+
+
+def client():
+    """Get the shared non-blocking PointSetManager client.
+
+    Returns:
+        httpx.AsyncClient instance.
+
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=PointSetManager.BASE_URL,
+            timeout=httpx.Timeout(PointSetManager.READ_TIMEOUT,
+                                  connect=PointSetManager.CONNECT_TIMEOUT),
+            transport=httpx.AsyncHTTPTransport(
+                retries=PointSetManager.MAX_RETRIES,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=PointSetManager.POOL_SIZE,
+                ),
+            ),
+        )
+    return _client
+
+
+async def close():
+    """Close the shared PointSetManager client."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def retrieve(point_set_id):
+    """Retrieve a PointSet from the cache or the remote service.
+
+    The PointSet cache and circuit breaker are the ones of the Flask app,
+    and the body is decoded as it arrives, as ``PointSetManager.retrieve``
+    does.
+
+    Args:
+        point_set_id: The ID of the PointSet to retrieve.
+
+    Returns:
+        PointSet instance or None if not found.
+
+    Raises:
+        ConnectionError: If the service is unavailable, or CircuitOpen
+            while it is considered down.
+
+    """
+    entry, fresh = PointSetManager.lookup(point_set_id)
+    if fresh:
+        return entry[0]
+    headers = PointSetManager.request_headers(entry)
+    try:
+        for _ in range(2):
+            request = client().build_request(
+                'GET', f"/pointset/{point_set_id}", headers=headers)
+            with metrics.time(STAGE_SECONDS, 'fetch'):
+                response = await client().send(request, stream=True)
+                try:
+                    content = PointSetManager.decoder(response.status_code,
+                                                      response.headers)
+                    if content is None:
+                        content = await response.aread()
+                    else:
+                        async for chunk in response.aiter_bytes(
+                                PointSetManager.CHUNK_BYTES):
+                            if not content.feed(chunk):
+                                break
+                finally:
+                    await response.aclose()
+            if not PointSetManager.needs_body(response.status_code, entry):
+                break
+            headers = None
+    except httpx.HTTPError as err:
+        PointSetManager.fetch_failed()
+        raise ConnectionError("PointSetManager unavailable") from err
+    except BaseException:
+        PointSetManager.fetch_abandoned()
+        raise
+    return PointSetManager.fetched(point_set_id, entry, response.status_code,
+                                   content, response.headers.get('etag'))
+
+
+async def triangulate(pointset, backend=None):
+    """Triangulate a PointSet in the executor, off the event loop.
+
+    Args:
+        pointset: PointSet to triangulate.
+        backend: Value of ``main._requested_backend``.
+
+    Returns:
+        Triangles instance.
+
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, Triangulator.triangulate,
+                                      pointset, backend)
+
+
+async def _send(send, status, body, content_type, headers=()):
+    """Send a complete response."""
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type.encode()),
+            (b'content-length', str(len(body)).encode()),
+            *headers,
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _negotiated(scope):
+    """Choose the response format from the request headers."""
+    headers = {name.lower(): value.decode('latin-1')
+               for name, value in scope['headers']
+               if name.lower() in (b'accept', b'accept-encoding')}
+    return _negotiate(headers.get(b'accept'), headers.get(b'accept-encoding'))
+
+
+def _backend(scope):
+    """Get the triangulation engine asked for in the query string.
+
+    Raises:
+        TriangulationError: If the engine is unknown or not installed.
+
+    """
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    return _requested_backend(query.get('backend', [None])[0])
+
+
+async def _send_error(send, status, code, message):
+    """Send a JSON error response, counting its code."""
+    metrics.inc(ERRORS, code)
+    body = json.dumps({"code": code, "message": message}).encode()
+    await _send(send, status, body, 'application/json')
+
+
+async def _triangulation_body(pointSetId, backend=None):
+    """Fetch and triangulate a PointSet, going through the caches.
+
+    Args:
+        pointSetId: UUID of the PointSet.
+        backend: Value of ``main._requested_backend``.
+
+    Returns:
+        Cached binary triangulation, or an iterator over its chunks.
+
+    Raises:
+        TriangulationError: If the PointSet cannot be triangulated.
+
+    """
+    try:
+        uuid.UUID(pointSetId)
+    except ValueError:
+        raise TriangulationError(400, "INVALID_POINTSET_ID",
+                                 "Invalid PointSet ID format") from None
+
+    cached = result_cache.get(_result_key(pointSetId, backend))
+    if cached is not None:
+        return cached
+
+    try:
+        pointset = await inflight.do(('retrieve', pointSetId), retrieve,
+                                     pointSetId)
+    except ConnectionError:
+        raise TriangulationError(503, "SERVICE_UNAVAILABLE",
+                                 "PointSetManager unavailable") from None
+    except Exception as e:
+        raise TriangulationError(500, "INTERNAL_ERROR", str(e)) from e
+
+    if pointset is None:
+        raise TriangulationError(404, "POINTSET_NOT_FOUND",
+                                 "PointSet not found")
+
+    return await _triangles_body(_result_key(pointSetId, backend), pointset,
+                                 backend)
+
+
+async def _triangles_body(key, pointset, backend=None):
+    """Triangulate a PointSet and encode the Triangles.
+
+    Args:
+        key: Identifier under which concurrent triangulations coalesce.
+        pointset: PointSet to triangulate.
+        backend: Value of ``main._requested_backend``.
+
+    Returns:
+        Iterator over the binary triangulation chunks.
+
+    Raises:
+        TriangulationError: If the triangulation fails.
+
+    """
+    metrics.observe(INPUT_POINTS, pointset.n_points)
+    try:
+        with metrics.time(STAGE_SECONDS, 'compute'):
+            triangles = await inflight.do(('triangulate', key), triangulate,
+                                          pointset, backend)
+        body = triangles.iter_binary()
+    except NonFiniteCoordinates as e:
+        raise TriangulationError(400, "NON_FINITE_COORDINATES", str(e)) from e
+    except DegeneratePointSet as e:
+        raise TriangulationError(400, "DEGENERATE_POINTSET", str(e)) from e
+    except ExecutorSaturated as e:
+        raise TriangulationError(503, "SERVICE_UNAVAILABLE", str(e)) from e
+    except Exception as e:
+        raise TriangulationError(500, "TRIANGULATION_FAILED", str(e)) from e
+
+    if body is None:
+        raise TriangulationError(500, "TRIANGULATION_FAILED",
+                                 "Triangulation produced invalid triangles")
+    return body
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client disconnects before sending its whole body."""
+
+
+async def _body_chunks(receive):
+    """Iterate over the chunks of a request body as they arrive.
+
+    Args:
+        receive: ASGI receive callable.
+
+    Yields:
+        Body chunks, possibly empty.
+
+    Raises:
+        ClientDisconnected: If the client disconnects first.
+
+    """
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ClientDisconnected()
+        yield message.get('body', b'')
+        if not message.get('more_body', False):
+            return
+
+
+async def _read_body(receive, limit):
+    """Read a request body.
+
+    Args:
+        receive: ASGI receive callable.
+        limit: Maximum body size in bytes.
+
+    Returns:
+        The body, or None if it is larger than ``limit``.
+
+    Raises:
+        ClientDisconnected: If the client disconnects first.
+
+    """
+    parts = []
+    size = 0
+    async for chunk in _body_chunks(receive):
+        size += len(chunk)
+        if size > limit:
+            return None
+        parts.append(chunk)
+    return b''.join(parts)
+
+
+def _content_length(scope):
+    """Get the announced body size, or None without Content-Length."""
+    for name, value in scope['headers']:
+        if name.lower() == b'content-length':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+async def _read_pointset(scope, receive, limit):
+    """Decode a PointSet body as its chunks arrive.
+
+    The chunks are fed to a PointSetDecoder, so the count header bounds
+    the body before the coordinates are received and reading stops at the
+    first invalid byte.
+
+    Args:
+        scope: ASGI connection scope.
+        receive: ASGI receive callable.
+        limit: Maximum body size in bytes.
+
+    Returns:
+        PointSet instance.
+
+    Raises:
+        PayloadTooLarge: If the body is larger than ``limit``.
+        ValueError: If the body is not a valid PointSet.
+        ClientDisconnected: If the client disconnects first.
+
+    """
+    expected = _content_length(scope)
+    if expected is not None and expected > limit:
+        raise PayloadTooLarge(f"Body larger than {limit} bytes")
+    decoder = PointSetDecoder(
+        (limit - COUNT.size) // (2 * COORD_DTYPE.itemsize), expected)
+    async for chunk in _body_chunks(receive):
+        if not decoder.feed(chunk):
+            break
+    return decoder.close()
+
+
+async def triangulation(scope, send, pointSetId):
+    """Get triangulation for a PointSet.
+
+    Same contract as ``main.triangulation``.
+
+    Args:
+        scope: ASGI connection scope.
+        send: ASGI send callable.
+        pointSetId: UUID of the PointSet.
+
+    """
+    try:
+        backend = _backend(scope)
+        body = await _triangulation_body(pointSetId, backend)
+    except TriangulationError as e:
+        await _send_error(send, e.status, e.code, e.message)
+        return
+
+    await _send_encoded(send, body, _negotiated(scope),
+                        cache_key=_result_key(pointSetId, backend))
+
+
+async def _send_encoded(send, body, negotiated, cache_key=None):
+    """Send a triangulation in a negotiated format.
+
+    Same contract as ``main._binary_response``. Encoding and compression
+    run in the executor, only the ``send`` calls on the event loop.
+
+    Args:
+        send: ASGI send callable.
+        body: Binary triangulation, or an iterator over its chunks.
+        negotiated: Value of ``_negotiate``.
+        cache_key: result_cache key under which to store a streamed plain
+            body once sent, or None.
+
+    """
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    body = await loop.run_in_executor(
+        executor, functools.partial(_encode_body, body, *negotiated,
+                                    cache_key=cache_key))
+    headers = _response_headers(*negotiated)
+    if isinstance(body, bytes):
+        headers['Content-Length'] = str(len(body))
+        body = (body,)
+    await _send_chunks(send, _timed_chunks(body, time.perf_counter() - start),
+                       headers)
+
+
+async def _send_chunks(send, chunks, headers=None):
+    """Stream a binary response as its chunks are encoded.
+
+    Each chunk is produced in the executor. Without Content-Length in
+    ``headers``, the server sends the chunks as they are encoded.
+    """
+    if headers is None:
+        headers = {'Content-Type': 'application/octet-stream'}
+    loop = asyncio.get_running_loop()
+    chunks = iter(chunks)
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(k.lower().encode(), v.encode())
+                    for k, v in headers.items()],
+    })
+    while (chunk := await loop.run_in_executor(executor, next, chunks,
+                                               None)) is not None:
+        await send({'type': 'http.response.body', 'body': chunk,
+                    'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def triangulation_upload(scope, receive, send):
+    """Get triangulation for a PointSet sent in the request body.
+
+    Same contract as ``main.triangulation_upload``. The body is decoded as
+    it is received, and nothing is sent if the client disconnects first.
+
+    Args:
+        scope: ASGI connection scope.
+        receive: ASGI receive callable.
+        send: ASGI send callable.
+
+    """
+    try:
+        backend = _backend(scope)
+    except TriangulationError as e:
+        await _send_error(send, e.status, e.code, e.message)
+        return
+    try:
+        pointset = await _read_pointset(scope, receive, MAX_UPLOAD_BYTES)
+    except ClientDisconnected:
+        return
+    except PayloadTooLarge as e:
+        await _send_error(send, 413, "PAYLOAD_TOO_LARGE", str(e))
+        return
+    except ValueError as e:
+        await _send_error(send, 400, "INVALID_POINTSET", str(e))
+        return
+
+    try:
+        body = await _triangles_body(_upload_key(pointset, backend), pointset,
+                                     backend)
+    except TriangulationError as e:
+        await _send_error(send, e.status, e.code, e.message)
+        return
+    await _send_encoded(send, body, _negotiated(scope))
+
+
+async def _batch_item(pointSetId):
+    """Triangulate one item of a batch request.
+
+    Returns:
+        Encoded batch record.
+
+    """
+    try:
+        body = await _triangulation_body(pointSetId)
+    except TriangulationError as e:
+        return _error_record(e)
+    if not isinstance(body, bytes):
+        loop = asyncio.get_running_loop()
+        body = await loop.run_in_executor(
+            executor, b''.join, _cache_when_sent(result_cache, pointSetId,
+                                                 body))
+    return _batch_record(200, body)
+
+
+async def triangulation_batch(scope, receive, send):
+    """Get triangulations for a list of PointSets.
+
+    Same contract as ``main.triangulation_batch``.
+
+    Args:
+        scope: ASGI connection scope.
+        receive: ASGI receive callable.
+        send: ASGI send callable.
+
+    """
+    try:
+        body = await _read_body(receive, BATCH_MAX_BODY)
+    except ClientDisconnected:
+        return
+    if body is None:
+        await _send_error(send, 413, "BATCH_TOO_LARGE",
+                          f"At most {BATCH_MAX_IDS} pointSetIds")
+        return
+    try:
+        ids = _batch_ids(json.loads(body))
+    except ValueError:
+        ids = None
+    if ids is None:
+        await _send_error(send, 400, "INVALID_BATCH",
+                          "Expected a JSON list of pointSetIds")
+        return
+    if len(ids) > BATCH_MAX_IDS:
+        await _send_error(send, 413, "BATCH_TOO_LARGE",
+                          f"At most {BATCH_MAX_IDS} pointSetIds")
+        return
+
+    tasks = [asyncio.ensure_future(_batch_item(i)) for i in ids]
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'application/octet-stream')],
+    })
+    await send({'type': 'http.response.body', 'body': COUNT.pack(len(ids)),
+                'more_body': True})
+    for task in tasks:
+        await send({'type': 'http.response.body', 'body': await task,
+                    'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def backends(send):
+    """List the triangulation engines with their capabilities and costs.
+
+    Args:
+        send: ASGI send callable.
+
+    """
+    await _send(send, 200, json.dumps(_backends_body()).encode(),
+                'application/json')
+
+
+async def ready(send):
+    """Get the readiness of the triangulation backend.
+
+    The first probe starts the initialization of a lazy backend.
+
+    Args:
+        send: ASGI send callable.
+
+    """
+    state = Triangulator.initialize(background=True)
+    await _send(send, 200 if state.ready else 503,
+                json.dumps(state.stats()).encode(), 'application/json')
+
+
+async def metrics_endpoint(send):
+    """Get the service metrics in the Prometheus text exposition format.
+
+    Args:
+        send: ASGI send callable.
+
+    """
+    await _send(send, 200, metrics.render().encode(), METRICS_CONTENT_TYPE)
+
+
+GET_ROUTES = {
+    BACKENDS_PATH: backends,
+    READY_PATH: ready,
+    METRICS_PATH: metrics_endpoint,
+}
+
+POST_ROUTES = {
+    UPLOAD_PATH: triangulation_upload,
+    BATCH_PATH: triangulation_batch,
+}
+
+
+async def _lifespan(receive, send):
+    """Handle the ASGI lifespan protocol."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Server workers may be multiprocessing children, which init()
+            # leaves without an executor. Warm the backend while the server
+            # starts accepting probes.
+            _start_executor()
+            Triangulator.initialize(background=True)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI application entry point."""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    if scope['method'] == 'POST' and scope['path'] in POST_ROUTES:
+        await POST_ROUTES[scope['path']](scope, receive, send)
+        return
+    match = ROUTE.match(scope['path'])
+    allowed = [method for method, found in (
+        ('GET', match is not None or scope['path'] in GET_ROUTES),
+        ('POST', scope['path'] in POST_ROUTES),
+    ) if found]
+    if not allowed:
+        await _send(send, 404, b'Not Found', 'text/plain')
+    elif scope['method'] != 'GET' or 'GET' not in allowed:
+        await _send(send, 405, b'Method Not Allowed', 'text/plain',
+                    [(b'allow', ', '.join(allowed).encode())])
+    elif match is None:
+        await GET_ROUTES[scope['path']](send)
+    else:
+        await triangulation(scope, send, match.group('pointSetId'))
@@ -0,0 +1,486 @@
+"""Reproducible benchmarks of the binary codecs and the triangulation.
+
+Inputs come from seeded generators, so every run measures the same work:
+uniform, clustered, grid (cocircular) and collinear-heavy point sets of any
+size. Each case is warmed up, then timed with ``perf_counter`` over repeated
+samples; calls too fast for the clock are batched until a sample lasts
+MIN_SAMPLE_SECONDS. Results report percentiles and throughput in points/s
+and MB/s, and can be saved as a JSON baseline that later runs are compared
+against.
+
+Usage::
+
+    python bench.py --sizes 10,1000,100000 --save baseline.json
+    python bench.py --compare baseline.json --threshold 0.25
+    python bench.py --stages triangulate --backends scipy,native,auto
+
+The comparison exits with status 1 when a case got slower than the
+baseline by more than the threshold. Baselines are machine specific and
+not committed: ``make bench_baseline`` saves one, which ``make bench`` then
+compares against instead of only reporting the timings. With
+``--backends``, the triangulation is timed once per engine and a matrix of
+the medians closes the report.
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from main import AUTO, BACKENDS, COORD_DTYPE, PointSet, Triangles, Triangulator
+
+KINDS = ('uniform', 'clustered', 'grid', 'collinear')
+
+CODEC_STAGES = (
+    'pointset.to_binary',
+    'pointset.from_binary',
+    'triangles.to_binary',
+    'triangles.from_binary',
+    'triangles.iter_binary',
+    'triangles.to_compact',
+    'triangles.from_compact',
+    'triangles.to_file',
+    'triangles.from_file',
+)
+TRIANGULATION_STAGES = ('triangulate',)
+STAGES = CODEC_STAGES + TRIANGULATION_STAGES
+
+DEFAULT_SIZES = (10, 1000, 100000)
+FULL_SIZES = (10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+PERCENTILES = (50, 90, 99)
+
+# Shortest sample; faster calls are repeated within one sample.
+MIN_SAMPLE_SECONDS = 0.001
+
+# Relative slowdown of the median beyond which a case is a regression.
+DEFAULT_THRESHOLD = 0.25
+
+# Environment variable naming a baseline the perf tests compare against.
+BASELINE_ENV = 'TRIANGULATION_BENCH_BASELINE'
+
+
+def generate(kind, n_points, seed=0):
+    """Generate a reproducible point set.
+
+    Args:
+        kind: One of KINDS.
+        n_points: Number of points.
+        seed: Seed, combined with the kind and size.
+
+    Returns:
+        float32 ``(n_points, 2)`` coordinate array.
+
+    Raises:
+        ValueError: If ``kind`` is unknown.
+
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown input kind {kind!r}")
+    rng = np.random.default_rng([seed, KINDS.index(kind), n_points])
+    if kind == 'uniform':
+        coords = rng.uniform(-1000, 1000, size=(n_points, 2))
+    elif kind == 'clustered':
+        # Clusters of widely varying spread around random centers.
+        n_clusters = max(1, int(np.sqrt(n_points)) // 4)
+        centers = rng.uniform(-1000, 1000, size=(n_clusters, 2))
+        spreads = 10.0 ** rng.uniform(-3, 1, size=n_clusters)
+        labels = rng.integers(0, n_clusters, size=n_points)
+        coords = centers[labels] + rng.normal(size=(n_points, 2)) \
+            * spreads[labels, None]
+    elif kind == 'grid':
+        # Integer lattice: every unit square is cocircular.
+        side = int(np.ceil(np.sqrt(n_points)))
+        index = np.arange(n_points)
+        coords = np.stack([index % side, index // side], axis=1)
+    else:
+        # Integer points on four exact lines, plus 1% scattered points.
+        x = rng.integers(-10 ** 6, 10 ** 6, size=n_points)
+        slopes = np.array([0, 1, -1, 2])[rng.integers(0, 4, size=n_points)]
+        coords = np.stack([x, slopes * x], axis=1).astype(np.float64)
+        scattered = rng.random(n_points) < 0.01
+        scattered[:1] = True
+        coords[scattered] = rng.uniform(-10 ** 6, 10 ** 6,
+                                        size=(scattered.sum(), 2))
+    return np.ascontiguousarray(coords, dtype=COORD_DTYPE)
+
+
+@functools.lru_cache(maxsize=2)
+def _inputs(kind, n_points, seed):
+    """Build the encoded inputs of the benchmarks of one point set."""
+    pointset = PointSet(n_points, generate(kind, n_points, seed))
+    store, Triangulator.store = Triangulator.store, None
+    try:
+        triangles = Triangulator.triangulate(pointset)
+    finally:
+        Triangulator.store = store
+    return pointset, triangles, pointset.to_binary(), triangles.to_binary(), \
+        triangles.to_compact()
+
+
+def _stage(stage, kind, n_points, seed, directory, backend=None):
+    """Get the call timed by a stage and the bytes it processes.
+
+    Args:
+        stage: One of STAGES.
+        kind: One of KINDS.
+        n_points: Number of points.
+        seed: Generator seed.
+        directory: Directory for the file stages.
+        backend: Triangulation engine or AUTO, None for the configured one.
+
+    Returns:
+        Tuple ``(fn, n_bytes)``.
+
+    """
+    pointset, triangles, points_binary, binary, compact = _inputs(
+        kind, n_points, seed)
+    path = os.path.join(directory, f'{kind}-{n_points}.bin')
+    if stage == 'triangles.from_file':
+        triangles.to_file(path)
+
+    def triangulate():
+        # The store would turn repeated runs into lookups.
+        store, Triangulator.store = Triangulator.store, None
+        try:
+            return Triangulator.triangulate(pointset, backend)
+        finally:
+            Triangulator.store = store
+
+    calls = {
+        'pointset.to_binary': (pointset.to_binary, len(points_binary)),
+        'pointset.from_binary': (
+            functools.partial(PointSet.from_binary, points_binary),
+            len(points_binary)),
+        'triangles.to_binary': (triangles.to_binary, len(binary)),
+        'triangles.from_binary': (
+            functools.partial(Triangles.from_binary, binary), len(binary)),
+        'triangles.iter_binary': (
+            lambda: b''.join(triangles.iter_binary()), len(binary)),
+        'triangles.to_compact': (triangles.to_compact, len(binary)),
+        'triangles.from_compact': (
+            functools.partial(Triangles.from_compact, compact), len(binary)),
+        'triangles.to_file': (
+            functools.partial(triangles.to_file, path), len(binary)),
+        'triangles.from_file': (
+            functools.partial(Triangles.from_file, path), len(binary)),
+        'triangulate': (triangulate, len(points_binary)),
+    }
+    if stage not in calls:
+        raise ValueError(f"Unknown stage {stage!r}")
+    return calls[stage]
+
+
+def measure(fn, warmup=1, repeat=7, max_seconds=10.0,
+            clock=time.perf_counter):
+    """Time a call over repeated samples.
+
+    Args:
+        fn: Callable to time.
+        warmup: Number of untimed calls first.
+        repeat: Number of samples.
+        max_seconds: Time after the warm-up past which sampling stops,
+            once three samples are taken.
+        clock: Clock returning seconds.
+
+    Returns:
+        List of seconds per call, one per sample.
+
+    """
+    for _ in range(warmup):
+        fn()
+    deadline = clock() + max_seconds
+    # Batch calls faster than MIN_SAMPLE_SECONDS, as timeit's autorange.
+    number = 1
+    while True:
+        start = clock()
+        for _ in range(number):
+            fn()
+        elapsed = clock() - start
+        if elapsed >= MIN_SAMPLE_SECONDS or number >= 1 << 20:
+            break
+        number *= 10
+    samples = [elapsed / number]
+    while len(samples) < repeat and (len(samples) < 3
+                                     or clock() < deadline):
+        start = clock()
+        for _ in range(number):
+            fn()
+        samples.append((clock() - start) / number)
+    return samples
+
+
+def run_case(stage, kind, n_points, seed=0, warmup=1, repeat=7,
+             max_seconds=10.0, directory=None, backend=None):
+    """Benchmark one stage on one generated point set.
+
+    Args:
+        stage: One of STAGES.
+        kind: One of KINDS.
+        n_points: Number of points.
+        seed: Generator seed.
+        warmup: Number of untimed calls first.
+        repeat: Number of samples.
+        max_seconds: Time after which sampling stops early.
+        directory: Directory for the file stages, a temporary one if None.
+        backend: Triangulation engine or AUTO of the triangulation stages,
+            None for the configured one.
+
+    Returns:
+        Result dictionary, with the percentiles in seconds per call.
+
+    """
+    if stage not in TRIANGULATION_STAGES:
+        backend = None
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        fn, n_bytes = _stage(stage, kind, n_points, seed, tmp, backend)
+        samples = measure(fn, warmup, repeat, max_seconds)
+    result = {
+        'stage': stage,
+        'kind': kind,
+        'n_points': n_points,
+        'backend': backend,
+        'bytes': n_bytes,
+        'samples': samples,
+    }
+    for percentile in PERCENTILES:
+        result[f'p{percentile}'] = float(np.percentile(samples, percentile))
+    result['points_per_s'] = n_points / result['p50']
+    result['mb_per_s'] = n_bytes / result['p50'] / 1e6
+    return result
+
+
+def case_key(result):
+    """Get the key identifying a case in a baseline."""
+    key = f"{result['stage']}/{result['kind']}/{result['n_points']}"
+    if result.get('backend') is not None:
+        key += f"/{result['backend']}"
+    return key
+
+
+def environment():
+    """Describe the machine and configuration of a run."""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'backend': Triangulator.backend,
+        'backends': [name for name, engine in BACKENDS.items()
+                     if engine.available()],
+        'executor': Triangulator.executor is not None,
+    }
+
+
+def compare(baseline, results, threshold=DEFAULT_THRESHOLD):
+    """Find the cases slower than their baseline.
+
+    Args:
+        baseline: Saved run, as written by ``save``.
+        results: Result dictionaries of the current run.
+        threshold: Allowed relative slowdown of the median.
+
+    Returns:
+        List of ``(key, baseline_p50, p50)`` for each regression. Cases
+        missing from the baseline are not compared.
+
+    """
+    cases = baseline['cases']
+    regressions = []
+    for result in results:
+        key = case_key(result)
+        if key not in cases:
+            continue
+        before = cases[key]['p50']
+        if result['p50'] > before * (1 + threshold):
+            regressions.append((key, before, result['p50']))
+    return regressions
+
+
+def assert_no_regression(result, threshold=DEFAULT_THRESHOLD):
+    """Fail when a case regressed against the baseline in BASELINE_ENV.
+
+    Does nothing when no baseline is configured.
+
+    Raises:
+        AssertionError: If the case is slower than its baseline.
+
+    """
+    path = os.environ.get(BASELINE_ENV)
+    if not path:
+        return
+    regressions = compare(load(path), [result], threshold)
+    assert not regressions, format_regressions(regressions, threshold)
+
+
+def save(path, results):
+    """Save a run as a JSON baseline."""
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(),
+                   'cases': {case_key(r): r for r in results}}, f, indent=1)
+
+
+def load(path):
+    """Load a JSON baseline."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def _stage_label(result):
+    """Get the stage of a result, with the engine it was timed with."""
+    if result.get('backend') is None:
+        return result['stage']
+    return f"{result['stage']}[{result['backend']}]"
+
+
+def format_result(result):
+    """Format a result as one report line."""
+    return (f"{_stage_label(result):<24} {result['kind']:<10} "
+            f"{result['n_points']:>9} "
+            + ' '.join(f"{result[f'p{p}'] * 1e3:>10.4f}"
+                       for p in PERCENTILES)
+            + f" {result['points_per_s'] / 1e6:>10.2f}"
+            f" {result['mb_per_s']:>10.1f}")
+
+
+def format_header():
+    """Format the header of the report lines."""
+    return (f"{'stage':<24} {'kind':<10} {'points':>9} "
+            + ' '.join(f"{f'p{p} ms':>10}" for p in PERCENTILES)
+            + f" {'Mpoints/s':>10} {'MB/s':>10}")
+
+
+def format_matrix(results):
+    """Format the median time of each engine, one line per input.
+
+    Args:
+        results: Results of the triangulation stages timed with a backend.
+
+    Returns:
+        Table with one column per engine and the fastest one last.
+
+    """
+    backends = list(dict.fromkeys(r['backend'] for r in results))
+    cases = {}
+    for result in results:
+        cases.setdefault((result['kind'], result['n_points']), {})[
+            result['backend']] = result['p50']
+    lines = [f"{'kind':<10} {'points':>9} "
+             + ' '.join(f"{f'{b} ms':>12}" for b in backends)
+             + f" {'fastest':>10}"]
+    for (kind, n_points), medians in cases.items():
+        lines.append(
+            f"{kind:<10} {n_points:>9} "
+            + ' '.join(f"{medians[b] * 1e3:>12.4f}" if b in medians
+                       else f"{'-':>12}" for b in backends)
+            + f" {min(medians, key=medians.get):>10}")
+    return '\n'.join(lines)
+
+
+def format_regressions(regressions, threshold):
+    """Format the regressions found by ``compare``."""
+    lines = [f"Slower than the baseline by more than {threshold:.0%}:"]
+    for key, before, after in regressions:
+        lines.append(f"  {key}: {before * 1e3:.4f} ms -> {after * 1e3:.4f} ms"
+                     f" (+{after / before - 1:.0%})")
+    return '\n'.join(lines)
+
+
+def _list(value):
+    """Parse a comma-separated command line option."""
+    return tuple(v for v in value.split(',') if v)
+
+
+def _sizes(value):
+    """Parse the --sizes option, where ``full`` stands for FULL_SIZES."""
+    if value == 'full':
+        return FULL_SIZES
+    return tuple(int(v) for v in _list(value))
+
+
+def _backends(value):
+    """Parse the --backends option, where ``all`` stands for every engine."""
+    if value == 'all':
+        return tuple(BACKENDS) + (AUTO,)
+    names = _list(value)
+    unknown = [n for n in names if n != AUTO and n not in BACKENDS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown backends {', '.join(unknown)}; expected "
+            f"{', '.join([*BACKENDS, AUTO])} or all")
+    return names
+
+
+def main(argv=None):
+    """Run the benchmarks from the command line.
+
+    Returns:
+        Exit status, 1 when a regression was found.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=_sizes, default=DEFAULT_SIZES,
+                        help="comma-separated point counts, or 'full'")
+    parser.add_argument('--kinds', type=_list, default=KINDS)
+    parser.add_argument('--stages', type=_list, default=STAGES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--max-seconds', type=float, default=10.0)
+    parser.add_argument('--backend', default=None,
+                        help="configured triangulation backend, an engine "
+                             "name or auto")
+    parser.add_argument('--backends', type=_backends, default=(None,),
+                        help="comma-separated engines timing each "
+                             "triangulation stage, or 'all'")
+    parser.add_argument('--save', metavar='PATH')
+    parser.add_argument('--compare', metavar='PATH')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+    if args.backend is not None:
+        Triangulator.backend = args.backend
+
+    backends = []
+    for name in args.backends:
+        if name in BACKENDS and not BACKENDS[name].available():
+            print(f"Skipping the {name} backend, not installed.",
+                  file=sys.stderr)
+        else:
+            backends.append(name)
+
+    print(format_header())
+    results = []
+    for n_points in args.sizes:
+        for kind in args.kinds:
+            for stage in args.stages:
+                for backend in (backends if stage in TRIANGULATION_STAGES
+                                else (None,)):
+                    result = run_case(stage, kind, n_points, args.seed,
+                                      args.warmup, args.repeat,
+                                      args.max_seconds, backend=backend)
+                    print(format_result(result), flush=True)
+                    results.append(result)
+
+    matrix = [r for r in results if r['backend'] is not None]
+    if len(backends) > 1 and matrix:
+        print()
+        print(format_matrix(matrix))
+
+    if args.save:
+        save(args.save, results)
+    if args.compare:
+        regressions = compare(load(args.compare), results, args.threshold)
+        if regressions:
+            print(format_regressions(regressions, args.threshold))
+            return 1
+        print(f"No regression beyond {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,613 @@
+"""Incremental Delaunay triangulation without SciPy.
+
+Bowyer-Watson insertion over a triangle mesh stored in flat Python lists.
+Points are inserted in a biased randomized insertion order (BRIO) whose
+rounds are sorted along a Hilbert curve, and each point is located by
+walking from the last created triangle, which gives an expected
+O(n log n) running time.
+
+Every hull edge carries a ghost triangle sharing the vertex ``GHOST`` at
+infinity, so points outside the current hull are inserted like any other.
+The orientation and in-circle predicates use a floating-point filter
+backed by exact rational arithmetic, which keeps duplicate, collinear and
+cocircular inputs consistent.
+"""
+from fractions import Fraction
+
+import numpy as np
+
+# Vertex at infinity shared by the ghost triangles.
+GHOST = -1
+
+_EPS = 2.0 ** -53
+_ORIENT_BOUND = (3.0 + 16.0 * _EPS) * _EPS
+_INCIRCLE_BOUND = (10.0 + 96.0 * _EPS) * _EPS
+
+# Bits per axis of the Hilbert curve used to sort insertion rounds.
+HILBERT_ORDER = 16
+
+
+def _orient_exact(ax, ay, bx, by, cx, cy):
+    """Exact sign of the orientation determinant."""
+    ax, ay, bx, by, cx, cy = map(Fraction, (ax, ay, bx, by, cx, cy))
+    det = (ax - cx) * (by - cy) - (ay - cy) * (bx - cx)
+    return (det > 0) - (det < 0)
+
+
+def orient(ax, ay, bx, by, cx, cy):
+    """Get the orientation of three points.
+
+    Returns:
+        1 if ``(a, b, c)`` turns counterclockwise, -1 if clockwise and 0
+        if the points are collinear.
+
+    """
+    detleft = (ax - cx) * (by - cy)
+    detright = (ay - cy) * (bx - cx)
+    det = detleft - detright
+    bound = _ORIENT_BOUND * (abs(detleft) + abs(detright))
+    if det > bound:
+        return 1
+    if -det > bound:
+        return -1
+    return _orient_exact(ax, ay, bx, by, cx, cy)
+
+
+def _incircle_exact(ax, ay, bx, by, cx, cy, dx, dy):
+    """Exact sign of the in-circle determinant."""
+    ax, ay, bx, by, cx, cy, dx, dy = map(
+        Fraction, (ax, ay, bx, by, cx, cy, dx, dy))
+    adx, ady = ax - dx, ay - dy
+    bdx, bdy = bx - dx, by - dy
+    cdx, cdy = cx - dx, cy - dy
+    det = ((adx * adx + ady * ady) * (bdx * cdy - cdx * bdy)
+           + (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy)
+           + (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady))
+    return (det > 0) - (det < 0)
+
+
+def incircle(ax, ay, bx, by, cx, cy, dx, dy):
+    """Locate a point relative to the circumcircle of a CCW triangle.
+
+    Returns:
+        1 if ``d`` lies inside the circle through ``a``, ``b`` and ``c``,
+        -1 if outside and 0 if on it.
+
+    """
+    adx, ady = ax - dx, ay - dy
+    bdx, bdy = bx - dx, by - dy
+    cdx, cdy = cx - dx, cy - dy
+    bdxcdy, cdxbdy = bdx * cdy, cdx * bdy
+    cdxady, adxcdy = cdx * ady, adx * cdy
+    adxbdy, bdxady = adx * bdy, bdx * ady
+    alift = adx * adx + ady * ady
+    blift = bdx * bdx + bdy * bdy
+    clift = cdx * cdx + cdy * cdy
+    det = (alift * (bdxcdy - cdxbdy) + blift * (cdxady - adxcdy)
+           + clift * (adxbdy - bdxady))
+    permanent = ((abs(bdxcdy) + abs(cdxbdy)) * alift
+                 + (abs(cdxady) + abs(adxcdy)) * blift
+                 + (abs(adxbdy) + abs(bdxady)) * clift)
+    bound = _INCIRCLE_BOUND * permanent
+    if det > bound:
+        return 1
+    if -det > bound:
+        return -1
+    return _incircle_exact(ax, ay, bx, by, cx, cy, dx, dy)
+
+
+def hilbert_keys(coords, order=HILBERT_ORDER):
+    """Get the position of each point along a Hilbert curve.
+
+    Args:
+        coords: ``(n, 2)`` coordinate array.
+        order: Bits per axis of the curve.
+
+    Returns:
+        int64 array of curve positions.
+
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    side = (1 << order) - 1
+    low = coords.min(axis=0)
+    extent = float((coords.max(axis=0) - low).max()) or 1.0
+    x, y = ((coords - low) / extent * side).astype(np.int64).T
+    keys = np.zeros(len(coords), dtype=np.int64)
+    s = 1 << (order - 1)
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        keys += s * s * ((3 * rx) ^ ry)
+        flip = ~ry & rx
+        x = np.where(flip, side - x, x)
+        y = np.where(flip, side - y, y)
+        swap = ~ry
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s >>= 1
+    return keys
+
+
+def insertion_order(coords, seed=0):
+    """Get a biased randomized insertion order sorted by Hilbert rounds.
+
+    Each point lands in the last round with probability 1/2, the one
+    before with probability 1/4, and so on. Rounds are inserted from the
+    smallest to the largest and sorted along a Hilbert curve.
+
+    Args:
+        coords: ``(n, 2)`` coordinate array.
+        seed: Seed of the round assignment, for reproducible output.
+
+    Returns:
+        Array of point indices.
+
+    """
+    n = len(coords)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    u = np.random.default_rng(seed).random(n)
+    rounds = np.minimum(np.floor(-np.log2(1.0 - u)), 63).astype(np.int64)
+    return np.lexsort((hilbert_keys(coords), -rounds))
+
+
+class Mesh:
+    """Delaunay triangulation under construction.
+
+    Triangle ``t`` has vertices ``V[3t:3t+3]`` in counterclockwise order,
+    and ``N[3t+i]`` is the triangle across the edge opposite vertex ``i``.
+    Ghost triangles keep ``GHOST`` as their third vertex.
+    """
+
+    def __init__(self, coords):
+        """Initialize an empty Mesh over a set of points.
+
+        Args:
+            coords: ``(n, 2)`` coordinate array; points are referenced by
+                their row index and inserted with ``insert``.
+
+        """
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.x = coords[:, 0].tolist()
+        self.y = coords[:, 1].tolist()
+        self.V = []
+        self.N = []
+        self.free = []
+        # One live triangle per inserted vertex, -1 when not inserted.
+        self.vertex_triangle = [-1] * len(self.x)
+        self.last = -1
+        self._turn = 0
+
+    def __len__(self):
+        """Get number of points the mesh can reference."""
+        return len(self.x)
+
+    @classmethod
+    def from_simplices(cls, coords, simplices):
+        """Rebuild the mesh of an existing Delaunay triangulation.
+
+        The adjacency is computed with one vectorized sort of the edges,
+        so only the later edits run point by point.
+
+        Args:
+            coords: ``(n, 2)`` coordinate array.
+            simplices: ``(m, 3)`` vertex indices of a Delaunay
+                triangulation of some of the points, in any orientation.
+
+        Returns:
+            Mesh instance.
+
+        Raises:
+            ValueError: If the triangles do not form a triangulated disk.
+
+        """
+        mesh = cls(coords)
+        n = len(mesh)
+        real = np.array(simplices, dtype=np.int64).reshape(-1, 3)
+        if len(real) == 0:
+            raise ValueError("Empty triangulation")
+        xy = np.asarray(coords, dtype=np.float64).reshape(-1, 2)[real]
+        area = ((xy[:, 1, 0] - xy[:, 0, 0]) * (xy[:, 2, 1] - xy[:, 0, 1])
+                - (xy[:, 1, 1] - xy[:, 0, 1]) * (xy[:, 2, 0] - xy[:, 0, 0]))
+        real[area < 0] = real[area < 0][:, [0, 2, 1]]
+
+        # Directed edge (a, b) opposite each vertex, paired through one
+        # sort of the undirected edge keys.
+        a = real[:, [1, 2, 0]].ravel()
+        b = real[:, [2, 0, 1]].ravel()
+        keys = np.minimum(a, b) * n + np.maximum(a, b)
+        order = np.argsort(keys)
+        shared = keys[order[1:]] == keys[order[:-1]]
+        first, second = order[:-1][shared], order[1:][shared]
+        if (shared[1:] & shared[:-1]).any() or \
+                (a[first] != b[second]).any():
+            raise ValueError("Triangles do not form a triangulated disk")
+        neighbors = np.full(len(keys), -1, dtype=np.int64)
+        neighbors[first] = second // 3
+        neighbors[second] = first // 3
+
+        # One ghost (b, a, GHOST) behind each hull edge (a, b), linked to
+        # the ghosts of the previous and next hull edges.
+        hull = np.flatnonzero(neighbors < 0)
+        ghost_ids = np.arange(len(real), len(real) + len(hull))
+        neighbors[hull] = ghost_ids
+        ghosts = np.column_stack([b[hull], a[hull],
+                                  np.full(len(hull), GHOST)])
+        if (np.bincount(ghosts[:, 0], minlength=n) > 1).any():
+            raise ValueError("Triangles do not form a triangulated disk")
+        by_first = np.full(n, -1, dtype=np.int64)
+        by_first[ghosts[:, 0]] = ghost_ids
+        by_second = np.full(n, -1, dtype=np.int64)
+        by_second[ghosts[:, 1]] = ghost_ids
+        ghost_neighbors = np.column_stack([by_first[ghosts[:, 1]],
+                                           by_second[ghosts[:, 0]],
+                                           hull // 3])
+        if (ghost_neighbors < 0).any():
+            raise ValueError("Triangles do not form a triangulated disk")
+        triangles = np.concatenate([real, ghosts])
+        neighbors = np.concatenate([neighbors, ghost_neighbors.ravel()])
+
+        mesh.V = triangles.ravel().tolist()
+        mesh.N = neighbors.tolist()
+        vertex_triangle = np.full(n, -1, dtype=np.int64)
+        vertex_triangle[real.ravel()] = np.repeat(np.arange(len(real)), 3)
+        mesh.vertex_triangle = vertex_triangle.tolist()
+        mesh.last = 0
+        return mesh
+
+    def _alloc(self, a, b, c):
+        """Create a triangle, reusing a free slot when possible."""
+        if b == GHOST:
+            a, b, c = c, a, b
+        elif a == GHOST:
+            a, b, c = b, c, a
+        if self.free:
+            t = self.free.pop()
+            self.V[3 * t:3 * t + 3] = (a, b, c)
+            self.N[3 * t:3 * t + 3] = (-1, -1, -1)
+        else:
+            t = len(self.V) // 3
+            self.V.extend((a, b, c))
+            self.N.extend((-1, -1, -1))
+        return t
+
+    def is_ghost(self, t):
+        """Check whether a triangle is a ghost triangle."""
+        return self.V[3 * t + 2] == GHOST
+
+    def start(self, a, b, c):
+        """Create the first triangle and its ghosts.
+
+        Args:
+            a: Index of the first vertex.
+            b: Index of the second vertex.
+            c: Index of the third vertex, not collinear with the others.
+
+        """
+        x, y = self.x, self.y
+        if orient(x[a], y[a], x[b], y[b], x[c], y[c]) < 0:
+            b, c = c, b
+        self.replace([], [(a, b, c), (b, a, GHOST), (c, b, GHOST),
+                          (a, c, GHOST)])
+
+    def replace(self, cavity, triangles):
+        """Replace a set of triangles by another tiling of the same region.
+
+        Args:
+            cavity: Live triangles to remove.
+            triangles: Vertex triples of the new triangles, counterclockwise.
+
+        Returns:
+            Indices of the new triangles.
+
+        Raises:
+            RuntimeError: If the new triangles do not tile the cavity.
+
+        """
+        V, N = self.V, self.N
+        removed = set(cavity)
+        outside = {}
+        for t in cavity:
+            for i in range(3):
+                n = N[3 * t + i]
+                if n not in removed:
+                    outside[(V[3 * t + (i + 1) % 3],
+                             V[3 * t + (i + 2) % 3])] = n
+        for t in cavity:
+            V[3 * t] = V[3 * t + 1] = V[3 * t + 2] = None
+        self.free.extend(cavity)
+
+        created = [self._alloc(*triangle) for triangle in triangles]
+        pending = {}
+        for t in created:
+            for i in range(3):
+                a = V[3 * t + (i + 1) % 3]
+                b = V[3 * t + (i + 2) % 3]
+                n = outside.pop((a, b), None)
+                if n is not None:
+                    N[3 * t + i] = n
+                    for j in range(3):
+                        if V[3 * n + (j + 1) % 3] == b and \
+                                V[3 * n + (j + 2) % 3] == a:
+                            N[3 * n + j] = t
+                            break
+                    continue
+                match = pending.pop((b, a), None)
+                if match is None:
+                    pending[(a, b)] = 3 * t + i
+                else:
+                    N[3 * t + i] = match // 3
+                    N[match] = t
+        if outside or pending:
+            raise RuntimeError("New triangles do not tile the cavity")
+
+        vertex_triangle = self.vertex_triangle
+        for t in created:
+            for v in V[3 * t:3 * t + 3]:
+                if v != GHOST:
+                    vertex_triangle[v] = t
+            if V[3 * t + 2] != GHOST:
+                self.last = t
+        return created
+
+    def _conflict(self, t, px, py):
+        """Check whether a point lies in the circumcircle of a triangle."""
+        V, x, y = self.V, self.x, self.y
+        a, b, c = V[3 * t], V[3 * t + 1], V[3 * t + 2]
+        if c != GHOST:
+            return incircle(x[a], y[a], x[b], y[b], x[c], y[c], px, py) > 0
+        side = orient(x[a], y[a], x[b], y[b], px, py)
+        if side:
+            return side > 0
+        # On the hull line: in conflict only strictly inside the edge.
+        if x[a] != x[b]:
+            return min(x[a], x[b]) < px < max(x[a], x[b])
+        return min(y[a], y[b]) < py < max(y[a], y[b])
+
+    def locate(self, px, py, start=None):
+        """Walk to a triangle whose circumcircle contains a point.
+
+        Args:
+            px: X coordinate of the point.
+            py: Y coordinate of the point.
+            start: Live triangle to walk from, the last created by default.
+
+        Returns:
+            Triangle index, or None if the point is already a vertex.
+
+        """
+        V, N, x, y = self.V, self.N, self.x, self.y
+        t = self.last if start is None else start
+        if V[3 * t + 2] == GHOST:
+            t = N[3 * t + 2]
+        while True:
+            # Rotate the first edge tested so that the walk cannot cycle.
+            self._turn = turn = (self._turn + 1) % 3
+            for k in range(3):
+                i = (turn + k) % 3
+                a = V[3 * t + (i + 1) % 3]
+                b = V[3 * t + (i + 2) % 3]
+                if orient(x[a], y[a], x[b], y[b], px, py) < 0:
+                    t = N[3 * t + i]
+                    break
+            else:
+                for v in V[3 * t:3 * t + 3]:
+                    if x[v] == px and y[v] == py:
+                        return None
+                return t
+            if V[3 * t + 2] == GHOST:
+                return t
+
+    def insert(self, v, start=None):
+        """Insert a point into the triangulation.
+
+        Args:
+            v: Index of the point.
+            start: Live triangle to start the point location from.
+
+        Returns:
+            True if inserted, False if it duplicates an existing vertex.
+
+        """
+        V, N = self.V, self.N
+        px, py = self.x[v], self.y[v]
+        t = self.locate(px, py, start)
+        if t is None:
+            return False
+
+        cavity = [t]
+        in_cavity = {t}
+        boundary = []
+        stack = [t]
+        while stack:
+            t = stack.pop()
+            for i in range(3):
+                n = N[3 * t + i]
+                if n in in_cavity:
+                    continue
+                if self._conflict(n, px, py):
+                    in_cavity.add(n)
+                    cavity.append(n)
+                    stack.append(n)
+                else:
+                    boundary.append((V[3 * t + (i + 1) % 3],
+                                     V[3 * t + (i + 2) % 3], v))
+        self.replace(cavity, boundary)
+        return True
+
+    def star(self, v):
+        """Get the triangles around a vertex and their outer vertices.
+
+        Returns:
+            Tuple ``(triangles, link)`` in counterclockwise order, where
+            ``link[k]`` follows ``v`` in ``triangles[k]``.
+
+        """
+        V, N = self.V, self.N
+        start = t = self.vertex_triangle[v]
+        triangles = []
+        link = []
+        while True:
+            i = V[3 * t:3 * t + 3].index(v)
+            triangles.append(t)
+            link.append(V[3 * t + (i + 1) % 3])
+            t = N[3 * t + (i + 1) % 3]
+            if t == start:
+                return triangles, link
+
+    def _is_ear(self, a, b, c, polygon):
+        """Check whether a triangle of hole vertices is Delaunay.
+
+        The triangle must turn counterclockwise and its circumcircle must
+        hold no other vertex of the hole.
+        """
+        x, y = self.x, self.y
+        if orient(x[a], y[a], x[b], y[b], x[c], y[c]) <= 0:
+            return False
+        return all(incircle(x[a], y[a], x[b], y[b], x[c], y[c],
+                            x[w], y[w]) <= 0
+                   for w in polygon if w != a and w != b and w != c)
+
+    def _cut_ears(self, polygon, closed):
+        """Cut Delaunay ears off a hole boundary until none is left.
+
+        Args:
+            polygon: Hole vertices, counterclockwise around the hole.
+                Shortened in place.
+            closed: Whether the boundary is a cycle or an open chain.
+
+        Returns:
+            List of the triangles cut off.
+
+        """
+        triangles = []
+        while len(polygon) > (3 if closed else 2):
+            size = len(polygon)
+            tips = range(size) if closed else range(1, size - 1)
+            for k in tips:
+                a, b, c = polygon[k - 1], polygon[k], polygon[(k + 1) % size]
+                if self._is_ear(a, b, c, polygon):
+                    triangles.append((a, b, c))
+                    del polygon[k]
+                    break
+            else:
+                break
+        return triangles
+
+    def remove(self, v):
+        """Remove a vertex from the triangulation.
+
+        The hole left by the star of ``v`` is filled by repeatedly cutting
+        off the ear whose circumcircle holds no other hole vertex, then,
+        for a hull vertex, by ghost triangles along the new hull.
+
+        Args:
+            v: Index of the point.
+
+        Returns:
+            True if removed, False if ``v`` is not a vertex.
+
+        Raises:
+            RuntimeError: If the hole cannot be filled, which happens when
+                too few non-collinear vertices remain.
+
+        """
+        if self.vertex_triangle[v] < 0:
+            return False
+        x, y = self.x, self.y
+        cavity, link = self.star(v)
+        if GHOST not in link:
+            polygon = link
+            triangles = self._cut_ears(polygon, closed=True)
+            if len(polygon) != 3 or not self._is_ear(*polygon, polygon):
+                raise RuntimeError("Cannot fill the hole of the vertex")
+            triangles.append(tuple(polygon))
+        else:
+            # The hull now runs along the chain of the other link vertices.
+            g = link.index(GHOST)
+            polygon = link[g + 1:] + link[:g]
+            triangles = self._cut_ears(polygon, closed=False)
+            # Without ears, the triangles behind the link are all that
+            # would be left.
+            V, N = self.V, self.N
+            behind = (N[3 * t + V[3 * t:3 * t + 3].index(v)]
+                      for t in cavity if V[3 * t + 2] != GHOST)
+            if not triangles and all(V[3 * n + 2] == GHOST for n in behind):
+                raise RuntimeError("No triangle would be left")
+            if len(polygon) < 2 or any(
+                    orient(x[a], y[a], x[b], y[b], x[c], y[c]) > 0
+                    for a, b, c in (polygon[k - 1:k + 2]
+                                    for k in range(1, len(polygon) - 1))):
+                raise RuntimeError("Cannot fill the hole of the vertex")
+            triangles.extend((polygon[k - 1], polygon[k], GHOST)
+                             for k in range(1, len(polygon)))
+        created = self.replace(cavity, triangles)
+        self.vertex_triangle[v] = -1
+        if self.V[3 * self.last + 2] is None:
+            self.last = next(
+                (t for t in created if self.V[3 * t + 2] != GHOST),
+                self.N[3 * created[0] + 2])
+        return True
+
+    def simplices(self):
+        """Get the real triangles of the mesh.
+
+        Returns:
+            int64 ``(m, 3)`` array of counterclockwise vertex indices.
+
+        """
+        V = np.array([GHOST if v is None else v for v in self.V],
+                     dtype=np.int64).reshape(-1, 3)
+        dead = np.zeros(len(V), dtype=bool)
+        dead[self.free] = True
+        return V[~dead & (V != GHOST).all(axis=1)]
+
+
+def _first_triangle(mesh, order):
+    """Find three non-collinear points, in insertion order.
+
+    Returns:
+        Positions in ``order`` of the three points, or None when all the
+        points are collinear.
+
+    """
+    x, y = mesh.x, mesh.y
+    a = order[0]
+    second = None
+    for k in range(1, len(order)):
+        v = order[k]
+        if second is None:
+            if x[v] != x[a] or y[v] != y[a]:
+                second = k
+        else:
+            b = order[second]
+            if orient(x[a], y[a], x[b], y[b], x[v], y[v]):
+                return 0, second, k
+    return None
+
+
+def triangulate(coords, seed=0):
+    """Compute the Delaunay triangulation of a set of points.
+
+    Duplicate points are left out of the triangulation, and collinear
+    inputs have no triangles.
+
+    Args:
+        coords: ``(n, 2)`` coordinate array.
+        seed: Seed of the insertion order.
+
+    Returns:
+        int64 ``(m, 3)`` array of counterclockwise vertex indices.
+
+    """
+    mesh = Mesh(coords)
+    if len(mesh) < 3:
+        return np.zeros((0, 3), dtype=np.int64)
+    order = insertion_order(coords, seed).tolist()
+    first = _first_triangle(mesh, order)
+    if first is None:
+        return np.zeros((0, 3), dtype=np.int64)
+    mesh.start(*(order[k] for k in first))
+    for k, v in enumerate(order):
+        if k not in first:
+            mesh.insert(v)
+    return mesh.simplices()
@@ -0,0 +1,705 @@
+"""Load tests of the HTTP service against a local PointSetManager stand-in.
+
+The stand-in serves GET /pointset/<id> and POST /pointset as described in
+point_set_manager.yml, from PointSets generated with ``bench.generate``,
+with configurable latency, injected 503 errors and payload sizes, and
+ETags for conditional retrievals. The triangulator is started as a
+subprocess pointed at the stand-in (or an already running one is given
+with --url) and driven either closed-loop, by a number of concurrent
+clients, or open-loop, at a target request rate. Open-loop latencies run
+from the time each request was scheduled, so a stalled service is not
+hidden by the load generator waiting on it.
+
+Each load level reports throughput, latency percentiles and errors by
+code. A sweep over increasing levels reports the saturation point: the
+first level where throughput stops growing, the p99 latency exceeds the
+SLO or errors exceed the allowed rate.
+
+Usage::
+
+    python loadtest.py --concurrency 1,2,4,8,16 --duration 10
+    python loadtest.py --rps 20,50,100 --latency 0.02 --error-rate 0.01
+    python loadtest.py --workers 4 --sizes 100000 --slo 0.5
+    python loadtest.py --url http://host:8000 --manager-port 5000
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import hashlib
+import json
+import os
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+from bench import KINDS, generate
+from main import PointSet
+
+FRONT_ENDS = ('flask', 'asgi')
+
+DEFAULT_SIZES = (1000,)
+DEFAULT_CONCURRENCY = (1, 2, 4, 8, 16)
+
+PERCENTILES = (50, 95, 99)
+
+# Throughput gain below which a higher load level no longer pays off.
+MIN_GAIN = 0.05
+
+# Share of server errors and unanswered requests beyond which a level is saturated.
+MAX_ERROR_RATE = 0.01
+
+# Codes of the requests that got no HTTP response.
+TIMEOUT = 'TIMEOUT'
+CONNECTION_ERROR = 'CONNECTION_ERROR'
+
+POINTSET_PATH = re.compile(r'^/pointset/([^/]+)$')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class StandInPointSetManager:
+    """Local PointSetManager serving generated PointSets.
+
+    Every GET first waits ``latency`` seconds, give or take ``jitter``,
+    then fails with 503 at rate ``error_rate``. Unknown ids get 404 and
+    malformed ones 400, with the JSON error body of the real service.
+    PointSets carry an ETag, and a matching ``If-None-Match`` gets 304.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=0,
+                 host='127.0.0.1', port=0, etags=True):
+        """Initialize a StandInPointSetManager, bound but not serving.
+
+        Args:
+            latency: Mean delay of a retrieval, in seconds.
+            jitter: Maximum deviation from the mean delay, in seconds.
+            error_rate: Share of retrievals answered with 503.
+            seed: Seed of the delays, errors and generated ids.
+            host: Interface to listen on.
+            port: Port to listen on, a free one if 0.
+            etags: Whether to support conditional retrievals.
+
+        """
+        self.latency = latency
+        self.etags = etags
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.pointsets = {}
+        self.served = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """Get the base URL of the stand-in."""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def register(self, binary):
+        """Store an encoded PointSet.
+
+        Returns:
+            The new PointSetID.
+
+        """
+        with self._lock:
+            point_set_id = str(uuid.UUID(int=self._rng.getrandbits(128),
+                                         version=4))
+        self.replace(point_set_id, binary)
+        return point_set_id
+
+    def replace(self, point_set_id, binary):
+        """Store an encoded PointSet under a given PointSetID."""
+        with self._lock:
+            self.pointsets[point_set_id] = binary
+
+    def start(self):
+        """Serve requests in a daemon thread."""
+        # A short poll interval keeps stop() from waiting half a second.
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        args=(0.01,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+
+    def __enter__(self):
+        """Start serving."""
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        """Stop serving."""
+        self.stop()
+
+    def _delay(self):
+        """Draw the delay of one retrieval."""
+        with self._lock:
+            jitter = self._rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, self.latency + jitter)
+
+    def _fails(self):
+        """Draw whether one retrieval is answered with 503."""
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def _count(self, status):
+        with self._lock:
+            self.served[status] = self.served.get(status, 0) + 1
+
+    def _handler(self):
+        """Build the request handler class bound to this stand-in."""
+        manager = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                match = POINTSET_PATH.match(self.path)
+                if not match:
+                    return self._error(404, 'NOT_FOUND', "Unknown path")
+                point_set_id = match.group(1)
+                try:
+                    uuid.UUID(point_set_id)
+                except ValueError:
+                    return self._error(400, 'INVALID_POINTSET_ID',
+                                       "Invalid PointSetID")
+                time.sleep(manager._delay())
+                if manager._fails():
+                    return self._error(503, 'STORAGE_UNAVAILABLE',
+                                       "Storage unavailable")
+                body = manager.pointsets.get(point_set_id)
+                if body is None:
+                    return self._error(404, 'POINTSET_NOT_FOUND',
+                                       "PointSet not found")
+                if not manager.etags:
+                    return self._send(200, 'application/octet-stream', body)
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if self.headers.get('If-None-Match') == etag:
+                    manager._count(304)
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    return self.end_headers()
+                self._send(200, 'application/octet-stream', body,
+                           {'ETag': etag})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length)
+                if self.path != '/pointset':
+                    return self._error(404, 'NOT_FOUND', "Unknown path")
+                if PointSet.from_binary(body) is None:
+                    return self._error(400, 'INVALID_POINTSET',
+                                       "Invalid PointSet")
+                payload = {'pointSetId': manager.register(body)}
+                self._send(201, 'application/json',
+                           json.dumps(payload).encode())
+
+            def _error(self, status, code, message):
+                self._send(status, 'application/json',
+                           json.dumps({'code': code,
+                                       'message': message}).encode())
+
+            def _send(self, status, content_type, body, headers=None):
+                manager._count(status)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                """Keep the load test output quiet."""
+
+        return Handler
+
+
+def populate(manager, n_pointsets, sizes=DEFAULT_SIZES, kind='uniform',
+             seed=0):
+    """Register generated PointSets in a stand-in.
+
+    Sizes are assigned round-robin and every PointSet has its own seed, so
+    that no two ids share a triangulation.
+
+    Returns:
+        List of the registered PointSetIDs.
+
+    """
+    return [manager.register(PointSet(
+        sizes[i % len(sizes)],
+        generate(kind, sizes[i % len(sizes)], seed + i)).to_binary())
+        for i in range(n_pointsets)]
+
+
+def free_port(host='127.0.0.1'):
+    """Get a port that is free on the host."""
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def start_service(manager_url, front_end='flask', port=None, env=None,
+                  timeout=60.0):
+    """Start the triangulator in a subprocess and wait until it is ready.
+
+    Args:
+        manager_url: Base URL of the PointSetManager.
+        front_end: One of FRONT_ENDS.
+        port: Port to listen on, a free one if None.
+        env: Extra environment variables of the service.
+        timeout: Seconds to wait for GET /ready to succeed.
+
+    Returns:
+        Tuple ``(process, url)``.
+
+    Raises:
+        ValueError: If ``front_end`` is unknown.
+        RuntimeError: If the service exits or is not ready in time.
+
+    """
+    port = port or free_port()
+    if front_end == 'flask':
+        # Werkzeug logs every request, which would drown the report.
+        command = [sys.executable, '-c',
+                   'import logging, main; '
+                   'logging.getLogger("werkzeug").setLevel(logging.ERROR); '
+                   f'main.app.run(host="127.0.0.1", port={port}, '
+                   'threaded=True)']
+    elif front_end == 'asgi':
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:app',
+                   '--host', '127.0.0.1', '--port', str(port),
+                   '--log-level', 'warning']
+    else:
+        raise ValueError(f"Unknown front end {front_end!r}")
+    # A session of its own lets stop_service reach the executor workers.
+    process = subprocess.Popen(
+        command, cwd=HERE, stdout=subprocess.DEVNULL, start_new_session=True,
+        env={**os.environ, 'TRIANGULATION_WARM_UP': 'eager', **(env or {}),
+             'POINT_SET_MANAGER_URL': manager_url})
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(url, timeout, process)
+    except BaseException:
+        stop_service(process)
+        raise
+    return process, url
+
+
+def wait_ready(url, timeout=60.0, process=None):
+    """Poll GET /ready until the service answers 200.
+
+    Raises:
+        RuntimeError: If the process exits or the service is not ready in
+            time.
+
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(
+                f"Service exited with status {process.returncode}")
+        try:
+            if requests.get(f"{url}/ready", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Service at {url} not ready after {timeout} s")
+
+
+def stop_service(process, timeout=10.0):
+    """Terminate a service subprocess and the processes it started."""
+    _signal_group(process, signal.SIGTERM)
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        _signal_group(process, signal.SIGKILL)
+        process.wait()
+    # Executor workers outlive a terminated service.
+    _signal_group(process, signal.SIGKILL)
+
+
+def _signal_group(process, signum):
+    """Send a signal to the process group of a service subprocess."""
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(process.pid, signum)
+
+
+def _request(session, url, timeout):
+    """Send one request and classify its outcome.
+
+    Returns:
+        Tuple ``(status, code)``; status is 0 and code TIMEOUT or
+        CONNECTION_ERROR when no response arrived.
+
+    """
+    try:
+        response = session.get(url, timeout=timeout)
+        response.content  # noqa: B018 - read the whole body
+    except requests.Timeout:
+        return 0, TIMEOUT
+    except requests.RequestException:
+        return 0, CONNECTION_ERROR
+    if response.status_code == 200:
+        return 200, None
+    try:
+        code = response.json()['code']
+    except (ValueError, KeyError, TypeError):
+        code = f'HTTP_{response.status_code}'
+    return response.status_code, code
+
+
+class _Targets:
+    """Thread-safe draw of the PointSetIDs to request."""
+
+    def __init__(self, ids, not_found_rate, seed):
+        self.ids = list(ids)
+        self.not_found_rate = not_found_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        with self._lock:
+            if self._rng.random() < self.not_found_rate or not self.ids:
+                return str(uuid.UUID(int=self._rng.getrandbits(128),
+                                     version=4))
+            return self._rng.choice(self.ids)
+
+
+def run_closed(url, ids, concurrency, duration, not_found_rate=0.0,
+               timeout=30.0, seed=0):
+    """Drive the service with concurrent clients sending back to back.
+
+    Args:
+        url: Base URL of the triangulator.
+        ids: PointSetIDs to request, drawn at random.
+        concurrency: Number of clients.
+        duration: Seconds to run.
+        not_found_rate: Share of requests for unknown PointSetIDs.
+        timeout: Seconds to wait for a response.
+        seed: Seed of the request draw.
+
+    Returns:
+        Tuple ``(records, elapsed)``, where each record is
+        ``(latency, status, code)``.
+
+    """
+    targets = _Targets(ids, not_found_rate, seed)
+    records = []
+    deadline = time.perf_counter() + duration
+
+    def client():
+        own = []
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                path = f"{url}/triangulation/{targets.draw()}"
+                start = time.perf_counter()
+                status, code = _request(session, path, timeout)
+                own.append((time.perf_counter() - start, status, code))
+        records.extend(own)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records, time.perf_counter() - start
+
+
+def run_open(url, ids, rps, duration, not_found_rate=0.0, timeout=30.0,
+             seed=0, max_clients=256):
+    """Drive the service at a fixed request rate.
+
+    Requests are scheduled every ``1 / rps`` seconds whatever the
+    service does; latencies count from the scheduled time, so requests
+    queued behind a slow service are charged for their wait.
+
+    Args:
+        url: Base URL of the triangulator.
+        ids: PointSetIDs to request, drawn at random.
+        rps: Target requests per second.
+        duration: Seconds to run.
+        not_found_rate: Share of requests for unknown PointSetIDs.
+        timeout: Seconds to wait for a response.
+        seed: Seed of the request draw.
+        max_clients: Maximum number of requests in flight.
+
+    Returns:
+        Tuple ``(records, elapsed)``, as ``run_closed``.
+
+    """
+    targets = _Targets(ids, not_found_rate, seed)
+    local = threading.local()
+
+    def send(scheduled):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        path = f"{url}/triangulation/{targets.draw()}"
+        status, code = _request(local.session, path, timeout)
+        return time.perf_counter() - scheduled, status, code
+
+    n_requests = max(1, round(rps * duration))
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_clients) as pool:
+        futures = []
+        for i in range(n_requests):
+            scheduled = start + i / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(send, scheduled))
+        records = [future.result() for future in futures]
+    return records, time.perf_counter() - start
+
+
+def summarize(records, elapsed, level=None, target=None):
+    """Summarize the records of one load level.
+
+    Latency percentiles are taken over the successful requests. Every
+    failure is broken down by code, but only server errors and requests
+    without a response count in the error rate: 4xx answers, such as those
+    to --not-found-rate requests, are the service working as specified.
+
+    Args:
+        records: ``(latency, status, code)`` records of the level.
+        elapsed: Duration of the level in seconds.
+        level: Concurrency or request rate of the level.
+        target: Request rate an open-loop level aimed at, or None.
+
+    Returns:
+        Report dictionary, with latencies in seconds.
+
+    """
+    latencies = np.array([r[0] for r in records if r[1] == 200])
+    errors = {}
+    failures = 0
+    for _, status, code in records:
+        if status != 200:
+            errors[code] = errors.get(code, 0) + 1
+        if status == 0 or status >= 500:
+            failures += 1
+    report = {
+        'level': level,
+        'target': target,
+        'requests': len(records),
+        'elapsed': elapsed,
+        'rps': len(records) / elapsed if elapsed else 0.0,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'errors': dict(sorted(errors.items())),
+        'error_rate': failures / len(records) if records else 0.0,
+    }
+    for percentile in PERCENTILES:
+        report[f'p{percentile}'] = float(np.percentile(
+            latencies, percentile)) if len(latencies) else None
+    report['max'] = float(latencies.max()) if len(latencies) else None
+    return report
+
+
+def saturation(reports, slo=None, max_error_rate=MAX_ERROR_RATE,
+               min_gain=MIN_GAIN):
+    """Find where increasing the load stops paying off.
+
+    A level is saturated when its throughput is less than ``min_gain``
+    above the previous level, an open-loop level sends ``min_gain`` less
+    than its target rate, its p99 latency exceeds ``slo`` or its error
+    rate exceeds ``max_error_rate``.
+
+    Args:
+        reports: Reports of increasing load levels.
+        slo: p99 latency objective in seconds, or None.
+        max_error_rate: Allowed share of failed requests.
+        min_gain: Relative throughput gain expected from a higher level.
+
+    Returns:
+        Tuple ``(capacity, saturated)``: the report of the last level
+        before saturation, None if the first level is already saturated,
+        and the report of the first saturated level, None if none is.
+
+    """
+    capacity = None
+    for report in reports:
+        too_slow = slo is not None and (report['p99'] is None
+                                        or report['p99'] > slo)
+        no_gain = capacity is not None and \
+            report['throughput'] < capacity['throughput'] * (1 + min_gain)
+        lagging = report.get('target') is not None and \
+            report['rps'] < report['target'] * (1 - min_gain)
+        if too_slow or no_gain or lagging \
+                or report['error_rate'] > max_error_rate:
+            return capacity, report
+        capacity = report
+    return capacity, None
+
+
+def _ms(seconds):
+    """Format a latency in milliseconds."""
+    return f"{'-':>9}" if seconds is None else f"{seconds * 1e3:>9.1f}"
+
+
+def format_header(mode='concurrency'):
+    """Format the header of the report lines."""
+    return (f"{mode:>11} {'requests':>9} {'req/s':>9} {'ok/s':>9} "
+            + ' '.join(f"{f'p{p} ms':>9}" for p in PERCENTILES)
+            + f" {'max ms':>9} {'failed':>7}")
+
+
+def format_report(report):
+    """Format a report as one line."""
+    return (f"{report['level']!s:>11} {report['requests']:>9} "
+            f"{report['rps']:>9.1f} {report['throughput']:>9.1f} "
+            + ' '.join(_ms(report[f'p{p}']) for p in PERCENTILES)
+            + f" {_ms(report['max'])} {report['error_rate']:>7.1%}")
+
+
+def format_errors(report):
+    """Format the error breakdown of a report, empty if there is none."""
+    return ', '.join(f"{code} x{count}"
+                     for code, count in report['errors'].items())
+
+
+def format_saturation(capacity, saturated, mode='concurrency'):
+    """Format the outcome of ``saturation``."""
+    if saturated is None:
+        return (f"Not saturated up to {mode} {capacity['level']}: "
+                f"{capacity['throughput']:.1f} ok/s.")
+    if capacity is None:
+        return f"Saturated from the first level, {mode} {saturated['level']}."
+    return (f"Saturated at {mode} {saturated['level']}; capacity "
+            f"{capacity['throughput']:.1f} ok/s at {mode} "
+            f"{capacity['level']}.")
+
+
+def _list(value, cast=int):
+    """Parse a comma-separated command line option."""
+    return tuple(cast(v) for v in value.split(',') if v)
+
+
+def _env_pair(value):
+    """Parse a KEY=VALUE command line option."""
+    key, sep, val = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {value!r}")
+    return key, val
+
+
+def main(argv=None):
+    """Run a load test from the command line.
+
+    Returns:
+        Exit status, 1 when even the first level is saturated.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument('--concurrency', type=_list,
+                      help="comma-separated numbers of concurrent clients")
+    load.add_argument('--rps', type=lambda v: _list(v, float),
+                      help="comma-separated target requests per second")
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help="seconds per load level")
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--not-found-rate', type=float, default=0.0,
+                        help="share of requests for unknown PointSetIDs")
+    parser.add_argument('--seed', type=int, default=0)
+    manager = parser.add_argument_group('PointSetManager stand-in')
+    manager.add_argument('--latency', type=float, default=0.0,
+                         help="mean retrieval delay in seconds")
+    manager.add_argument('--jitter', type=float, default=0.0)
+    manager.add_argument('--error-rate', type=float, default=0.0,
+                         help="share of retrievals answered with 503")
+    manager.add_argument('--sizes', type=_list, default=DEFAULT_SIZES,
+                         help="comma-separated PointSet sizes")
+    manager.add_argument('--kind', choices=KINDS, default='uniform')
+    manager.add_argument('--pointsets', type=int, default=100,
+                         help="number of distinct PointSets")
+    manager.add_argument('--manager-port', type=int, default=0)
+    manager.add_argument('--no-etags', dest='etags', action='store_false',
+                         help="answer without ETags")
+    service = parser.add_argument_group('triangulator')
+    service.add_argument('--url', help="load an already running service")
+    service.add_argument('--front-end', choices=FRONT_ENDS, default='flask')
+    service.add_argument('--workers', type=int,
+                         help="TRIANGULATION_WORKERS of the service")
+    service.add_argument('--env', type=_env_pair, action='append',
+                         default=[], metavar='KEY=VALUE',
+                         help="extra environment variable of the service")
+    parser.add_argument('--slo', type=float,
+                        help="p99 latency objective in seconds")
+    parser.add_argument('--max-error-rate', type=float,
+                        default=MAX_ERROR_RATE)
+    parser.add_argument('--save', metavar='PATH')
+    args = parser.parse_args(argv)
+
+    mode = 'rps' if args.rps else 'concurrency'
+    levels = args.rps or args.concurrency or DEFAULT_CONCURRENCY
+    env = dict(args.env)
+    if args.workers is not None:
+        env['TRIANGULATION_WORKERS'] = str(args.workers)
+
+    with StandInPointSetManager(args.latency, args.jitter, args.error_rate,
+                                args.seed, port=args.manager_port,
+                                etags=args.etags) as stand_in:
+        ids = populate(stand_in, args.pointsets, args.sizes, args.kind,
+                       args.seed)
+        process = None
+        url = args.url
+        if url is None:
+            process, url = start_service(stand_in.url, args.front_end,
+                                         env=env)
+        try:
+            print(format_header(mode))
+            reports = []
+            for level in levels:
+                if mode == 'rps':
+                    records, elapsed = run_open(
+                        url, ids, level, args.duration, args.not_found_rate,
+                        args.timeout, args.seed)
+                else:
+                    records, elapsed = run_closed(
+                        url, ids, level, args.duration, args.not_found_rate,
+                        args.timeout, args.seed)
+                report = summarize(records, elapsed, level,
+                                   level if mode == 'rps' else None)
+                reports.append(report)
+                print(format_report(report), flush=True)
+                if report['errors']:
+                    print(f"{'':>11} {format_errors(report)}")
+        finally:
+            if process is not None:
+                stop_service(process)
+
+    capacity, saturated = saturation(reports, args.slo, args.max_error_rate)
+    print(format_saturation(capacity, saturated, mode))
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'mode': mode, 'levels': reports,
+                       'capacity': capacity and capacity['level'],
+                       'saturated': saturated and saturated['level']},
+                      f, indent=1)
+    return 1 if capacity is None else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,24 +1,389 @@
 """Flask server to triangulate point sets."""
+import bisect
+import contextlib
+import hashlib
+import importlib.util
+import itertools
+import json
+import math
+import mmap
+import os
 import struct
+import sys
+import threading
+import time
 import uuid
-
+import weakref
+import zlib
+from collections import OrderedDict
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context, parent_process, shared_memory
+
+import numpy as np
 import requests
-from flask import Flask, Response, jsonify
+from flask import Flask, Response, jsonify, request
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import delaunay
+
+
+def _env(name, default, cast=str):
+    """Read a configuration value from the environment.
+
+    Args:
+        name: Environment variable name.
+        default: Value used when the variable is unset or empty.
+        cast: Conversion applied to the raw string.
+
+    Returns:
+        The converted value, or ``default``.
+
+    """
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    return cast(value)
+
+
+# Wire layout shared by PointSet and Triangles (see triangulator.yml): every
+# block is a little-endian uint32 count followed by fixed-width records.
+COUNT = struct.Struct('<I')
+COORD_DTYPE = np.dtype('<f4')
+INDEX_DTYPE = np.dtype('<u4')
+
+# Number of records per chunk when streaming a binary representation.
+CHUNK_RECORDS = 65536
+
+# Compact Triangles layout (see Triangles.to_compact): a header holding the
+# flags, point count and triangle count, the float32 points unless omitted,
+# then the zigzag/varint delta-coded triangle indices.
+COMPACT_HEADER = struct.Struct('<BII')
+COMPACT_POINTS = 0x01
+
+# A uint32 delta needs 33 bits once zigzag-coded, so at most 5 varint bytes.
+VARINT_MAX_BYTES = 5
+
+# Triangle windings accepted by Triangles.validate.
+CCW = 'ccw'
+CW = 'cw'
+
+
+def _block_size(count, dtype, width):
+    """Return the encoded size of a counted block, header included."""
+    return COUNT.size + count * width * dtype.itemsize
+
+
+def _write_block(out, offset, count, records, dtype, width):
+    """Write a counted block into a preallocated byte buffer.
+
+    Args:
+        out: Writable uint8 array receiving the encoded bytes.
+        offset: Position of the block header in ``out``.
+        count: Value written in the block header.
+        records: Records to encode, convertible to ``(n, width)``.
+        dtype: Little-endian dtype of each record field.
+        width: Number of fields per record.
+
+    Returns:
+        Offset just past the written block.
+
+    """
+    block = np.asarray(records, dtype=dtype).reshape(-1, width)
+    COUNT.pack_into(out, offset, count)
+    offset += COUNT.size
+    end = offset + block.nbytes
+    out[offset:end].view(dtype).reshape(block.shape)[...] = block
+    return end
+
+
+def _read_block(data, offset, dtype, width):
+    """Read a counted block straight from a wire buffer, without copying.
+
+    Args:
+        data: Buffer holding the encoded bytes.
+        offset: Position of the block header in ``data``.
+        dtype: Little-endian dtype of each record field.
+        width: Number of fields per record.
+
+    Returns:
+        Tuple ``(count, records, end)`` where ``records`` is a read-only
+        ``(count, width)`` view over ``data``.
+
+    Raises:
+        ValueError: If the buffer is shorter than the declared block.
+
+    """
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    end = offset + count * width * dtype.itemsize
+    if end > len(data):
+        raise ValueError("Truncated binary block")
+    records = np.frombuffer(
+        data, dtype=dtype, count=count * width, offset=offset
+    ).reshape(count, width)
+    return count, records, end
+
+
+def _read_into(stream, buffer):
+    """Fill a buffer from a binary stream.
+
+    Raises:
+        ValueError: If the stream ends before the buffer is full.
+
+    """
+    view = memoryview(buffer).cast('B')
+    readinto = getattr(stream, 'readinto', None)
+    filled = 0
+    while filled < len(view):
+        if readinto is not None:
+            read = readinto(view[filled:])
+        else:
+            chunk = stream.read(len(view) - filled)
+            read = len(chunk)
+            view[filled:filled + read] = chunk
+        if not read:
+            raise ValueError("Truncated binary block")
+        filled += read
+
+
+def _iter_block(count, records, chunk_records):
+    """Yield a counted block as its header followed by chunks of records."""
+    yield COUNT.pack(count)
+    for start in range(0, len(records), chunk_records):
+        yield records[start:start + chunk_records].tobytes()
+
+
+def _zigzag(values):
+    """Map signed int64 values to unsigned ones, small magnitudes first."""
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def _unzigzag(values):
+    """Invert ``_zigzag``."""
+    return (values >> np.uint64(1)).astype(np.int64) \
+        ^ -(values & np.uint64(1)).astype(np.int64)
+
+
+def _varint_encode(values):
+    """Encode unsigned values as LEB128 varints in one vectorized pass.
+
+    Args:
+        values: uint64 array of values below ``2 ** (7 * VARINT_MAX_BYTES)``.
+
+    Returns:
+        uint8 array of the concatenated varints.
+
+    """
+    values = values.astype(np.uint64, copy=False)
+    sizes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, VARINT_MAX_BYTES):
+        sizes += values >= np.uint64(1 << (7 * k))
+    starts = np.cumsum(sizes) - sizes
+    out = np.empty(int(sizes.sum()), dtype=np.uint8)
+    for k in range(int(sizes.max(initial=0))):
+        mask = sizes > k
+        byte = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7f)
+        byte |= np.where(sizes[mask] > k + 1, 0x80, 0).astype(np.uint64)
+        out[starts[mask] + k] = byte
+    return out
+
+
+def _varint_decode(data, count):
+    """Decode ``count`` LEB128 varints in one vectorized pass.
+
+    Args:
+        data: uint8 array holding exactly ``count`` varints.
+        count: Number of values expected.
+
+    Returns:
+        uint64 array of the values.
+
+    Raises:
+        ValueError: If ``data`` holds another number of varints, or one is
+            longer than VARINT_MAX_BYTES.
+
+    """
+    ends = np.flatnonzero(data < 0x80)
+    if len(ends) != count or (count and ends[-1] != len(data) - 1) \
+            or (not count and len(data)):
+        raise ValueError("Malformed varint block")
+    starts = np.empty_like(ends)
+    starts[:1] = 0
+    starts[1:] = ends[:-1] + 1
+    sizes = ends - starts + 1
+    if count and sizes.max() > VARINT_MAX_BYTES:
+        raise ValueError("Varint too long")
+    values = np.zeros(count, dtype=np.uint64)
+    for k in range(int(sizes.max(initial=0))):
+        mask = sizes > k
+        byte = data[starts[mask] + k].astype(np.uint64) & np.uint64(0x7f)
+        values[mask] |= byte << np.uint64(7 * k)
+    return values
+
+
+def _map_file(path):
+    """Memory-map a whole file read-only.
+
+    The mapping outlives the file descriptor and is released once no
+    array viewing it is left.
+
+    Returns:
+        The mapping, or empty bytes for an empty file, which cannot be
+        mapped.
+
+    """
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _temp_path(path):
+    """Get a temporary path next to ``path``, unique per thread."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _write_file(path, chunks):
+    """Write bytes chunks to a file atomically.
+
+    Returns:
+        Number of bytes written.
+
+    """
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            size = f.tell()
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    return size
+
+
+class RecordView(Sequence):
+    """Read-only, list-like view over the rows of a record array."""
+
+    __slots__ = ('records',)
+
+    def __init__(self, records):
+        """Initialize a RecordView.
+
+        Args:
+            records: Read-only ``(n, width)`` array to expose.
+
+        """
+        self.records = records
+
+    def __len__(self):
+        """Get number of records."""
+        return len(self.records)
+
+    def __getitem__(self, index):
+        """Get a record as a list, or a slice of records as a view."""
+        if isinstance(index, slice):
+            return RecordView(self.records[index])
+        return self.records[index].tolist()
+
+    def __iter__(self):
+        """Iterate over the records as lists."""
+        for record in self.records:
+            yield record.tolist()
+
+    def __array__(self, dtype=None, copy=None):
+        """Expose the underlying array to NumPy without copying."""
+        return np.asarray(self.records, dtype=dtype)
+
+    def __eq__(self, other):
+        """Check equality with another view or nested sequence."""
+        if isinstance(other, RecordView):
+            other = other.records
+        try:
+            other = np.asarray(other, dtype=self.records.dtype)
+        except (TypeError, ValueError, OverflowError):
+            return False
+        if other.size == 0 and self.records.size == 0:
+            return True
+        return np.array_equal(self.records, other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        """Represent the view as the equivalent nested list."""
+        return repr(self.records.tolist())
+
+
+def _as_records(records, dtype, width):
+    """Store records as a read-only contiguous ``(n, width)`` array.
+
+    Args:
+        records: Nested sequence or array of records.
+        dtype: Little-endian dtype of each record field.
+        width: Number of fields per record.
+
+    Returns:
+        The read-only array, or ``records`` unchanged when they cannot be
+        represented with ``dtype``, so that encoding reports them later.
+
+    """
+    try:
+        if isinstance(records, RecordView):
+            records = records.records
+        if len(records) == 0:
+            block = np.empty((0, width), dtype=dtype)
+        elif dtype.kind == 'u':
+            block = np.asarray(records)
+            if (block.dtype.kind not in 'iu' or block.min() < 0
+                    or block.max() > np.iinfo(dtype).max):
+                return records
+            block = block.astype(dtype, copy=False)
+        else:
+            block = np.asarray(records, dtype=dtype)
+    except (TypeError, ValueError, OverflowError):
+        return records
+    if block.ndim != 2 or block.shape[1] != width:
+        return records
+    block = np.ascontiguousarray(block).view()
+    block.flags.writeable = False
+    return block
+
+
+class PayloadTooLarge(ValueError):
+    """Raised when an uploaded PointSet exceeds the configured size."""
 
 
 class PointSet:
     """Represent a set of points for triangulation."""
 
+    __slots__ = ('n_points', '_coords')
+
     def __init__(self, n_points, points):
         """Initialize a PointSet.
 
         Args:
             n_points: Number of points.
-            points: List of point coordinates.
+            points: Point coordinates, as a list of ``[x, y]`` or an array.
 
         """
         self.n_points = n_points
-        self.points = points
+        self._coords = _as_records(points, COORD_DTYPE, 2)
+
+    @property
+    def coords(self):
+        """Get the read-only float32 ``(n, 2)`` coordinate array."""
+        return self._coords
+
+    @property
+    def points(self):
+        """Get a read-only list-like view of the point coordinates."""
+        if isinstance(self._coords, np.ndarray):
+            return RecordView(self._coords)
+        return self._coords
 
     def to_binary(self):
         """Convert PointSet to binary representation.
@@ -27,13 +392,13 @@ class PointSet:
             Binary data or None if invalid.
 
         """
-        if self.n_points < 0:
+        if self.n_points < 0 or not isinstance(self._coords, np.ndarray):
             return None
         try:
-            data = struct.pack('<I', self.n_points)
-            for p in self.points:
-                data += struct.pack('<ff', float(p[0]), float(p[1]))
-            return data
+            out = np.empty(_block_size(len(self._coords), COORD_DTYPE, 2),
+                           dtype=np.uint8)
+            _write_block(out, 0, self.n_points, self._coords, COORD_DTYPE, 2)
+            return out.tobytes()
         except Exception:
             return None
 
@@ -49,22 +414,98 @@ class PointSet:
 
         """
         try:
-            n_points = struct.unpack('<I', data[:4])[0]
-            points = []
-            offset = 4
-            for _ in range(n_points):
-                x, y = struct.unpack('<ff', data[offset:offset + 8])
-                points.append([x, y])
-                offset += 8
+            n_points, points, _ = _read_block(data, 0, COORD_DTYPE, 2)
             return PointSet(n_points, points)
         except Exception:
             return None
 
+    def to_file(self, path, chunk_records=CHUNK_RECORDS):
+        """Write the binary representation to a file in bounded chunks.
+
+        The file is written under a temporary name and moved into place,
+        so readers never see a partial PointSet.
+
+        Args:
+            path: Destination file path.
+            chunk_records: Maximum number of points per write.
+
+        Returns:
+            Number of bytes written, or None if invalid.
+
+        """
+        if self.n_points < 0 or not isinstance(self._coords, np.ndarray):
+            return None
+        return _write_file(path, _iter_block(self.n_points, self._coords,
+                                             chunk_records))
+
+    @staticmethod
+    def from_file(path):
+        """Create PointSet from a binary file, memory-mapped.
+
+        The coordinates are a read-only view over the mapping, so files
+        larger than the available memory are paged in on demand.
+
+        Args:
+            path: Path of a file holding a binary PointSet.
+
+        Returns:
+            PointSet instance or None if invalid.
+
+        Raises:
+            OSError: If the file cannot be opened.
+
+        """
+        return PointSet.from_binary(_map_file(path))
+
+    @staticmethod
+    def from_stream(stream, max_points=None):
+        """Create PointSet from a binary stream, such as an upload body.
+
+        The coordinates are read straight into their final array, so the
+        body is never held in memory twice.
+
+        Args:
+            stream: Binary file-like object positioned on the PointSet.
+            max_points: Maximum number of points accepted.
+
+        Returns:
+            PointSet instance.
+
+        Raises:
+            PayloadTooLarge: If the PointSet has more than ``max_points``.
+            ValueError: If the stream is truncated or has trailing data.
+
+        """
+        header = bytearray(COUNT.size)
+        _read_into(stream, header)
+        (n_points,) = COUNT.unpack(header)
+        if max_points is not None and n_points > max_points:
+            raise PayloadTooLarge(f"PointSet has more than {max_points} points")
+        coords = np.empty((n_points, 2), dtype=COORD_DTYPE)
+        _read_into(stream, coords)
+        if stream.read(1):
+            raise ValueError("Trailing data after the PointSet")
+        return PointSet(n_points, coords)
+
     @property
     def num_points(self):
         """Get number of points."""
         return self.n_points
 
+    def digest(self):
+        """Hash the binary representation without encoding it.
+
+        Returns:
+            Hex digest identical for PointSets with the same binary
+            representation, or None if the PointSet cannot be encoded.
+
+        """
+        if self.n_points < 0 or not isinstance(self._coords, np.ndarray):
+            return None
+        digest = hashlib.blake2b(COUNT.pack(self.n_points), digest_size=16)
+        digest.update(memoryview(self._coords).cast('B'))
+        return digest.hexdigest()
+
     def __eq__(self, other):
         """Check equality with another PointSet."""
         if not isinstance(other, PointSet):
@@ -72,220 +513,3046 @@ class PointSet:
         return self.n_points == other.n_points and self.points == other.points
 
 
+class PointSetDecoder:
+    """Push-style incremental decoder of a binary PointSet.
+
+    Chunks are fed as they arrive, e.g. from a network body. The count
+    header sizes the float32 coordinate array, and later chunks are copied
+    straight into it, so parsing overlaps the transfer and the points are
+    held in memory once. A count above ``max_points`` or inconsistent with
+    ``expected_bytes`` is rejected before anything is allocated, and data
+    past the declared points at the first extra byte.
+    """
+
+    def __init__(self, max_points=None, expected_bytes=None):
+        """Initialize a PointSetDecoder.
+
+        Args:
+            max_points: Maximum number of points accepted.
+            expected_bytes: Announced body size, e.g. its Content-Length.
+
+        """
+        self.max_points = max_points
+        self.expected_bytes = expected_bytes
+        self.received = 0
+        self.error = None
+        self._header = bytearray()
+        self._coords = None
+        self._view = None
+
+    def feed(self, data):
+        """Decode the next chunk of the body.
+
+        Args:
+            data: Bytes-like chunk.
+
+        Returns:
+            False once the body is known to be invalid, so that the caller
+            can stop reading it.
+
+        """
+        if self.error is not None:
+            return False
+        data = memoryview(data).cast('B')
+        self.received += len(data)
+        if self._coords is None:
+            needed = COUNT.size - len(self._header)
+            self._header += data[:needed]
+            data = data[needed:]
+            if len(self._header) < COUNT.size:
+                return True
+            if not self._allocate(COUNT.unpack(self._header)[0]):
+                return False
+        filled = self.received - len(data) - COUNT.size
+        if len(data) > len(self._view) - filled:
+            self.error = ValueError("Trailing data after the PointSet")
+            return False
+        self._view[filled:filled + len(data)] = data
+        return True
+
+    def _allocate(self, n_points):
+        """Check the declared count and allocate the coordinates."""
+        size = COUNT.size + n_points * 2 * COORD_DTYPE.itemsize
+        if self.max_points is not None and n_points > self.max_points:
+            self.error = PayloadTooLarge(
+                f"PointSet has more than {self.max_points} points")
+        elif self.expected_bytes is not None and size != self.expected_bytes:
+            self.error = ValueError(
+                f"PointSet of {n_points} points in {self.expected_bytes} bytes")
+        else:
+            self._coords = np.empty((n_points, 2), dtype=COORD_DTYPE)
+            self._view = memoryview(self._coords.reshape(-1).view(np.uint8))
+        return self.error is None
+
+    def close(self):
+        """Finish decoding once the whole body was fed.
+
+        Returns:
+            PointSet instance.
+
+        Raises:
+            PayloadTooLarge: If the PointSet has more than ``max_points``.
+            ValueError: If the body is invalid, truncated or too long.
+
+        """
+        if self.error is None and (self._coords is None or self.received
+                                   < COUNT.size + len(self._view)):
+            self.error = ValueError("Truncated PointSet")
+        if self.error is not None:
+            raise self.error
+        return PointSet(len(self._coords), self._coords)
+
+
 class Triangles:
     """Represent triangles formed from a set of points."""
 
-    def __init__(self, pointset, n_triangles, triangles):
+    __slots__ = ('pointset', 'n_triangles', 'trusted', '_indices')
+
+    def __init__(self, pointset, n_triangles, triangles, trusted=False):
         """Initialize Triangles.
 
         Args:
             pointset: PointSet instance.
             n_triangles: Number of triangles.
-            triangles: List of triangle indices.
+            triangles: Triangle vertex indices, as a list of ``[a, b, c]``
+                or an array.
+            trusted: Whether the triangles are known to be valid, e.g.
+                because they come from Triangulator, so that encoding can
+                skip validation.
 
         """
         self.pointset = pointset
         self.n_triangles = n_triangles
-        self.triangles = triangles
+        self.trusted = trusted
+        self._indices = _as_records(triangles, INDEX_DTYPE, 3)
 
-    def to_binary(self):
+    @property
+    def indices(self):
+        """Get the read-only uint32 ``(n, 3)`` vertex index array."""
+        return self._indices
+
+    @property
+    def triangles(self):
+        """Get a read-only list-like view of the triangle vertex indices."""
+        if isinstance(self._indices, np.ndarray):
+            return RecordView(self._indices)
+        return self._indices
+
+    def validate(self, winding=None):
+        """Check the triangles against their PointSet in one vectorized pass.
+
+        A triangle is valid when its three vertex indices reference points
+        of the PointSet and are pairwise distinct. The header count must
+        also match the number of triangles.
+
+        Args:
+            winding: Optional required orientation, ``CCW`` or ``CW``.
+                Flat triangles fail either orientation.
+
+        Returns:
+            True if every triangle is valid, False otherwise.
+
+        Raises:
+            ValueError: If ``winding`` is not a known orientation.
+
+        """
+        if winding not in (None, CCW, CW):
+            raise ValueError(f"Unknown winding {winding!r}")
+        coords, indices = self.pointset.coords, self._indices
+        if (not isinstance(coords, np.ndarray)
+                or not isinstance(indices, np.ndarray)
+                or self.n_triangles != len(indices)):
+            return False
+        if not indices.size:
+            return True
+
+        n_points = min(self.pointset.n_points, len(coords))
+        a, b, c = indices.T
+        invalid = ((indices >= n_points).any(axis=1)
+                   | (a == b) | (b == c) | (a == c))
+        if invalid.any():
+            return False
+        if winding is None:
+            return True
+
+        pa, pb, pc = (coords[v].astype(np.float64) for v in (a, b, c))
+        area = ((pb[:, 0] - pa[:, 0]) * (pc[:, 1] - pa[:, 1])
+                - (pb[:, 1] - pa[:, 1]) * (pc[:, 0] - pa[:, 0]))
+        if winding == CCW:
+            return bool((area > 0).all())
+        return bool((area < 0).all())
+
+    def _encodable(self, winding):
+        """Check whether the triangles and their PointSet can be encoded."""
+        pointset = self.pointset
+        if (pointset.n_points < 0
+                or not isinstance(pointset.coords, np.ndarray)
+                or not isinstance(self._indices, np.ndarray)):
+            return False
+        return self.trusted or self.validate(winding)
+
+    def to_binary(self, winding=None):
         """Convert Triangles to binary representation.
 
+        Args:
+            winding: Optional orientation enforced on untrusted triangles,
+                see ``validate``.
+
         Returns:
             Binary data or None if invalid.
 
         """
-        pointset_binary = self.pointset.to_binary()
-        if pointset_binary is None:
+        if not self._encodable(winding):
             return None
 
-        # Validate indices
-        for t in self.triangles:
-            for idx in t:
-                if idx >= self.pointset.n_points:
-                    return None
-
+        pointset = self.pointset
+        coords, indices = pointset.coords, self._indices
         try:
-            data = pointset_binary
-            data += struct.pack('<I', self.n_triangles)
-            for t in self.triangles:
-                data += struct.pack('<III', t[0], t[1], t[2])
-            return data
+            offset = _block_size(len(coords), COORD_DTYPE, 2)
+            out = np.empty(offset + _block_size(len(indices), INDEX_DTYPE, 3),
+                           dtype=np.uint8)
+            _write_block(out, 0, pointset.n_points, coords, COORD_DTYPE, 2)
+            _write_block(out, offset, self.n_triangles, indices,
+                         INDEX_DTYPE, 3)
+            return out.tobytes()
         except Exception:
             return None
 
-    @staticmethod
-    def from_binary(data):
-        """Create Triangles from binary representation.
+    def iter_binary(self, winding=None, chunk_records=CHUNK_RECORDS):
+        """Stream the binary representation in bounded chunks.
+
+        Validation happens before the first chunk, so the concatenated
+        chunks are exactly ``to_binary()`` and an invalid instance can
+        still be reported as an error instead of a truncated body.
 
         Args:
-            data: Binary data to parse.
+            winding: Optional orientation enforced on untrusted triangles,
+                see ``validate``.
+            chunk_records: Maximum number of points or triangles per chunk.
 
         Returns:
-            Triangles instance or None if invalid.
+            Iterator of bytes chunks, or None if invalid.
 
         """
-        try:
-            n_points = struct.unpack('<I', data[:4])[0]
-            pointset_size = 4 + n_points * 8
-            pointset_data = data[:pointset_size]
-            pointset = PointSet.from_binary(pointset_data)
-
-            if pointset is None:
-                return None
-
-            offset = pointset_size
-            n_triangles = struct.unpack('<I', data[offset:offset + 4])[0]
-            offset += 4
-            triangles = []
-            for _ in range(n_triangles):
-                t = struct.unpack('<III', data[offset:offset + 12])
-                triangles.append(list(t))
-                offset += 12
-
-            return Triangles(pointset, n_triangles, triangles)
-        except Exception:
+        if not self._encodable(winding):
             return None
+        return itertools.chain(
+            _iter_block(self.pointset.n_points, self.pointset.coords,
+                        chunk_records),
+            _iter_block(self.n_triangles, self._indices, chunk_records),
+        )
 
-    def __eq__(self, other):
-        """Check equality with another Triangles instance."""
-        if not isinstance(other, Triangles):
-            return False
-        return (self.pointset.n_points == other.pointset.n_points and
-                self.pointset.points == other.pointset.points and
-                self.n_triangles == other.n_triangles and
-                self.triangles == other.triangles)
+    def to_file(self, path, winding=None, chunk_records=CHUNK_RECORDS):
+        """Write the binary representation to a file in bounded chunks.
 
+        Args:
+            path: Destination file path, replaced atomically.
+            winding: Optional orientation enforced on untrusted triangles,
+                see ``validate``.
+            chunk_records: Maximum number of points or triangles per write.
 
-class PointSetManager:
-    """Manager for retrieving PointSet from remote service."""
+        Returns:
+            Number of bytes written, or None if invalid.
 
-    BASE_URL = "http://localhost:5000"  # Default, should be configurable
+        """
+        chunks = self.iter_binary(winding, chunk_records)
+        if chunks is None:
+            return None
+        return _write_file(path, chunks)
 
     @staticmethod
-    def retrieve(point_set_id):
-        """Retrieve a PointSet from the remote service.
+    def from_file(path):
+        """Create Triangles from a binary file, memory-mapped.
+
+        Points and triangles are read-only views over the mapping.
 
         Args:
-            point_set_id: The ID of the PointSet to retrieve.
+            path: Path of a file holding binary Triangles.
 
         Returns:
-            PointSet instance or None if not found.
+            Triangles instance or None if invalid.
 
         Raises:
-            ConnectionError: If the service is unavailable.
+            OSError: If the file cannot be opened.
 
         """
-        try:
-            response = requests.get(
-                f"{PointSetManager.BASE_URL}/pointset/{point_set_id}"
-            )
-            if response.status_code == 200:
-                return PointSet.from_binary(response.content)
-            elif response.status_code == 404:
-                return None
-            else:
-                msg = f"PointSetManager returned {response.status_code}"
-                raise Exception(msg)
-        except requests.RequestException as err:
-            raise ConnectionError("PointSetManager unavailable") from err
+        return Triangles.from_binary(_map_file(path))
 
+    def to_compact(self, include_points=True, winding=None):
+        """Convert Triangles to the compact binary representation.
 
-class Triangulator:
-    """Triangulator for computing Delaunay triangulation."""
+        The header is ``COMPACT_HEADER``: flags, point count and triangle
+        count. The float32 points follow when ``include_points`` is set.
+        The indices come last as zigzag-coded varints of deltas: the first
+        vertex of each triangle from the first vertex of the previous one,
+        the two others from the first vertex of their triangle. Triangles
+        built from neighbouring points thus take a few bytes each instead
+        of 12.
+
+        Args:
+            include_points: Whether to echo the points, which clients that
+                uploaded them can do without.
+            winding: Optional orientation enforced on untrusted triangles,
+                see ``validate``.
+
+        Returns:
+            Binary data or None if invalid.
+
+        """
+        if not self._encodable(winding):
+            return None
+        pointset = self.pointset
+        indices = self._indices.astype(np.int64)
+        deltas = np.empty_like(indices)
+        deltas[:, 0] = np.diff(indices[:, 0], prepend=0)
+        deltas[:, 1:] = indices[:, 1:] - indices[:, :1]
+        flags = COMPACT_POINTS if include_points else 0
+        parts = [COMPACT_HEADER.pack(flags, pointset.n_points,
+                                     self.n_triangles)]
+        if include_points:
+            parts.append(memoryview(pointset.coords).cast('B'))
+        parts.append(_varint_encode(_zigzag(deltas.ravel())))
+        return b''.join(parts)
 
     @staticmethod
-    def triangulate(pointset):
-        """Triangulate a set of points using Delaunay triangulation.
+    def from_compact(data, pointset=None):
+        """Create Triangles from the compact binary representation.
 
         Args:
-            pointset: PointSet to triangulate.
+            data: Binary data written by ``to_compact``.
+            pointset: PointSet of the triangles, required when the points
+                were omitted and ignored otherwise.
 
         Returns:
-            Triangles instance.
+            Triangles instance or None if invalid.
 
         """
-        if pointset.n_points < 3:
-            return Triangles(pointset, 0, [])
-
         try:
-            import numpy as np
-            from scipy.spatial import Delaunay
-            points = np.array(pointset.points)
-            tri = Delaunay(points)
-            simplices = tri.simplices.tolist()
-            return Triangles(pointset, len(simplices), simplices)
-        except ImportError:
-            return Triangles(pointset, 0, [])
+            flags, n_points, n_triangles = COMPACT_HEADER.unpack_from(data)
+            offset = COMPACT_HEADER.size
+            if flags & COMPACT_POINTS:
+                size = n_points * 2 * COORD_DTYPE.itemsize
+                if offset + size > len(data):
+                    return None
+                pointset = PointSet(n_points, np.frombuffer(
+                    data, dtype=COORD_DTYPE, count=2 * n_points,
+                    offset=offset).reshape(n_points, 2))
+                offset += size
+            elif pointset is None or pointset.n_points != n_points:
+                return None
+            deltas = _unzigzag(_varint_decode(
+                np.frombuffer(data, dtype=np.uint8, offset=offset),
+                3 * n_triangles)).reshape(n_triangles, 3)
+            indices = np.empty_like(deltas)
+            indices[:, 0] = np.cumsum(deltas[:, 0])
+            indices[:, 1:] = deltas[:, 1:] + indices[:, :1]
+            if indices.size and (indices.min() < 0
+                                 or indices.max() > np.iinfo(INDEX_DTYPE).max):
+                return None
+            return Triangles(pointset, n_triangles, indices)
+        except Exception:
+            return None
 
+    @staticmethod
+    def from_binary(data):
+        """Create Triangles from binary representation.
 
-def init():
-    """Initialize Flask application.
+        Args:
+            data: Binary data to parse.
+
+        Returns:
+            Triangles instance or None if invalid.
+
+        """
+        try:
+            n_points, points, offset = _read_block(data, 0, COORD_DTYPE, 2)
+            pointset = PointSet(n_points, points)
+            n_triangles, triangles, _ = _read_block(data, offset,
+                                                    INDEX_DTYPE, 3)
+            return Triangles(pointset, n_triangles, triangles)
+        except Exception:
+            return None
+
+    def __eq__(self, other):
+        """Check equality with another Triangles instance."""
+        if not isinstance(other, Triangles):
+            return False
+        return (self.pointset.n_points == other.pointset.n_points and
+                self.pointset.points == other.pointset.points and
+                self.n_triangles == other.n_triangles and
+                self.triangles == other.triangles)
+
+
+class TrianglesWriter:
+    """Write Triangles to a file as they are produced.
+
+    The points are written when the writer is opened and the triangles are
+    appended chunk by chunk, so they never have to be held in memory at
+    once. The triangle count is filled in on ``close``, when the file is
+    moved into place; a writer left by an exception leaves no file.
+
+    Example:
+        with TrianglesWriter(path, pointset) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+
+    """
+
+    def __init__(self, path, pointset, chunk_records=CHUNK_RECORDS):
+        """Open a TrianglesWriter and write the points.
+
+        Args:
+            path: Destination file path.
+            pointset: PointSet the triangles index into.
+            chunk_records: Maximum number of points per write.
+
+        Raises:
+            ValueError: If the PointSet cannot be encoded.
+
+        """
+        if pointset.n_points < 0 or not isinstance(pointset.coords,
+                                                   np.ndarray):
+            raise ValueError("Invalid PointSet")
+        self.path = path
+        self.n_points = len(pointset.coords)
+        self.n_triangles = 0
+        self._tmp_path = _temp_path(path)
+        self._file = open(self._tmp_path, 'wb')  # noqa: SIM115
+        try:
+            for chunk in _iter_block(pointset.n_points, pointset.coords,
+                                     chunk_records):
+                self._file.write(chunk)
+            self._header = self._file.tell()
+            self._file.write(COUNT.pack(0))
+        except BaseException:
+            self.abort()
+            raise
+
+    def write(self, triangles):
+        """Append triangles to the file.
+
+        Args:
+            triangles: Triangle vertex indices, convertible to ``(n, 3)``.
+
+        Raises:
+            ValueError: If an index is negative or not below the number of
+                points.
+
+        """
+        block = _as_records(triangles, INDEX_DTYPE, 3)
+        if (not isinstance(block, np.ndarray)
+                or (block.size and block.max() >= self.n_points)):
+            raise ValueError("Invalid triangle indices")
+        if block.size:
+            self._file.write(memoryview(block).cast('B'))
+        self.n_triangles += len(block)
+
+    def close(self):
+        """Write the triangle count and move the file into place."""
+        if self._file.closed:
+            return
+        try:
+            self._file.seek(self._header)
+            self._file.write(COUNT.pack(self.n_triangles))
+            self._file.close()
+            os.replace(self._tmp_path, self.path)
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self):
+        """Discard the partially written file."""
+        self._file.close()
+        with contextlib.suppress(OSError):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        """Enter the context."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        """Close the writer, or discard the file on error."""
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by the total size of its values.
+
+    Entries may expire after a time-to-live. Hit, miss, eviction and
+    expiration counters are kept so that the cache can be sized.
+    """
+
+    def __init__(self, max_bytes, ttl=None, clock=time.monotonic):
+        """Initialize an LRUCache.
+
+        Args:
+            max_bytes: Maximum total size of the cached values, 0 disables
+                the cache.
+            ttl: Default time-to-live of an entry in seconds, or None for
+                entries that never expire.
+            clock: Monotonic clock returning seconds.
+
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Get number of cached entries."""
+        return len(self._entries)
+
+    def get(self, key):
+        """Get a cached value and mark it as recently used.
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            The cached value, or None on a miss or an expired entry.
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, nbytes, expires = entry
+            if expires is not None and expires <= self._clock():
+                del self._entries[key]
+                self.size -= nbytes
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, nbytes=None, ttl=None):
+        """Cache a value, evicting least recently used entries as needed.
+
+        Args:
+            key: Cache key.
+            value: Value to cache.
+            nbytes: Size accounted for the value, ``len(value)`` by default.
+            ttl: Time-to-live overriding the cache default.
+
+        Returns:
+            True if the value was cached, False if it is too large.
+
+        """
+        if nbytes is None:
+            nbytes = len(value)
+        if nbytes > self.max_bytes:
+            return False
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else self._clock() + ttl
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, nbytes, expires)
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        """Remove every entry, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """Get the cache counters.
+
+        Returns:
+            Dictionary of counters and current occupancy.
+
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls sharing a key across threads.
+
+    The first caller of a key runs the function; callers arriving while it
+    is in flight wait for its outcome and share its result or exception.
+    """
+
+    class _Call:
+        """Outcome of an in-flight call."""
+
+        __slots__ = ('done', 'result', 'error')
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        """Initialize a SingleFlight."""
+        self.calls = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args):
+        """Run ``fn(*args)`` once for all concurrent callers of ``key``.
+
+        Args:
+            key: Hashable identifier of the call.
+            fn: Function to run.
+            *args: Arguments passed to ``fn``.
+
+        Returns:
+            Result of the call shared by all concurrent callers.
+
+        Raises:
+            Exception: Whatever the shared call raised.
+
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args)
+            return call.result
+        except Exception as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Get the coalescing counters.
+
+        Returns:
+            Dictionary with the number of executed and coalesced calls.
+
+        """
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced,
+                    "in_flight": len(self._calls)}
+
+
+class CircuitOpen(ConnectionError):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Fail fast on a dependency after consecutive failures.
+
+    The circuit opens after ``threshold`` consecutive failures, so callers
+    are rejected at once instead of blocking on a dependency that is down.
+    Once ``reset_timeout`` has passed, a single trial call is let through:
+    its success closes the circuit, its failure opens it again. Each call
+    allowed through must end in ``success``, ``failure`` or ``abandon``,
+    or the circuit stays half-open, rejecting every call.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, threshold, reset_timeout, clock=time.monotonic):
+        """Initialize a closed CircuitBreaker.
+
+        Args:
+            threshold: Consecutive failures opening the circuit, 0 never
+                opens it.
+            reset_timeout: Seconds the circuit stays open before a trial.
+            clock: Monotonic clock returning seconds.
+
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.rejections = 0
+        self._opened = None
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Check whether a call may go through, counting rejections.
+
+        Returns:
+            True if the caller must make the call and report its outcome.
+
+        """
+        with self._lock:
+            if self.state == CircuitBreaker.CLOSED:
+                return True
+            if self.state == CircuitBreaker.OPEN and \
+                    self._clock() - self._opened >= self.reset_timeout:
+                self.state = CircuitBreaker.HALF_OPEN
+                return True
+            self.rejections += 1
+            return False
+
+    def success(self):
+        """Record a successful call, closing the circuit."""
+        with self._lock:
+            self.state = CircuitBreaker.CLOSED
+            self.failures = 0
+
+    def failure(self):
+        """Record a failed call, opening the circuit past the threshold."""
+        with self._lock:
+            self.failures += 1
+            if self.state == CircuitBreaker.HALF_OPEN or \
+                    0 < self.threshold <= self.failures:
+                self.state = CircuitBreaker.OPEN
+                self._opened = self._clock()
+
+    def abandon(self):
+        """Record a call that ended without an outcome, e.g. on an error.
+
+        A trial call counts as failed, so that another trial follows the
+        reset timeout; other calls count for nothing.
+        """
+        with self._lock:
+            if self.state == CircuitBreaker.HALF_OPEN:
+                self.failures += 1
+                self.state = CircuitBreaker.OPEN
+                self._opened = self._clock()
+
+    def stats(self):
+        """Get the circuit state.
+
+        Returns:
+            Dictionary of the state and counters.
+
+        """
+        with self._lock:
+            return {"state": self.state, "failures": self.failures,
+                    "rejections": self.rejections}
+
+
+class Metrics:
+    """Counters and histograms rendered in the Prometheus text format.
+
+    Updates go to a shard owned by the calling thread, so the hot path
+    takes no lock and costs a dictionary lookup and two additions. When a
+    thread exits, its shard is folded into a retired total, so threads
+    started per request do not accumulate shards. A scrape sums the
+    retired total and the shards of live threads; a series being updated
+    meanwhile may be read half updated, which the next scrape corrects.
+
+    Collected metrics are read from their owner at each scrape instead,
+    for counters that components already keep.
+    """
+
+    class _Owner:
+        """Thread-local object whose collection retires a shard."""
+
+        __slots__ = ('__weakref__',)
+
+    def __init__(self):
+        """Initialize an empty Metrics registry."""
+        self._histograms = {}
+        self._counters = {}
+        self._collected = {}
+        self._shards = {}
+        self._retired = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help, buckets, label=None):
+        """Declare a histogram.
+
+        Args:
+            name: Metric name.
+            help: Description of the metric.
+            buckets: Increasing upper bounds of the buckets, ``+Inf``
+                excluded.
+            label: Name of the label distinguishing series, or None.
+
+        Returns:
+            The metric name, to pass to ``observe``.
+
+        """
+        self._histograms[name] = (help, label, tuple(buckets))
+        return name
+
+    def counter(self, name, help, label=None):
+        """Declare a counter.
+
+        Args:
+            name: Metric name, ending in ``_total``.
+            help: Description of the metric.
+            label: Name of the label distinguishing series, or None.
+
+        Returns:
+            The metric name, to pass to ``inc``.
+
+        """
+        self._counters[name] = (help, label)
+        return name
+
+    def collected(self, name, help, kind, read, label=None):
+        """Declare a metric read at each scrape.
+
+        Args:
+            name: Metric name, ending in ``_total`` for counters.
+            help: Description of the metric.
+            kind: ``'counter'`` or ``'gauge'``.
+            read: Function returning the value, a dictionary of values by
+                label value, or None when there is nothing to report.
+            label: Name of the label keying the values, or None.
+
+        Returns:
+            The metric name.
+
+        """
+        self._collected[name] = (help, kind, label, [read])
+        return name
+
+    def source(self, name, read):
+        """Add a source to a collected metric, summed with the others.
+
+        Args:
+            name: Name of a collected metric.
+            read: Function as taken by ``collected``.
+
+        """
+        self._collected[name][3].append(read)
+
+    def _shard(self):
+        """Get the shard of the calling thread."""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            # The owner dies with the thread-local storage of the thread.
+            owner = self._local.owner = self._Owner()
+            weakref.finalize(owner, self._retire, id(shard))
+            with self._lock:
+                self._shards[id(shard)] = shard
+            return shard
+
+    def _retire(self, key):
+        """Fold the shard of an exited thread into the retired total."""
+        with self._lock:
+            _merge(self._retired, self._shards.pop(key))
+
+    def observe(self, name, value, label=None):
+        """Record a value in a histogram.
+
+        Args:
+            name: Histogram name.
+            value: Observed value.
+            label: Value of the histogram label, or None.
+
+        """
+        shard = self._shard()
+        series = shard.get((name, label))
+        buckets = self._histograms[name][2]
+        if series is None:
+            # The sum, then the count of each bucket, +Inf last.
+            series = shard[name, label] = [0.0] + [0] * (len(buckets) + 1)
+        series[0] += value
+        series[1 + bisect.bisect_left(buckets, value)] += 1
+
+    @contextlib.contextmanager
+    def time(self, name, label=None):
+        """Record the duration of a block, in seconds, in a histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, label)
+
+    def inc(self, name, label=None, amount=1):
+        """Increment a counter.
+
+        Args:
+            name: Counter name.
+            label: Value of the counter label, or None.
+            amount: Increment.
+
+        """
+        shard = self._shard()
+        shard[name, label] = shard.get((name, label), 0) + amount
+
+    def _totals(self):
+        """Sum the retired total and the series of every live shard."""
+        totals = {}
+        with self._lock:
+            _merge(totals, self._retired)
+            shards = list(self._shards.values())
+        for shard in shards:
+            _merge(totals, shard)
+        return totals
+
+    def _read(self, reads):
+        """Sum the values of the sources of a collected metric.
+
+        Returns:
+            Dictionary of values by label value, None for an unlabelled
+            value, or None if no source reports anything.
+
+        """
+        values = None
+        for read in reads:
+            value = read()
+            if value is None:
+                continue
+            if not isinstance(value, dict):
+                value = {None: value}
+            values = values or {}
+            for key, count in value.items():
+                values[key] = values.get(key, 0) + count
+        return values
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            The exposition, as a string.
+
+        """
+        totals = self._totals()
+        lines = []
+
+        def labels(label, value, *extra):
+            pairs = [f'{label}="{value}"'] if label is not None else []
+            pairs += extra
+            return '{' + ','.join(pairs) + '}' if pairs else ''
+
+        for name, (help, label, buckets) in self._histograms.items():
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} histogram']
+            for (_, value), series in sorted(
+                    item for item in totals.items() if item[0][0] == name):
+                cumulative = 0
+                for bound, count in zip(buckets + (math.inf,), series[1:],
+                                        strict=True):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else repr(float(bound))
+                    bucket = labels(label, value, 'le="' + le + '"')
+                    lines.append(f'{name}_bucket{bucket} {cumulative}')
+                lines.append(f'{name}_sum{labels(label, value)} '
+                             f'{float(series[0])!r}')
+                lines.append(f'{name}_count{labels(label, value)} '
+                             f'{cumulative}')
+        for name, (help, label) in self._counters.items():
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} counter']
+            for (_, value), count in sorted(
+                    item for item in totals.items() if item[0][0] == name):
+                lines.append(f'{name}{labels(label, value)} {count}')
+        for name, (help, kind, label, reads) in self._collected.items():
+            values = self._read(reads)
+            if values is None:
+                continue
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}']
+            for value, count in sorted(values.items(),
+                                       key=lambda item: str(item[0])):
+                lines.append(f'{name}{labels(label, value)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _merge(totals, shard):
+    """Add the series of a metrics shard to ``totals``."""
+    for key, series in shard.copy().items():
+        if isinstance(series, list):
+            total = totals.setdefault(key, [0] * len(series))
+            for i, value in enumerate(list(series)):
+                total[i] += value
+        else:
+            totals[key] = totals.get(key, 0) + series
+
+
+# Process-wide metrics, exposed on /metrics.
+metrics = Metrics()
+STAGE_SECONDS = metrics.histogram(
+    'triangulation_stage_seconds',
+    'Time spent in each stage of triangulation requests.',
+    (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1,
+     2.5, 5, 10, 30),
+    label='stage',
+)
+INPUT_POINTS = metrics.histogram(
+    'triangulation_input_points',
+    'Number of points of the triangulated PointSets.',
+    (10, 100, 1000, 10000, 100000, 1000000, 10000000),
+)
+ERRORS = metrics.counter(
+    'triangulation_errors_total',
+    'Error responses and batch records, by error code.',
+    label='code',
+)
+POINTSET_CACHE = metrics.counter(
+    'pointset_cache_total',
+    'PointSet lookups by outcome: hit, negative_hit, not_modified, miss.',
+    label='result',
+)
+
+
+class PointSetManager:
+    """Manager for retrieving PointSet from remote service.
+
+    Requests go through one long-lived pooled ``requests.Session`` so that
+    connections to the PointSetManager are kept alive and reused. Every
+    setting below can be overridden through the environment.
+
+    PointSet bodies are streamed through a PointSetDecoder, so they are
+    parsed while they arrive and never held as bytes; PointSets declaring
+    more than MAX_POINTS points are refused before any allocation.
+
+    Decoded PointSets are kept in a bounded cache. An entry is served
+    as is for CACHE_TTL seconds, then revalidated with ``If-None-Match``
+    when upstream gave an ETag, so an unchanged PointSet costs a 304
+    instead of its body. Not found answers are cached for NEGATIVE_TTL
+    seconds. After BREAKER_THRESHOLD consecutive transport errors or 5xx
+    answers, retrievals fail fast with CircuitOpen for BREAKER_RESET
+    seconds instead of tying up threads on a service that is down.
+    """
+
+    BASE_URL = _env('POINT_SET_MANAGER_URL', 'http://localhost:5000')
+    POOL_SIZE = _env('POINT_SET_MANAGER_POOL_SIZE', 10, int)
+    CONNECT_TIMEOUT = _env('POINT_SET_MANAGER_CONNECT_TIMEOUT', 3.05, float)
+    READ_TIMEOUT = _env('POINT_SET_MANAGER_READ_TIMEOUT', 30.0, float)
+    MAX_RETRIES = _env('POINT_SET_MANAGER_MAX_RETRIES', 2, int)
+    BACKOFF_FACTOR = _env('POINT_SET_MANAGER_BACKOFF_FACTOR', 0.1, float)
+    CACHE_TTL = _env('POINT_SET_MANAGER_CACHE_TTL', 0.0, float)
+    NEGATIVE_TTL = _env('POINT_SET_MANAGER_NEGATIVE_TTL', 5.0, float)
+    BREAKER_THRESHOLD = _env('POINT_SET_MANAGER_BREAKER_THRESHOLD', 5, int)
+    BREAKER_RESET = _env('POINT_SET_MANAGER_BREAKER_RESET', 10.0, float)
+    MAX_POINTS = _env('POINT_SET_MANAGER_MAX_POINTS', 100_000_000, int)
+
+    # Size of the body chunks fed to the PointSetDecoder.
+    CHUNK_BYTES = 256 * 1024
+
+    # Decoded PointSets by PointSetID, as ``(pointset, etag, fresh_until)``;
+    # a None PointSet records a not found answer.
+    cache = LRUCache(_env('POINT_SET_MANAGER_CACHE_BYTES', 64 * 1024 * 1024,
+                          int))
+    breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RESET)
+
+    # Size accounted for a not found entry.
+    NEGATIVE_BYTES = 64
+
+    _session = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def create_session(cls):
+        """Create a pooled session with bounded retries and backoff.
+
+        Returns:
+            requests.Session instance.
+
+        """
+        retry = Retry(
+            total=cls.MAX_RETRIES,
+            backoff_factor=cls.BACKOFF_FACTOR,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET'}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=cls.POOL_SIZE,
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @classmethod
+    def session(cls):
+        """Get the shared session, creating it on first use."""
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    cls._session = cls.create_session()
+        return cls._session
+
+    @classmethod
+    def close(cls):
+        """Close the shared session and its pooled connections."""
+        with cls._session_lock:
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
+
+    @classmethod
+    def reset(cls):
+        """Forget the cached PointSets and close the circuit."""
+        cls.cache.clear()
+        cls.breaker.success()
+
+    @classmethod
+    def decoder(cls, status_code, headers):
+        """Get the incremental decoder of a response body.
+
+        Args:
+            status_code: HTTP status code of the response.
+            headers: Case-insensitive response headers.
+
+        Returns:
+            PointSetDecoder, or None unless the body holds a PointSet.
+
+        """
+        if status_code != 200:
+            return None
+        length = headers.get('Content-Length')
+        # The length of a compressed body says nothing of the PointSet.
+        if headers.get('Content-Encoding', 'identity') != 'identity':
+            length = None
+        return PointSetDecoder(cls.MAX_POINTS,
+                               int(length) if length else None)
+
+    @staticmethod
+    def parse_response(status_code, content):
+        """Interpret a PointSetManager response.
+
+        Args:
+            status_code: HTTP status code of the response.
+            content: Response body, or the PointSetDecoder it was fed to.
+
+        Returns:
+            PointSet instance or None if not found or invalid.
+
+        Raises:
+            ConnectionError: If the service answered 502, 503 or 504.
+            PayloadTooLarge: If the PointSet has more than MAX_POINTS.
+            Exception: If the status code is unexpected.
+
+        """
+        if status_code == 200:
+            with metrics.time(STAGE_SECONDS, 'decode'):
+                if not isinstance(content, PointSetDecoder):
+                    return PointSet.from_binary(content)
+                try:
+                    return content.close()
+                except PayloadTooLarge:
+                    raise
+                except ValueError:
+                    return None
+        elif status_code == 404:
+            return None
+        elif status_code in (502, 503, 504):
+            raise ConnectionError(f"PointSetManager returned {status_code}")
+        else:
+            raise Exception(f"PointSetManager returned {status_code}")
+
+    @classmethod
+    def lookup(cls, point_set_id):
+        """Look a PointSet up in the cache before fetching it.
+
+        Args:
+            point_set_id: The ID of the PointSet to retrieve.
+
+        Returns:
+            Tuple ``(entry, fresh)``: the cache entry or None, and whether
+            it can be served without asking upstream.
+
+        Raises:
+            CircuitOpen: If the PointSet must be fetched while the circuit
+                is open.
+
+        """
+        entry = cls.cache.get(point_set_id)
+        if entry is not None and entry[2] > time.monotonic():
+            metrics.inc(POINTSET_CACHE,
+                        'hit' if entry[0] is not None else 'negative_hit')
+            return entry, True
+        if not cls.breaker.allow():
+            raise CircuitOpen("PointSetManager circuit open")
+        return entry, False
+
+    @staticmethod
+    def request_headers(entry):
+        """Get the headers revalidating a cache entry, None if it has none."""
+        if entry is None or entry[1] is None:
+            return None
+        return {'If-None-Match': entry[1]}
+
+    @staticmethod
+    def needs_body(status_code, entry):
+        """Check whether an answer is a 304 with no cached PointSet to serve.
+
+        The retrieval is then made once more without ``If-None-Match``.
+        """
+        return status_code == 304 and (entry is None or entry[0] is None)
+
+    @classmethod
+    def fetch_failed(cls):
+        """Record a retrieval that got no answer from upstream."""
+        cls.breaker.failure()
+
+    @classmethod
+    def fetch_abandoned(cls):
+        """Record a retrieval interrupted by an error of its own."""
+        cls.breaker.abandon()
+
+    @classmethod
+    def fetched(cls, point_set_id, entry, status_code, content, etag):
+        """Interpret a PointSetManager answer and update the cache.
+
+        Args:
+            point_set_id: The ID of the requested PointSet.
+            entry: Cache entry the request revalidated, or None.
+            status_code: HTTP status code of the response.
+            content: Response body, or the PointSetDecoder it was fed to.
+            etag: ETag header of the response, or None.
+
+        Returns:
+            PointSet instance or None if not found.
+
+        Raises:
+            ConnectionError: If the service is unavailable.
+            PayloadTooLarge: If the PointSet has more than MAX_POINTS.
+            Exception: If the status code is unexpected.
+
+        """
+        if status_code >= 500:
+            cls.breaker.failure()
+        else:
+            cls.breaker.success()
+        if status_code == 304 and entry is not None and entry[0] is not None:
+            metrics.inc(POINTSET_CACHE, 'not_modified')
+            pointset, etag = entry[0], etag or entry[1]
+        else:
+            metrics.inc(POINTSET_CACHE, 'miss')
+            pointset = cls.parse_response(status_code, content)
+        if status_code == 404:
+            cls.cache.put(point_set_id, (None, None, math.inf),
+                          cls.NEGATIVE_BYTES, ttl=cls.NEGATIVE_TTL)
+        elif pointset is not None and (etag or cls.CACHE_TTL > 0):
+            cls.cache.put(point_set_id,
+                          (pointset, etag, time.monotonic() + cls.CACHE_TTL),
+                          4 + 8 * pointset.n_points)
+        return pointset
+
+    @staticmethod
+    def retrieve(point_set_id):
+        """Retrieve a PointSet from the cache or the remote service.
+
+        Args:
+            point_set_id: The ID of the PointSet to retrieve.
+
+        Returns:
+            PointSet instance or None if not found.
+
+        Raises:
+            ConnectionError: If the service is unavailable, or CircuitOpen
+                while it is considered down.
+
+        """
+        entry, fresh = PointSetManager.lookup(point_set_id)
+        if fresh:
+            return entry[0]
+        headers = PointSetManager.request_headers(entry)
+        try:
+            for _ in range(2):
+                with metrics.time(STAGE_SECONDS, 'fetch'):
+                    response = PointSetManager.session().get(
+                        f"{PointSetManager.BASE_URL}/pointset/{point_set_id}",
+                        timeout=(PointSetManager.CONNECT_TIMEOUT,
+                                 PointSetManager.READ_TIMEOUT),
+                        stream=True,
+                        **({'headers': headers} if headers else {}),
+                    )
+                    try:
+                        content = PointSetManager.decoder(
+                            response.status_code, response.headers)
+                        if content is None:
+                            content = response.content
+                        else:
+                            for chunk in response.iter_content(
+                                    PointSetManager.CHUNK_BYTES):
+                                if not content.feed(chunk):
+                                    break
+                    finally:
+                        response.close()
+                if not PointSetManager.needs_body(response.status_code,
+                                                  entry):
+                    break
+                headers = None
+        except requests.RequestException as err:
+            PointSetManager.fetch_failed()
+            raise ConnectionError("PointSetManager unavailable") from err
+        except BaseException:
+            PointSetManager.fetch_abandoned()
+            raise
+        return PointSetManager.fetched(point_set_id, entry,
+                                       response.status_code, content,
+                                       response.headers.get('ETag'))
+
+
+class TriangulationStore:
+    """Content-addressed on-disk store of triangle index blocks.
+
+    Entries are keyed by ``PointSet.digest()`` so that identical geometry is
+    triangulated once, whatever PointSetID it was uploaded under. Files are
+    written atomically, so several worker processes can share a directory;
+    one on a tmpfs such as ``/dev/shm`` keeps the store in shared memory.
+    The least recently used files are pruned past ``max_bytes``.
+    """
+
+    SUFFIX = '.tri'
+
+    def __init__(self, directory, max_bytes=None):
+        """Initialize a TriangulationStore.
+
+        Args:
+            directory: Directory holding the store, created if needed.
+            max_bytes: Maximum total size of the stored files, or None.
+
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _path(self, digest):
+        """Get the file path of an entry."""
+        return os.path.join(self.directory, digest[:2], digest + self.SUFFIX)
+
+    def get(self, digest):
+        """Load the triangles stored for a PointSet digest.
+
+        Args:
+            digest: Value of ``PointSet.digest()``.
+
+        Returns:
+            uint32 ``(n, 3)`` index array, or None if absent or corrupt.
+
+        """
+        path = self._path(digest)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            data = None
+        if data is None or len(data) % (3 * INDEX_DTYPE.itemsize):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return np.frombuffer(data, dtype=INDEX_DTYPE).reshape(-1, 3)
+
+    def put(self, digest, indices):
+        """Store the triangles of a PointSet digest.
+
+        Args:
+            digest: Value of ``PointSet.digest()``.
+            indices: Triangle vertex indices, convertible to uint32.
+
+        """
+        data = np.ascontiguousarray(indices, dtype=INDEX_DTYPE).tobytes()
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = _temp_path(path)
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.writes += 1
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._files())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._prune()
+
+    def _files(self):
+        """List the stored files as ``(path, size, mtime)`` tuples."""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(self.SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _prune(self):
+        """Remove least recently used files until under ``max_bytes``."""
+        files = sorted(self._files(), key=lambda f: f[2])
+        self._size = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+
+    def stats(self):
+        """Get the store counters.
+
+        Returns:
+            Dictionary of counters.
+
+        """
+        return {"hits": self.hits, "misses": self.misses,
+                "writes": self.writes}
+
+
+# Triangulation engines, looked up by name so that worker processes can
+# resolve the one a job asks for.
+SCIPY = 'scipy'
+NATIVE = 'native'
+TRIANGLE = 'triangle'
+# Policy choosing the cheapest available engine for each input size.
+AUTO = 'auto'
+
+
+class Backend:
+    """Triangulation engine with its declared capabilities and costs.
+
+    The cost model, a per-call overhead plus a per-point time in seconds,
+    is only compared between engines by the AUTO policy; the measured
+    figures come from ``bench.py --backends`` on uniform input. Engines
+    without measured figures are only used when selected by name.
+    """
+
+    def __init__(self, name, engine, module=None, exact=False,
+                 max_points=None, overhead=None, per_point=None,
+                 description=''):
+        """Initialize a Backend.
+
+        Args:
+            name: Name under which clients and workers select the engine.
+            engine: Function mapping an ``(n, 2)`` coordinate array to its
+                ``(m, 3)`` simplices.
+            module: Module the engine imports, None if always available.
+            exact: Whether the engine uses exact geometric predicates.
+            max_points: Largest input the AUTO policy gives to the engine,
+                None for no limit.
+            overhead: Measured seconds spent per call, None if unmeasured.
+            per_point: Measured seconds spent per input point, None if
+                unmeasured.
+            description: Human readable summary.
+
+        """
+        self.name = name
+        self.engine = engine
+        self.module = module
+        self.exact = exact
+        self.max_points = max_points
+        self.overhead = overhead
+        self.per_point = per_point
+        self.description = description
+        self._available = None
+
+    def available(self):
+        """Check whether the engine's module is installed, without importing it."""
+        if self.module is None:
+            return True
+        if self.module in sys.modules and sys.modules[self.module] is None:
+            # Masked for now, as tests do; not remembered.
+            return False
+        if self._available is None:
+            try:
+                found = importlib.util.find_spec(self.module) is not None
+            except (ImportError, ValueError):
+                # A parent package failed to import, or was masked.
+                return False
+            self._available = found
+        return self._available
+
+    @property
+    def measured(self):
+        """Check whether the cost model was measured, as AUTO requires."""
+        return self.overhead is not None and self.per_point is not None
+
+    def supports(self, n_points):
+        """Check whether the AUTO policy may give ``n_points`` to the engine."""
+        return self.max_points is None or n_points <= self.max_points
+
+    def cost(self, n_points):
+        """Estimate the seconds needed to triangulate ``n_points``."""
+        return self.overhead + self.per_point * n_points
+
+    def describe(self):
+        """Get the capabilities and costs of the engine.
+
+        Returns:
+            JSON serializable dictionary.
+
+        """
+        return {"name": self.name, "available": self.available(),
+                "exact": self.exact, "max_points": self.max_points,
+                "overhead_seconds": self.overhead,
+                "per_point_seconds": self.per_point,
+                "description": self.description}
+
+
+# Registered triangulation engines, by name.
+BACKENDS = {}
+
+
+def register_backend(backend):
+    """Add a triangulation engine to the registry.
+
+    Engines must be registered when ``main`` is imported for the
+    TriangulationExecutor worker processes to find them.
+
+    Args:
+        backend: Backend to register, replacing any of the same name.
+
+    Returns:
+        The Backend.
+
+    """
+    if backend.name == AUTO:
+        raise ValueError(f"Reserved backend name: {AUTO}")
+    BACKENDS[backend.name] = backend
+    return backend
+
+
+def select_backend(n_points, name=AUTO):
+    """Resolve the engine triangulating an input.
+
+    Args:
+        n_points: Number of distinct points to triangulate.
+        name: Registered engine name, or AUTO for the cheapest available
+            engine with measured costs supporting ``n_points``.
+
+    Returns:
+        Name of a registered engine.
+
+    Raises:
+        ValueError: If the engine is unknown.
+
+    """
+    if name != AUTO:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown triangulation backend: {name}")
+        return name
+    candidates = [b for b in BACKENDS.values()
+                  if b.measured and b.available() and b.supports(n_points)]
+    if not candidates:
+        return NATIVE
+    return min(candidates, key=lambda b: b.cost(n_points)).name
+
+
+def _load_backend(name):
+    """Import the module of a registered engine.
+
+    Returns:
+        True if the engine can run.
+
+    """
+    module = BACKENDS[name].module
+    if module is None:
+        return True
+    try:
+        importlib.import_module(module)
+    except ImportError:
+        return False
+    return True
+
+
+# Largest input rejected by Qhull that the native engine triangulates.
+FALLBACK_MAX_POINTS = _env('TRIANGULATION_FALLBACK_MAX_POINTS', 5000, int)
+
+
+def _scipy_delaunay(coords):
+    """Triangulate with SciPy's Qhull wrapper.
+
+    Raises:
+        DegeneratePointSet: If Qhull rejects an input larger than
+            FALLBACK_MAX_POINTS.
+
+    """
+    from scipy.spatial import Delaunay, QhullError
+    try:
+        return Delaunay(coords).simplices
+    except QhullError:
+        # Qhull rejects nearly flat inputs, the exact native engine does
+        # not but can take minutes on large ones.
+        if len(coords) > FALLBACK_MAX_POINTS:
+            raise DegeneratePointSet(
+                f"Qhull rejected {len(coords)} nearly degenerate points, "
+                f"more than the {FALLBACK_MAX_POINTS} the exact engine "
+                "takes") from None
+        return delaunay.triangulate(coords)
+
+
+def _triangle_delaunay(coords):
+    """Triangulate with the bindings of Shewchuk's Triangle."""
+    import triangle
+    # Without switches Triangle neither adds nor renumbers vertices.
+    result = triangle.triangulate(
+        {'vertices': np.asarray(coords, dtype=np.float64)})
+    return result.get('triangles', np.empty((0, 3), dtype=np.int32))
+
+
+register_backend(Backend(
+    SCIPY, _scipy_delaunay, module='scipy.spatial', overhead=6e-5,
+    per_point=6e-6, description="Qhull through SciPy, floating point"))
+register_backend(Backend(
+    NATIVE, delaunay.triangulate, exact=True, max_points=20000,
+    overhead=4e-4, per_point=6.5e-5,
+    description="Bowyer-Watson in Python and NumPy, exact predicates"))
+# Optional compiled engine, used only when the package is installed and
+# selected by name: its costs were never measured, so AUTO leaves it out
+# until ``bench.py --backends triangle`` gives its figures.
+register_backend(Backend(
+    TRIANGLE, _triangle_delaunay, module='triangle', exact=True,
+    description="Shewchuk's Triangle, adaptive exact predicates"))
+
+
+def _delaunay(coords, backend=SCIPY):
+    """Compute the Delaunay simplices of a coordinate array.
+
+    Args:
+        coords: ``(n, 2)`` coordinate array.
+        backend: Name of a registered triangulation engine.
+
+    Raises:
+        ImportError: If the engine's module is not installed.
+        ValueError: If the backend is unknown.
+
+    """
+    try:
+        engine = BACKENDS[backend].engine
+    except KeyError:
+        raise ValueError(f"Unknown triangulation backend: {backend}") from None
+    return engine(coords)
+
+
+class NonFiniteCoordinates(ValueError):
+    """Raised when a PointSet has NaN or infinite coordinates."""
+
+
+class DegeneratePointSet(ValueError):
+    """Raised when a nearly degenerate PointSet is too large to triangulate."""
+
+
+def _unique_points(coords):
+    """Find the first occurrence of each distinct point.
+
+    Args:
+        coords: float32 ``(n, 2)`` coordinate array.
+
+    Returns:
+        Sorted indices of the distinct points, or None if all are distinct.
+
+    """
+    # Adding zero turns -0.0 into 0.0, so that equal values share their bits.
+    keys = np.ascontiguousarray(coords + COORD_DTYPE.type(0)).view(np.uint64)
+    _, first = np.unique(keys.ravel(), return_index=True)
+    if len(first) == len(coords):
+        return None
+    first.sort()
+    return first
+
+
+# Distance to a line, relative to the largest absolute coordinate, within
+# which points count as collinear: a few float32 rounding steps. Qhull and
+# the native engine slow down by orders of magnitude on such inputs.
+COLLINEAR_RTOL = 1e-6
+
+
+def _collinear(coords):
+    """Check in linear time whether all the points lie on one line.
+
+    Points within COLLINEAR_RTOL of a line count as collinear, so that
+    collinear points whose coordinates were rounded to float32 do too.
+
+    Args:
+        coords: ``(n, 2)`` coordinate array of distinct points.
+
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    origin = coords[0]
+    offsets = coords - origin
+    direction = offsets[np.argmax(np.abs(offsets).sum(axis=1))]
+    cross = direction[0] * offsets[:, 1] - direction[1] * offsets[:, 0]
+    # The cross product is the distance to the line times its length.
+    tolerance = COLLINEAR_RTOL * np.abs(coords).max() * np.hypot(*direction)
+    return bool(np.abs(cross).max() <= tolerance)
+
+
+# Tiny input triangulated to load and exercise a backend before traffic.
+WARM_UP_COORDS = np.array([[0, 0], [1, 0], [0, 1], [1, 1], [0.5, 0.25]],
+                          dtype=COORD_DTYPE)
+
+
+def _share(array):
+    """Copy an array into a new shared memory block.
+
+    Returns:
+        The SharedMemory block, which the caller must close and unlink.
+
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+    return block
+
+
+def _triangulate_shared(name, n_points, backend=SCIPY):
+    """Triangulate coordinates found in shared memory, in a worker process.
+
+    Args:
+        name: Name of the block holding the float32 ``(n_points, 2)`` array.
+        n_points: Number of points in the block.
+        backend: Triangulation engine.
+
+    Returns:
+        Tuple ``(name, count)`` of the block holding the uint32
+        ``(count, 3)`` simplices, left for the caller to unlink.
+
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        coords = np.ndarray((n_points, 2), COORD_DTYPE, buffer=block.buf)
+        simplices = _delaunay(coords, backend).astype(INDEX_DTYPE)
+        del coords
+    finally:
+        block.close()
+    result = _share(simplices)
+    result.close()
+    return result.name, len(simplices)
+
+
+def _take_shared(name, shape, dtype):
+    """Copy an array out of a shared memory block, then unlink the block."""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return np.ndarray(shape, dtype, buffer=block.buf).copy()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _circumcircles(coords, simplices):
+    """Get the circumcircle of each triangle.
+
+    Returns:
+        Tuple ``(centers, radii)``; degenerate triangles get infinite radii.
+
+    """
+    a, b, c = (coords[simplices[:, i]].astype(np.float64) for i in range(3))
+    b = b - a
+    c = c - a
+    b2 = (b * b).sum(axis=1)
+    c2 = (c * c).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d = 2 * (b[:, 0] * c[:, 1] - b[:, 1] * c[:, 0])
+        center = np.column_stack([(c[:, 1] * b2 - b[:, 1] * c2) / d,
+                                  (b[:, 0] * c2 - c[:, 0] * b2) / d])
+    radii = np.hypot(center[:, 0], center[:, 1])
+    radii[~np.isfinite(radii)] = np.inf
+    return center + a, radii
+
+
+def _within_slabs(centers, radii, cuts):
+    """Check which circles lie strictly inside one vertical slab.
+
+    Slab ``i`` spans ``cuts[i - 1] <= x < cuts[i]``, unbounded at both ends.
+    A margin absorbs the rounding of the circle computation, sending
+    borderline circles to the seam.
+    """
+    bounds = np.concatenate([[-np.inf], cuts, [np.inf]])
+    slab = np.searchsorted(cuts, centers[:, 0], side='right')
+    margin = 1e-9 * (np.abs(centers[:, 0]) + radii) + 1e-300
+    return ((centers[:, 0] - radii - margin > bounds[slab])
+            & (centers[:, 0] + radii + margin < bounds[slab + 1]))
+
+
+def _edge_counts(simplices):
+    """Count the triangles bordering each edge of a triangulation.
+
+    Returns:
+        Tuple ``(edges, counts)`` of the distinct undirected edges, as
+        ``(k, 2)`` vertex pairs, and their number of triangles.
+
+    """
+    size = int(simplices.max()) + 1
+    a = simplices.ravel()
+    b = simplices[:, [1, 2, 0]].ravel()
+    keys = np.sort(np.minimum(a, b) * size + np.maximum(a, b))
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    counts = np.diff(np.append(starts, len(keys)))
+    keys = keys[starts]
+    return np.column_stack([keys // size, keys % size]), counts
+
+
+def _boundary_vertices(simplices):
+    """Get the vertices on the boundary of a triangulation."""
+    edges, counts = _edge_counts(simplices)
+    return np.unique(edges[counts == 1])
+
+
+def _triangulate_tile(name, n_points, start, end, cuts, backend=SCIPY):
+    """Triangulate one vertical strip of x-sorted points, in a worker process.
+
+    Triangles whose circumcircle lies inside the strip's slab are final:
+    only points of the strip can be inside it. The other triangles touch
+    the seams and are redone by the caller from their vertices.
+
+    Args:
+        name: Name of the block holding the x-sorted float32 coordinates.
+        n_points: Number of points in the block.
+        start: First row of the strip.
+        end: Row after the last of the strip.
+        cuts: x coordinates separating the strips.
+        backend: Triangulation engine.
+
+    Returns:
+        Tuple ``(name, finals, seams)`` of the block holding ``finals``
+        uint32 final simplices then ``seams`` seam vertex rows, left for
+        the caller to unlink.
+
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        coords = np.ndarray((n_points, 2), COORD_DTYPE,
+                            buffer=block.buf)[start:end].copy()
+    finally:
+        block.close()
+    simplices = np.asarray(_delaunay(coords, backend), dtype=np.int64)
+    if len(simplices) == 0:
+        final = simplices
+        seam = np.arange(len(coords))
+    else:
+        inside = _within_slabs(*_circumcircles(coords, simplices), cuts)
+        final = simplices[inside]
+        seam = np.union1d(simplices[~inside].ravel(),
+                          _boundary_vertices(simplices))
+    out = np.concatenate([final.ravel(), seam]) + start
+    result = _share(out.astype(INDEX_DTYPE))
+    result.close()
+    return result.name, len(final), len(seam)
+
+
+def _is_triangulation(coords, simplices):
+    """Check that triangles tile the convex hull of their vertices.
+
+    Edges must border at most two triangles, the triangle count must
+    satisfy Euler's relation and the areas must add up to the hull area.
+    """
+    from scipy.spatial import ConvexHull
+
+    vertices = np.flatnonzero(np.bincount(simplices.ravel()))
+    _, counts = _edge_counts(simplices)
+    boundary = int((counts == 1).sum())
+    if (counts > 2).any() or \
+            len(simplices) != 2 * len(vertices) - 2 - boundary:
+        return False
+    a, b, c = (coords[simplices[:, i]].astype(np.float64) for i in range(3))
+    area = np.abs((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1])
+                  - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])).sum() / 2
+    hull = ConvexHull(coords[vertices]).volume
+    return bool(np.isclose(area, hull, rtol=1e-9, atol=0))
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the triangulation executor cannot admit more jobs."""
+
+
+class TriangulationExecutor:
+    """Run large triangulations in a pool of worker processes.
+
+    Jobs below ``threshold`` points stay inline in the calling thread.
+    Larger ones go to the pool, with the point and simplex arrays passed
+    through ``multiprocessing.shared_memory`` instead of being pickled. At
+    most ``max_pending`` jobs may be queued or running, further ones are
+    rejected with ExecutorSaturated.
+    """
+
+    def __init__(self, workers, threshold=50000, max_pending=None,
+                 partition_threshold=None):
+        """Initialize a TriangulationExecutor.
+
+        Args:
+            workers: Number of worker processes.
+            threshold: Minimum number of points sent to the pool.
+            max_pending: Maximum number of pool jobs queued or running,
+                twice ``workers`` by default.
+            partition_threshold: Minimum number of points split across
+                all the workers with ``run_partitioned``, None to never
+                split.
+
+        """
+        self.workers = workers
+        self.threshold = threshold
+        self.max_pending = 2 * workers if max_pending is None else max_pending
+        self.partition_threshold = partition_threshold
+        self.pending = 0
+        self.rejected = 0
+        self.partition_fallbacks = 0
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        """Get the process pool, starting it on first use."""
+        with self._lock:
+            if self._pool is None:
+                # Spawned, not forked: the server process runs threads.
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=get_context('spawn'))
+            return self._pool
+
+    def _admit(self):
+        """Reserve a pending slot, or raise ExecutorSaturated."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise ExecutorSaturated("Triangulation queue is full")
+            self.pending += 1
+
+    def _release(self):
+        """Free a pending slot."""
+        with self._lock:
+            self.pending -= 1
+
+    def run(self, coords, backend=SCIPY):
+        """Compute the Delaunay simplices of a coordinate array.
+
+        Args:
+            coords: float32 ``(n, 2)`` coordinate array.
+            backend: Triangulation engine.
+
+        Returns:
+            ``(m, 3)`` simplex array.
+
+        Raises:
+            ExecutorSaturated: If too many jobs are already pending.
+
+        """
+        if len(coords) < self.threshold:
+            return _delaunay(coords, backend)
+
+        self._admit()
+        try:
+            if self.workers > 1 and self.partition_threshold is not None \
+                    and len(coords) >= self.partition_threshold:
+                return self.run_partitioned(coords, backend)
+            block = _share(coords)
+            try:
+                future = self._get_pool().submit(
+                    _triangulate_shared, block.name, len(coords), backend)
+                name, count = future.result()
+            finally:
+                block.close()
+                block.unlink()
+            return _take_shared(name, (count, 3), INDEX_DTYPE)
+        finally:
+            self._release()
+
+    def run_partitioned(self, coords, backend=SCIPY, tiles=None):
+        """Triangulate distinct points in vertical strips, in parallel.
+
+        The points are split into strips holding equal numbers of points,
+        each triangulated in a worker. Triangles whose circumcircle stays
+        inside their strip are final; the vertices of the others, and the
+        strip hulls, are triangulated again in the calling process, and
+        the resulting triangles crossing a seam are kept when no other
+        point is inside their circumcircle. A merge failing the final
+        consistency check, e.g. on cocircular inputs, is redone as a
+        single triangulation.
+
+        Args:
+            coords: float32 ``(n, 2)`` array of distinct points.
+            backend: Triangulation engine of the strips.
+            tiles: Number of strips, ``workers`` by default.
+
+        Returns:
+            ``(m, 3)`` simplex array.
+
+        """
+        from scipy.spatial import cKDTree
+
+        tiles = tiles or self.workers
+        order = np.argsort(coords[:, 0], kind='stable')
+        ordered = np.ascontiguousarray(coords[order])
+        xs = ordered[:, 0]
+        cuts = np.unique(xs[len(xs) * np.arange(1, tiles) // tiles])
+        cuts = cuts[cuts > xs[0]].astype(np.float64)
+        starts = np.concatenate([[0], np.searchsorted(xs, cuts), [len(xs)]])
+
+        block = _share(ordered)
+        try:
+            pool = self._get_pool()
+            futures = [pool.submit(_triangulate_tile, block.name,
+                                   len(ordered), int(start), int(end), cuts,
+                                   backend)
+                       for start, end in zip(starts[:-1], starts[1:],
+                                             strict=True)]
+            finals = []
+            seams = []
+            for future in futures:
+                name, n_final, n_seam = future.result()
+                out = _take_shared(name, (3 * n_final + n_seam,),
+                                   INDEX_DTYPE).astype(np.int64)
+                finals.append(out[:3 * n_final].reshape(-1, 3))
+                seams.append(out[3 * n_final:])
+        finally:
+            block.close()
+            block.unlink()
+
+        seam = np.unique(np.concatenate(seams))
+        stitched = seam[np.asarray(_delaunay(ordered[seam], backend),
+                                   dtype=np.int64).reshape(-1, 3)]
+        centers, radii = _circumcircles(ordered, stitched)
+        crossing = ~_within_slabs(centers, radii, cuts)
+        stitched, centers, radii = (stitched[crossing], centers[crossing],
+                                    radii[crossing])
+        others = np.ones(len(ordered), dtype=bool)
+        others[seam] = False
+        if others.any() and len(stitched):
+            distance, _ = cKDTree(ordered[others]).query(centers)
+            stitched = stitched[distance >= radii * (1 - 1e-9)]
+
+        simplices = np.concatenate(finals + [stitched])
+        if not _is_triangulation(ordered, simplices):
+            with self._lock:
+                self.partition_fallbacks += 1
+            simplices = np.asarray(_delaunay(ordered, backend),
+                                   dtype=np.int64)
+        return order[simplices]
+
+    def warm_up(self, backend=SCIPY):
+        """Start the worker processes and load the backend in them.
+
+        The workers import this module and the engine's. Submitting a
+        function of this module would block while it is being imported,
+        as pickling it waits for the import lock; a builtin running the
+        import statement is submitted instead, so that ``init()`` can warm
+        up at import time.
+
+        Args:
+            backend: Triangulation engine.
+
+        """
+        pool = self._get_pool()
+        modules = ', '.join(m for m in (__name__, BACKENDS[backend].module)
+                            if m is not None)
+        futures = [pool.submit(exec, f"import {modules}")
+                   for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def stats(self):
+        """Get the executor counters.
+
+        Returns:
+            Dictionary with the pending and rejected job counts.
+
+        """
+        with self._lock:
+            return {"workers": self.workers, "pending": self.pending,
+                    "max_pending": self.max_pending,
+                    "rejected": self.rejected,
+                    "partition_fallbacks": self.partition_fallbacks}
+
+
+class BackendState:
+    """Readiness of the triangulation backend, with its startup timings."""
+
+    COLD = 'cold'
+    WARMING = 'warming'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    def __init__(self):
+        """Initialize a cold BackendState."""
+        self.status = BackendState.COLD
+        self.backend = None
+        self.import_seconds = None
+        self.warm_up_seconds = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        """Check whether the backend can serve traffic."""
+        return self.status == BackendState.READY
+
+    def begin(self):
+        """Claim the initialization of a cold or failed backend.
+
+        Returns:
+            True if the caller must run the initialization.
+
+        """
+        with self._lock:
+            if self.status in (BackendState.WARMING, BackendState.READY):
+                return False
+            self.status = BackendState.WARMING
+            self.error = None
+            return True
+
+    def stats(self):
+        """Get the readiness state.
+
+        Returns:
+            Dictionary of the status, resolved backend and timings.
+
+        """
+        return {"status": self.status, "backend": self.backend,
+                "import_seconds": self.import_seconds,
+                "warm_up_seconds": self.warm_up_seconds,
+                "error": self.error}
+
+
+class Triangulator:
+    """Triangulator for computing Delaunay triangulation."""
+
+    # Optional TriangulationStore shared with the other workers.
+    store = None
+    # Optional TriangulationExecutor running large jobs in other processes.
+    executor = None
+    # Triangulation engine name, or AUTO to choose one per input size. An
+    # engine that cannot be imported is replaced with the native one.
+    backend = _env('TRIANGULATION_BACKEND', AUTO)
+    # Readiness of the backend, set by initialize().
+    state = BackendState()
+
+    @staticmethod
+    def initialize(warm_up=True, background=False):
+        """Resolve, import and optionally warm the triangulation backend.
+
+        A configured engine that cannot be imported falls back to the
+        native one; the AUTO policy loads every available engine. Calls
+        made while the backend is warming or ready return immediately.
+
+        Args:
+            warm_up: Whether to run a tiny triangulation, in the worker
+                processes too when an executor is configured.
+            background: Whether to initialize in a daemon thread.
+
+        Returns:
+            The BackendState.
+
+        """
+        state = Triangulator.state
+        if not state.begin():
+            return state
+        if background:
+            threading.Thread(target=Triangulator._initialize,
+                             args=(state, warm_up), daemon=True,
+                             name='triangulator-warm-up').start()
+        else:
+            Triangulator._initialize(state, warm_up)
+        return state
+
+    @staticmethod
+    def _initialize(state, warm_up):
+        """Run the backend initialization claimed in ``state``."""
+        try:
+            backend = Triangulator.backend
+            start = time.perf_counter()
+            if backend == AUTO:
+                names = [name for name, engine in BACKENDS.items()
+                         if engine.available()]
+            else:
+                names = [select_backend(0, backend)]
+            loaded = [name for name in names if _load_backend(name)]
+            if not loaded:
+                backend = NATIVE
+                loaded = [NATIVE]
+            state.import_seconds = time.perf_counter() - start
+            if warm_up:
+                start = time.perf_counter()
+                for name in loaded:
+                    _delaunay(WARM_UP_COORDS, name)
+                    if Triangulator.executor is not None:
+                        Triangulator.executor.warm_up(name)
+                state.warm_up_seconds = time.perf_counter() - start
+        except Exception as e:
+            state.error = str(e)
+            state.status = BackendState.FAILED
+            return
+        Triangulator.backend = state.backend = backend
+        state.status = BackendState.READY
+
+    @staticmethod
+    def _compute(coords, backend):
+        """Compute simplices with the executor when one is configured."""
+        executor = Triangulator.executor
+        if executor is not None:
+            return executor.run(coords, backend)
+        return _delaunay(coords, backend)
+
+    @staticmethod
+    def triangulate(pointset, backend=None):
+        """Triangulate a set of points using Delaunay triangulation.
+
+        When a store is configured, PointSets with an already triangulated
+        binary representation are answered from it. The native backend is
+        used when the selected one is not installed.
+
+        Duplicate points are triangulated once, under the index of their
+        first occurrence, and inputs with fewer than three distinct points
+        or only collinear points have no triangles, without reaching the
+        backend.
+
+        Args:
+            pointset: PointSet to triangulate.
+            backend: Engine name or AUTO requested by the caller, None for
+                the configured ``Triangulator.backend``. Stored results of
+                a requested engine are kept apart from the others.
+
+        Returns:
+            Triangles instance.
+
+        Raises:
+            NonFiniteCoordinates: If a coordinate is NaN or infinite.
+            ValueError: If the backend is unknown.
+
+        """
+        requested = Triangulator.backend if backend is None else backend
+        if pointset.n_points < 3:
+            return Triangles(pointset, 0, [], trusted=True)
+        coords = pointset.coords
+        if not np.isfinite(coords).all():
+            raise NonFiniteCoordinates("PointSet has non-finite coordinates")
+
+        store = Triangulator.store
+        digest = pointset.digest() if store is not None else None
+        if digest is not None and backend is not None:
+            digest = f"{digest}-{backend}"
+        if digest is not None:
+            indices = store.get(digest)
+            if indices is not None:
+                # Read back from disk, so left to the encoding validation.
+                return Triangles(pointset, len(indices), indices)
+
+        kept = _unique_points(coords)
+        if kept is not None:
+            coords = coords[kept]
+        if len(coords) < 3 or _collinear(coords):
+            simplices = np.empty((0, 3), dtype=INDEX_DTYPE)
+        else:
+            name = select_backend(len(coords), requested)
+            try:
+                simplices = Triangulator._compute(coords, name)
+            except ImportError:
+                simplices = Triangulator._compute(coords, NATIVE)
+            if kept is not None:
+                simplices = kept[simplices]
+        if digest is not None:
+            store.put(digest, simplices)
+        return Triangles(pointset, len(simplices), simplices, trusted=True)
+
+    @staticmethod
+    def update(triangles, added=(), removed=()):
+        """Update a triangulation after a few points were edited.
+
+        The new PointSet holds the previous points, minus ``removed``, in
+        their order, followed by ``added``. Only the cavities of the edited
+        points are re-triangulated, with the native engine, but each call
+        still does O(n) vectorized work: the mesh adjacency is rebuilt from
+        the triangles and the points are renumbered. Edits that leave a
+        degenerate triangulation are triangulated from scratch.
+
+        Args:
+            triangles: Triangles of the previous PointSet, as returned by
+                ``triangulate`` or ``update``.
+            added: ``(k, 2)`` coordinates of the new points.
+            removed: Indices of the previous points to remove.
+
+        Returns:
+            Triangles instance for the new PointSet.
+
+        Raises:
+            NonFiniteCoordinates: If an added coordinate is NaN or infinite.
+            IndexError: If a removed index is out of range.
+
+        """
+        old = triangles.pointset.coords
+        added = np.asarray(added, dtype=COORD_DTYPE).reshape(-1, 2)
+        if not np.isfinite(added).all():
+            raise NonFiniteCoordinates("PointSet has non-finite coordinates")
+        removed = np.unique(np.asarray(removed, dtype=np.int64))
+        if len(removed) and (removed[0] < 0 or removed[-1] >= len(old)):
+            raise IndexError("Removed point index out of range")
+
+        kept = np.ones(len(old) + len(added), dtype=bool)
+        kept[removed] = False
+        coords = np.concatenate([old, added])
+        pointset = PointSet(int(kept.sum()), coords[kept])
+        try:
+            simplices = Triangulator._edit(coords, triangles.indices,
+                                           removed, len(old))
+        except (ValueError, RuntimeError):
+            return Triangulator.triangulate(pointset)
+        # New index of each kept point: the number of kept points before it.
+        simplices = (np.cumsum(kept) - 1)[simplices]
+        return Triangles(pointset, len(simplices), simplices, trusted=True)
+
+    @staticmethod
+    def _edit(coords, simplices, removed, n_old):
+        """Remove and insert points in an existing triangulation.
+
+        Args:
+            coords: Previous coordinates followed by the added ones.
+            simplices: Previous triangles.
+            removed: Sorted indices of the previous points to remove.
+            n_old: Number of previous points.
+
+        Returns:
+            ``(m, 3)`` simplices indexing ``coords``.
+
+        Raises:
+            ValueError: If the previous triangulation is empty or invalid.
+            RuntimeError: If the edit leaves a degenerate triangulation.
+
+        """
+        mesh = delaunay.Mesh.from_simplices(coords, simplices)
+        # Duplicates are not vertices: one takes over a removed original.
+        orphans = np.ones(n_old, dtype=bool)
+        orphans[np.asarray(simplices).ravel()] = False
+        orphans[removed] = False
+        heirs = []
+        for v in removed.tolist():
+            if mesh.remove(v) and orphans.any():
+                same = orphans & (coords[:n_old] == coords[v]).all(axis=1)
+                if same.any():
+                    heir = int(np.argmax(same))
+                    orphans[heir] = False
+                    heirs.append(heir)
+        for v in heirs + list(range(n_old, len(coords))):
+            mesh.insert(v)
+        result = mesh.simplices()
+        if len(result) == 0:
+            raise RuntimeError("Degenerate triangulation")
+        return result
+
+
+def _start_executor():
+    """Start the TriangulationExecutor configured by TRIANGULATION_WORKERS.
+
+    Does nothing when no workers are configured or an executor runs
+    already.
+    """
+    workers = _env('TRIANGULATION_WORKERS', 0, int)
+    if workers and Triangulator.executor is None:
+        Triangulator.executor = TriangulationExecutor(
+            workers,
+            threshold=_env('TRIANGULATION_PROCESS_THRESHOLD', 50000, int),
+            max_pending=_env('TRIANGULATION_MAX_PENDING', None, int),
+            partition_threshold=_env('TRIANGULATION_PARTITION_THRESHOLD',
+                                     None, int),
+        )
+
+
+def init(warm_up=None):
+    """Initialize Flask application.
+
+    The triangulation backend is initialized according to ``warm_up``:
+    ``'eager'`` before returning, ``'background'`` in a daemon thread, or
+    ``'lazy'`` on the first readiness probe, which keeps importing this
+    module free of the backend import.
+
+    The executor worker processes import this module too; in processes
+    started by ``multiprocessing`` neither the executor nor the backend
+    is started here, or each worker would spawn and warm a pool of its
+    own. ASGI servers start them from the lifespan startup instead.
+
+    Args:
+        warm_up: Backend initialization mode, from TRIANGULATION_WARM_UP
+            by default.
 
     Returns:
         Flask app instance.
 
     """
     app = Flask(__name__)
+    store_dir = _env('TRIANGULATION_STORE_DIR', None)
+    if store_dir and Triangulator.store is None:
+        Triangulator.store = TriangulationStore(
+            store_dir,
+            max_bytes=_env('TRIANGULATION_STORE_BYTES', 1024 ** 3, int),
+        )
+    if parent_process() is not None:
+        return app
+    _start_executor()
+    if warm_up is None:
+        warm_up = _env('TRIANGULATION_WARM_UP', 'lazy')
+    if warm_up in ('eager', 'background'):
+        Triangulator.initialize(background=warm_up == 'background')
     return app
 
 
 app = init()
 
+# Encoded triangulations keyed by PointSetID, so that repeated requests skip
+# the upstream fetch, the triangulation and the encoding.
+result_cache = LRUCache(
+    _env('TRIANGULATION_CACHE_BYTES', 64 * 1024 * 1024, int),
+    ttl=_env('TRIANGULATION_CACHE_TTL', None, float),
+)
+
+# Concurrent requests for the same PointSetID share one fetch and one
+# triangulation.
+inflight = SingleFlight()
+
+
+def _counts(stats, **names):
+    """Pick counters out of a ``stats()`` dictionary, keyed by label value."""
+    return {label: stats[key] for label, key in names.items()}
+
+
+def _store_counts():
+    """Get the TriangulationStore lookups and writes, if a store is set."""
+    store = Triangulator.store
+    if store is None:
+        return None
+    return _counts(store.stats(), hit='hits', miss='misses', write='writes')
+
+
+def _executor_stat(key):
+    """Get a reader of an executor counter, None without an executor."""
+    def read():
+        executor = Triangulator.executor
+        return None if executor is None else executor.stats()[key]
+    return read
+
+
+# Counters the components keep themselves, read at each scrape.
+metrics.collected(
+    'triangulation_result_cache_total',
+    'Encoded triangulation cache lookups by result.', 'counter',
+    lambda: _counts(result_cache.stats(), hit='hits', miss='misses'),
+    label='result')
+metrics.collected(
+    'triangulation_result_cache_bytes',
+    'Size of the encoded triangulations in the cache.', 'gauge',
+    lambda: result_cache.stats()['bytes'])
+COALESCING = metrics.collected(
+    'triangulation_coalescing_total',
+    'Fetches and triangulations run, or shared with a concurrent request.',
+    'counter',
+    lambda: _counts(inflight.stats(), executed='calls',
+                    coalesced='coalesced'),
+    label='result')
+IN_FLIGHT = metrics.collected(
+    'triangulation_in_flight',
+    'Fetches and triangulations running.', 'gauge',
+    lambda: inflight.stats()['in_flight'])
+metrics.collected(
+    'triangulation_store_total',
+    'TriangulationStore lookups and writes.', 'counter', _store_counts,
+    label='result')
+metrics.collected(
+    'triangulation_executor_pending',
+    'Jobs queued or running in the worker processes.', 'gauge',
+    _executor_stat('pending'))
+metrics.collected(
+    'triangulation_executor_rejected_total',
+    'Jobs refused because the executor queue was full.', 'counter',
+    _executor_stat('rejected'))
+metrics.collected(
+    'pointset_manager_circuit_state',
+    'State of the PointSetManager circuit breaker, 1 for the current one.',
+    'gauge',
+    lambda: {state: int(PointSetManager.breaker.state == state)
+             for state in (CircuitBreaker.CLOSED, CircuitBreaker.OPEN,
+                           CircuitBreaker.HALF_OPEN)},
+    label='state')
+metrics.collected(
+    'pointset_manager_circuit_rejections_total',
+    'Retrievals refused while the circuit was open.', 'counter',
+    lambda: PointSetManager.breaker.stats()['rejections'])
+
+
+def _cache_when_sent(cache, key, chunks):
+    """Yield response chunks and cache the body once it is fully sent.
+
+    Collection stops as soon as the body cannot fit in the cache, so large
+    responses keep streaming with bounded memory.
+    """
+    parts = []
+    size = 0
+    for chunk in chunks:
+        if parts is not None:
+            size += len(chunk)
+            if size <= cache.max_bytes:
+                parts.append(chunk)
+            else:
+                parts = None
+        yield chunk
+    if parts is not None:
+        cache.put(key, b''.join(parts))
 
-@app.route('/triangulation/<pointSetId>', methods=['GET'])
-def triangulation(pointSetId):
-    """Get triangulation for a PointSet.
+
+# Content-Type of the /metrics exposition.
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Status and payload length preceding each record of a batch response.
+BATCH_RECORD = struct.Struct('<HI')
+
+# Upper bound on the size of a PointSet uploaded for triangulation.
+MAX_UPLOAD_BYTES = _env('TRIANGULATION_MAX_UPLOAD_BYTES', 64 * 1024 * 1024,
+                        int)
+
+# Upper bound on the number of PointSetIDs in one batch request.
+BATCH_MAX_IDS = _env('TRIANGULATION_BATCH_MAX_IDS', 1000, int)
+
+# Upper bound on the size of a batch request body.
+BATCH_MAX_BODY = 64 * BATCH_MAX_IDS + 1024
+
+# Threads fetching and triangulating the items of batch requests.
+batch_executor = ThreadPoolExecutor(
+    max_workers=_env('TRIANGULATION_BATCH_THREADS',
+                     PointSetManager.POOL_SIZE, int),
+    thread_name_prefix='batch',
+)
+
+
+# Response formats negotiated through the Accept header. The compact format
+# omits the echoed points when asked for with ``points=omit``.
+OCTET_STREAM = 'application/octet-stream'
+COMPACT = 'application/vnd.triangulator.compact'
+
+# Content codings negotiated through Accept-Encoding, by zlib window bits.
+CODINGS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+# zlib level of compressed responses; low levels favour throughput.
+COMPRESS_LEVEL = _env('TRIANGULATION_COMPRESS_LEVEL', 1, int)
+
+
+def _parse_accept(value):
+    """Parse an Accept or Accept-Encoding header.
+
+    Returns:
+        Dictionary mapping each lower-cased value to ``(q, params)``.
+
+    """
+    accepted = {}
+    for item in (value or '').split(','):
+        token, *params = (part.strip() for part in item.split(';'))
+        if not token:
+            continue
+        options = {}
+        for param in params:
+            name, _, param_value = param.partition('=')
+            options[name.strip().lower()] = param_value.strip().strip('"')
+        try:
+            q = float(options.pop('q', 1))
+        except ValueError:
+            q = 0.0
+        accepted[token.lower()] = (q, options)
+    return accepted
+
+
+def _negotiate(accept, accept_encoding):
+    """Choose the response format of a triangulation.
+
+    The plain format stays the default: the compact one is used only when
+    the client names it with a q-value at least that of the plain one.
+
+    Args:
+        accept: Accept header value, or None.
+        accept_encoding: Accept-Encoding header value, or None.
+
+    Returns:
+        Tuple ``(media_type, include_points, coding)`` where ``coding`` is
+        a key of CODINGS or None.
+
+    """
+    media_types = _parse_accept(accept)
+    q, options = media_types.get(COMPACT, (0.0, {}))
+    plain = max(media_types.get(t, (0.0, {}))[0]
+                for t in (OCTET_STREAM, 'application/*', '*/*'))
+    compact = q > 0 and q >= plain
+    include_points = not compact or options.get('points') != 'omit'
+
+    codings = _parse_accept(accept_encoding)
+    coding = max((c for c in CODINGS if codings.get(c, (0.0,))[0] > 0),
+                 key=lambda c: codings[c][0], default=None)
+    return (COMPACT if compact else OCTET_STREAM), include_points, coding
+
+
+def _response_headers(media_type, include_points, coding):
+    """Get the headers of a triangulation response in a negotiated format."""
+    headers = {
+        'Content-Type': media_type if include_points
+        else f'{media_type}; points=omit',
+        'Vary': 'Accept, Accept-Encoding',
+    }
+    if coding is not None:
+        headers['Content-Encoding'] = coding
+    return headers
+
+
+def _compress(chunks, coding):
+    """Compress a chunked body, yielding non-empty compressed chunks."""
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED,
+                                  CODINGS[coding])
+    for chunk in chunks:
+        chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def _timed_chunks(chunks, encode=0.0):
+    """Yield response chunks, timing their encoding and their writing.
+
+    Time spent producing the chunks is recorded as the encode stage, and
+    time spent by the server before asking for the next chunk as the write
+    stage.
+
+    Args:
+        chunks: Iterable of encoded chunks.
+        encode: Encoding time already spent before the first chunk.
+
+    """
+    clock = time.perf_counter
+    chunks = iter(chunks)
+    write = 0.0
+    try:
+        while True:
+            start = clock()
+            chunk = next(chunks, None)
+            resumed = clock()
+            encode += resumed - start
+            if chunk is None:
+                break
+            yield chunk
+            write += clock() - resumed
+    finally:
+        metrics.observe(STAGE_SECONDS, encode, 'encode')
+        metrics.observe(STAGE_SECONDS, write, 'write')
+
+
+def _encode_body(body, media_type, include_points, coding, cache_key=None):
+    """Encode a triangulation body in a negotiated format.
+
+    Args:
+        body: Binary triangulation, or an iterator over its chunks.
+        media_type: OCTET_STREAM or COMPACT.
+        include_points: Whether the compact format echoes the points.
+        coding: Key of CODINGS, or None.
+        cache_key: result_cache key under which to store a streamed plain
+            body once sent, or None.
+
+    Returns:
+        Encoded bytes, or an iterator over the encoded chunks.
+
+    """
+    if not isinstance(body, bytes) and cache_key is not None:
+        body = _cache_when_sent(result_cache, cache_key, body)
+    if media_type == COMPACT:
+        if not isinstance(body, bytes):
+            body = b''.join(body)
+        # Triangulation output is valid, which validate() only re-checks.
+        triangles = Triangles.from_binary(body)
+        triangles.trusted = True
+        body = triangles.to_compact(include_points)
+    if coding is None:
+        return body
+    if isinstance(body, bytes):
+        return zlib.compress(body, COMPRESS_LEVEL, CODINGS[coding])
+    return _compress(body, coding)
+
+
+class TriangulationError(Exception):
+    """Failure to triangulate a PointSet, with its HTTP status and code."""
+
+    def __init__(self, status, code, message):
+        """Initialize a TriangulationError.
+
+        Args:
+            status: HTTP status code.
+            code: Error code of the JSON error body.
+            message: Human readable message.
+
+        """
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+    def to_dict(self):
+        """Get the JSON error body."""
+        return {"code": self.code, "message": self.message}
+
+
+def _requested_backend(name):
+    """Validate the triangulation engine a client asked for.
+
+    Args:
+        name: Value of the ``backend`` query parameter, or None.
+
+    Returns:
+        The engine name or AUTO, None if the client did not ask for one.
+
+    Raises:
+        TriangulationError: If the engine is unknown or not installed.
+
+    """
+    if name is None or name == AUTO:
+        return name
+    engine = BACKENDS.get(name)
+    if engine is None:
+        raise TriangulationError(
+            400, "INVALID_BACKEND", f"Unknown triangulation backend: {name}; "
+            f"expected one of {', '.join([AUTO, *BACKENDS])}")
+    if not engine.available():
+        raise TriangulationError(400, "INVALID_BACKEND",
+                                 f"Triangulation backend not installed: {name}")
+    return name
+
+
+def _result_key(pointSetId, backend=None):
+    """Get the result_cache key of a PointSet triangulated by ``backend``."""
+    return pointSetId if backend is None else f"{pointSetId}?backend={backend}"
+
+
+def _triangulation_body(pointSetId, backend=None):
+    """Fetch and triangulate a PointSet, going through the caches.
 
     Args:
         pointSetId: UUID of the PointSet.
+        backend: Value of ``_requested_backend``.
 
     Returns:
-        Binary triangulation data or error response.
+        Cached binary triangulation, or an iterator over its chunks.
+
+    Raises:
+        TriangulationError: If the PointSet cannot be triangulated.
 
     """
     try:
         uuid.UUID(pointSetId)
     except ValueError:
-        return (
-            jsonify(
-                {
-                    "code": "INVALID_POINTSET_ID",
-                    "message": "Invalid PointSet ID format",
-                }
-            ),
-            400,
-        )
+        raise TriangulationError(400, "INVALID_POINTSET_ID",
+                                 "Invalid PointSet ID format") from None
+
+    cached = result_cache.get(_result_key(pointSetId, backend))
+    if cached is not None:
+        return cached
 
     try:
-        pointset = PointSetManager.retrieve(pointSetId)
+        pointset = inflight.do(('retrieve', pointSetId),
+                               PointSetManager.retrieve, pointSetId)
     except ConnectionError:
-        return (
-            jsonify(
-                {
-                    "code": "SERVICE_UNAVAILABLE",
-                    "message": "PointSetManager unavailable",
-                }
-            ),
-            503,
-        )
+        raise TriangulationError(503, "SERVICE_UNAVAILABLE",
+                                 "PointSetManager unavailable") from None
     except Exception as e:
-        return jsonify({"code": "INTERNAL_ERROR", "message": str(e)}), 500
+        raise TriangulationError(500, "INTERNAL_ERROR", str(e)) from e
 
     if pointset is None:
-        return (
-            jsonify(
-                {"code": "POINTSET_NOT_FOUND", "message": "PointSet not found"}
-            ),
-            404,
-        )
+        raise TriangulationError(404, "POINTSET_NOT_FOUND",
+                                 "PointSet not found")
+
+    return _triangles_body(_result_key(pointSetId, backend), pointset,
+                           backend)
 
+
+def _triangles_body(key, pointset, backend=None):
+    """Triangulate a PointSet and encode the Triangles.
+
+    Args:
+        key: Identifier under which concurrent triangulations coalesce.
+        pointset: PointSet to triangulate.
+        backend: Value of ``_requested_backend``.
+
+    Returns:
+        Iterator over the binary triangulation chunks.
+
+    Raises:
+        TriangulationError: If the triangulation fails.
+
+    """
+    metrics.observe(INPUT_POINTS, pointset.n_points)
     try:
-        triangles = Triangulator.triangulate(pointset)
-        return Response(triangles.to_binary(), mimetype='application/octet-stream')
+        with metrics.time(STAGE_SECONDS, 'compute'):
+            triangles = inflight.do(('triangulate', key),
+                                    Triangulator.triangulate, pointset,
+                                    backend)
+        body = triangles.iter_binary()
+    except NonFiniteCoordinates as e:
+        raise TriangulationError(400, "NON_FINITE_COORDINATES", str(e)) from e
+    except DegeneratePointSet as e:
+        raise TriangulationError(400, "DEGENERATE_POINTSET", str(e)) from e
+    except ExecutorSaturated as e:
+        raise TriangulationError(503, "SERVICE_UNAVAILABLE", str(e)) from e
     except Exception as e:
-        return jsonify({"code": "TRIANGULATION_FAILED", "message": str(e)}), 500
+        raise TriangulationError(500, "TRIANGULATION_FAILED", str(e)) from e
+
+    if body is None:
+        raise TriangulationError(500, "TRIANGULATION_FAILED",
+                                 "Triangulation produced invalid triangles")
+    return body
+
+
+def _batch_ids(payload):
+    """Get the PointSetIDs of a batch request body.
+
+    Returns:
+        List of IDs, or None if the body is malformed.
+
+    """
+    if not isinstance(payload, dict):
+        return None
+    ids = payload.get("pointSetIds")
+    if not isinstance(ids, list) or \
+            not all(isinstance(i, str) for i in ids):
+        return None
+    return ids
+
+
+def _error_response(status, code, message):
+    """Build a JSON error response, counting its code."""
+    metrics.inc(ERRORS, code)
+    return jsonify({"code": code, "message": message}), status
+
+
+def _binary_response(body, negotiated, cache_key=None):
+    """Build a triangulation response in a negotiated format.
+
+    Args:
+        body: Binary triangulation, or an iterator over its chunks.
+        negotiated: Value of ``_negotiate``.
+        cache_key: result_cache key under which to store a streamed plain
+            body once sent, or None.
+
+    Returns:
+        Response, streamed without Content-Length while still encoding.
+
+    """
+    start = time.perf_counter()
+    body = _encode_body(body, *negotiated, cache_key=cache_key)
+    headers = _response_headers(*negotiated)
+    if isinstance(body, bytes):
+        headers['Content-Length'] = str(len(body))
+        body = (body,)
+    return Response(_timed_chunks(body, time.perf_counter() - start),
+                    headers=headers)
+
+
+def _batch_record(status, payload):
+    """Encode one record of a batch response."""
+    return BATCH_RECORD.pack(status, len(payload)) + payload
+
+
+def _error_record(error):
+    """Encode a TriangulationError as a batch record."""
+    metrics.inc(ERRORS, error.code)
+    return _batch_record(error.status, json.dumps(error.to_dict()).encode())
+
+
+def _batch_item(pointSetId):
+    """Triangulate one item of a batch request.
+
+    Returns:
+        Encoded batch record.
+
+    """
+    try:
+        body = _triangulation_body(pointSetId)
+    except TriangulationError as e:
+        return _error_record(e)
+    if not isinstance(body, bytes):
+        body = b''.join(_cache_when_sent(result_cache, pointSetId, body))
+    return _batch_record(200, body)
+
+
+@app.route('/triangulation/<pointSetId>', methods=['GET'])
+def triangulation(pointSetId):
+    """Get triangulation for a PointSet.
+
+    Args:
+        pointSetId: UUID of the PointSet.
+
+    The response is a Triangles binary, or its compact representation
+    when the Accept header asks for COMPACT, compressed when
+    Accept-Encoding allows gzip or deflate. The optional ``backend`` query
+    parameter selects the triangulation engine, see ``backends``.
+
+    Returns:
+        Binary triangulation data or error response.
+
+    """
+    try:
+        backend = _requested_backend(request.args.get('backend'))
+        body = _triangulation_body(pointSetId, backend)
+    except TriangulationError as e:
+        return _error_response(e.status, e.code, e.message)
+
+    negotiated = _negotiate(request.headers.get('Accept'),
+                            request.headers.get('Accept-Encoding'))
+    return _binary_response(body, negotiated,
+                            cache_key=_result_key(pointSetId, backend))
+
+
+def _upload_key(pointset, backend=None):
+    """Get the coalescing key of an uploaded PointSet."""
+    return _result_key(pointset.digest() or uuid.uuid4().hex, backend)
+
+
+@app.route('/triangulation', methods=['POST'])
+def triangulation_upload():
+    """Get triangulation for a PointSet sent in the request body.
+
+    The body is a PointSet binary, parsed as it is received, of at most
+    MAX_UPLOAD_BYTES bytes. The response format and the ``backend``
+    query parameter are handled as for ``triangulation``.
+
+    Returns:
+        Binary triangulation data or error response.
+
+    """
+    max_points = (MAX_UPLOAD_BYTES - COUNT.size) // (2 * COORD_DTYPE.itemsize)
+    try:
+        backend = _requested_backend(request.args.get('backend'))
+    except TriangulationError as e:
+        return _error_response(e.status, e.code, e.message)
+    try:
+        if (request.content_length or 0) > MAX_UPLOAD_BYTES:
+            raise PayloadTooLarge(f"Body larger than {MAX_UPLOAD_BYTES} bytes")
+        pointset = PointSet.from_stream(request.stream, max_points)
+    except PayloadTooLarge as e:
+        return _error_response(413, "PAYLOAD_TOO_LARGE", str(e))
+    except ValueError as e:
+        return _error_response(400, "INVALID_POINTSET", str(e))
+
+    try:
+        body = _triangles_body(_upload_key(pointset, backend), pointset,
+                               backend)
+    except TriangulationError as e:
+        return _error_response(e.status, e.code, e.message)
+    negotiated = _negotiate(request.headers.get('Accept'),
+                            request.headers.get('Accept-Encoding'))
+    return _binary_response(body, negotiated)
+
+
+@app.route('/triangulation/batch', methods=['POST'])
+def triangulation_batch():
+    """Get triangulations for a list of PointSets.
+
+    The JSON body ``{"pointSetIds": [...]}``, of at most BATCH_MAX_BODY
+    bytes, lists up to BATCH_MAX_IDS IDs, fetched and triangulated
+    concurrently. The response is the ``<I``
+    record count followed by one record per ID, in request order: a
+    ``<HI`` header holding the HTTP status and the payload length, then
+    the payload, a Triangles binary for status 200 and a JSON error body
+    otherwise.
+
+    Returns:
+        Binary batch response or error response.
+
+    """
+    body = request.stream.read(BATCH_MAX_BODY + 1)
+    if len(body) > BATCH_MAX_BODY:
+        return _error_response(413, "BATCH_TOO_LARGE",
+                               f"At most {BATCH_MAX_IDS} pointSetIds")
+    try:
+        ids = _batch_ids(json.loads(body))
+    except ValueError:
+        ids = None
+    if ids is None:
+        return _error_response(400, "INVALID_BATCH",
+                               "Expected a JSON list of pointSetIds")
+    if len(ids) > BATCH_MAX_IDS:
+        return _error_response(413, "BATCH_TOO_LARGE",
+                               f"At most {BATCH_MAX_IDS} pointSetIds")
+
+    futures = [batch_executor.submit(_batch_item, i) for i in ids]
+
+    def records():
+        yield COUNT.pack(len(futures))
+        for future in futures:
+            yield future.result()
+
+    return Response(records(), mimetype='application/octet-stream')
+
+
+def _backends_body():
+    """Describe the triangulation engines clients can select."""
+    return {"default": Triangulator.backend,
+            "backends": [engine.describe() for engine in BACKENDS.values()]}
+
+
+@app.route('/backends', methods=['GET'])
+def backends():
+    """List the triangulation engines with their capabilities and costs.
+
+    Returns:
+        The configured default and the registered engines.
+
+    """
+    return jsonify(_backends_body())
+
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Get the readiness of the triangulation backend.
+
+    The first probe starts the initialization of a lazy backend.
+
+    Returns:
+        Backend state, with status 503 until the backend is ready.
+
+    """
+    state = Triangulator.initialize(background=True)
+    return jsonify(state.stats()), 200 if state.ready else 503
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Get the service metrics in the Prometheus text exposition format.
+
+    Returns:
+        Stage timing and input size histograms, and error counters.
+
+    """
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
 
 
 if __name__ == '__main__':
+    Triangulator.initialize()
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,58 @@
+"""Performance tests for the compact Triangles format against the plain one."""
+import time
+import zlib
+
+import numpy as np
+import pytest
+
+from main import COMPRESS_LEVEL, PointSet, Triangles, Triangulator
+
+N_POINTS = 200000
+
+rng = np.random.default_rng(19)
+side = int(np.sqrt(N_POINTS))
+INPUTS = {
+    "uniform": rng.uniform(-1000, 1000, size=(N_POINTS, 2)),
+    "grid": np.stack(np.meshgrid(np.arange(side), np.arange(side)),
+                     axis=-1).reshape(-1, 2) + rng.uniform(
+                         0, 0.1, size=(side * side, 2)),
+}
+
+
+def timed(fn, *args):
+    """Run a function, returning its result and duration in seconds."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+@pytest.mark.parametrize("name", INPUTS)
+def test_compact_size_and_throughput(name):
+    """Report sizes and encode/decode throughput of each format."""
+    coords = INPUTS[name]
+    triangles = Triangulator.triangulate(PointSet(len(coords), coords))
+    plain, plain_encode = timed(triangles.to_binary)
+    _, plain_decode = timed(Triangles.from_binary, plain)
+    print(f"\n{name}: {triangles.n_triangles} triangles, plain "
+          f"{len(plain)} bytes, encode {plain_encode:.4f}s, "
+          f"decode {plain_decode:.4f}s")
+
+    for include_points in (True, False):
+        compact, encode = timed(triangles.to_compact, include_points)
+        decoded, decode = timed(Triangles.from_compact, compact,
+                                triangles.pointset)
+        assert decoded == triangles
+        # Smaller than the plain binary, or without the points than its
+        # triangle block alone.
+        assert len(compact) < len(plain) - (
+            0 if include_points else 8 * triangles.pointset.n_points)
+        compressed, compress = timed(zlib.compress, compact, COMPRESS_LEVEL)
+        print(f"compact points={include_points}: "
+              f"ratio {len(compact) / len(plain):.3f}, "
+              f"encode {len(plain) / encode / 1e6:.0f} MB/s, "
+              f"decode {len(plain) / decode / 1e6:.0f} MB/s, "
+              f"deflate ratio {len(compressed) / len(plain):.3f} "
+              f"in {compress:.4f}s")
+    compressed, compress = timed(zlib.compress, plain, COMPRESS_LEVEL)
+    print(f"plain deflate ratio {len(compressed) / len(plain):.3f} "
+          f"in {compress:.4f}s")
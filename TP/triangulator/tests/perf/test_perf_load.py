@@ -0,0 +1,31 @@
+"""Load tests of the service processes against the PointSetManager stand-in."""
+import pytest
+
+import loadtest
+
+DURATION = 2.0
+LEVELS = (1, 4)
+
+
+@pytest.mark.parametrize("front_end", loadtest.FRONT_ENDS)
+def test_concurrency_sweep(front_end):
+    """Report throughput and latency of a short sweep of each front end."""
+    with loadtest.StandInPointSetManager(latency=0.002) as stand_in:
+        ids = loadtest.populate(stand_in, 50, sizes=(1000, 10000))
+        process, url = loadtest.start_service(stand_in.url, front_end)
+        try:
+            reports = []
+            for level in LEVELS:
+                records, elapsed = loadtest.run_closed(url, ids, level,
+                                                       DURATION)
+                reports.append(loadtest.summarize(records, elapsed, level))
+        finally:
+            loadtest.stop_service(process)
+    print()
+    print(loadtest.format_header())
+    for report in reports:
+        print(loadtest.format_report(report))
+    capacity, saturated = loadtest.saturation(reports)
+    print(loadtest.format_saturation(capacity, saturated))
+    assert all(report['errors'] == {} for report in reports)
+    assert capacity is not None
@@ -0,0 +1,32 @@
+"""Performance tests for the metrics recorded on the request hot path."""
+import time
+
+from main import ERRORS, STAGE_SECONDS, Metrics
+
+N_CALLS = 100000
+
+
+def test_observe_overhead():
+    """Test recording a stage timing costs a few microseconds."""
+    registry = Metrics()
+    seconds = registry.histogram(STAGE_SECONDS, 'Stage times.',
+                                 (0.001, 0.01, 0.1, 1), label='stage')
+    start = time.perf_counter()
+    for _ in range(N_CALLS):
+        with registry.time(seconds, 'compute'):
+            pass
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed / N_CALLS * 1e6:.2f}us per timed block")
+    assert elapsed / N_CALLS < 1e-4
+
+
+def test_inc_overhead():
+    """Test incrementing a counter costs about a microsecond."""
+    registry = Metrics()
+    errors = registry.counter(ERRORS, 'Errors.', label='code')
+    start = time.perf_counter()
+    for _ in range(N_CALLS):
+        registry.inc(errors, 'BENCHMARK')
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed / N_CALLS * 1e6:.2f}us per increment")
+    assert elapsed / N_CALLS < 1e-4
@@ -0,0 +1,33 @@
+"""Performance tests for partitioned triangulation, from 1 to N workers."""
+import os
+import time
+
+import numpy as np
+
+from main import TriangulationExecutor, _delaunay
+
+N_POINTS = 100000
+
+rng = np.random.default_rng(17)
+coords = np.unique(rng.uniform(-1000, 1000, size=(N_POINTS, 2))
+                   .astype(np.float32), axis=0)
+
+
+def test_partitioned_scaling():
+    """Time one Delaunay call, then strips over 2 to N worker processes."""
+    start = time.perf_counter()
+    expected = len(_delaunay(coords))
+    print(f"1 worker: {time.perf_counter() - start:.3f}s")
+
+    for workers in range(2, max(2, os.cpu_count() or 1) + 1):
+        executor = TriangulationExecutor(workers, threshold=0,
+                                         partition_threshold=0)
+        try:
+            executor.warm_up()
+            start = time.perf_counter()
+            simplices = executor.run(coords)
+            print(f"{workers} workers: {time.perf_counter() - start:.3f}s")
+        finally:
+            executor.shutdown()
+        assert len(simplices) == expected
+        assert executor.partition_fallbacks == 0
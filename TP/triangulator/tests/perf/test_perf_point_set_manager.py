@@ -0,0 +1,134 @@
+"""Performance tests for PointSetManager retrieval."""
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import requests
+
+import bench
+import loadtest
+from main import PointSet, PointSetManager
+
+RETRIEVALS = 200
+
+pointset = PointSet(
+    1000, [[float(i), float(i % 17)] for i in range(1000)]
+)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serve GET /pointset/<id> like a local PointSetManager."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    body = pointset.to_binary()
+
+    def setup(self):
+        """Count the connections the clients opened."""
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        """Answer every retrieval with the same PointSet."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        """Keep the benchmark output quiet."""
+
+
+def start_stand_in():
+    """Start the stand-in PointSetManager on a free local port."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_retrieve_pooled_session_against_stand_in():
+    """Compare per-request overhead of a new connection and the pool.
+
+    The pooled retrievals must share one session and one connection; the
+    timings are informational.
+    """
+    server = start_stand_in()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        start = time.perf_counter()
+        for _ in range(RETRIEVALS):
+            response = requests.get(f"{base_url}/pointset/some-id")
+            assert PointSet.from_binary(response.content) == pointset
+        unpooled = (time.perf_counter() - start) / RETRIEVALS
+        assert server.connections == RETRIEVALS
+
+        PointSetManager.close()
+        original_url = PointSetManager.BASE_URL
+        PointSetManager.BASE_URL = base_url
+        try:
+            PointSetManager.retrieve("some-id")  # open the connection
+            session = PointSetManager.session()
+            # The adapter of create_session, retrying unavailable answers.
+            assert 503 in session.get_adapter(base_url).max_retries \
+                .status_forcelist
+            server.connections = 0
+            start = time.perf_counter()
+            for _ in range(RETRIEVALS):
+                assert PointSetManager.retrieve("some-id") == pointset
+            pooled = (time.perf_counter() - start) / RETRIEVALS
+            assert PointSetManager.session() is session
+            assert server.connections == 0
+        finally:
+            PointSetManager.BASE_URL = original_url
+            PointSetManager.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"new connection: {unpooled * 1e6:.0f} us/request, "
+          f"pooled: {pooled * 1e6:.0f} us/request")
+
+
+LARGE_POINTS = 1000000
+
+
+def test_streamed_retrieval_peak_memory():
+    """Compare peak memory of buffered and streamed decoding of a body."""
+    large = PointSet(LARGE_POINTS, bench.generate('uniform', LARGE_POINTS))
+    points_bytes = 8 * LARGE_POINTS
+    with loadtest.StandInPointSetManager(etags=False) as stand_in:
+        point_set_id = stand_in.register(large.to_binary())
+        url = f"{stand_in.url}/pointset/{point_set_id}"
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        assert PointSet.from_binary(requests.get(url).content) == large
+        buffered = time.perf_counter() - start
+        _, buffered_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        PointSetManager.close()
+        PointSetManager.reset()
+        tracemalloc.start()
+        try:
+            with patch.object(PointSetManager, 'BASE_URL', stand_in.url):
+                start = time.perf_counter()
+                assert PointSetManager.retrieve(point_set_id) == large
+                streamed = time.perf_counter() - start
+            _, streamed_peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            PointSetManager.close()
+            PointSetManager.reset()
+
+    print(f"buffered: {buffered * 1e3:.1f} ms, "
+          f"peak {buffered_peak / points_bytes:.2f}x the points; "
+          f"streamed: {streamed * 1e3:.1f} ms, "
+          f"peak {streamed_peak / points_bytes:.2f}x the points")
+    assert streamed_peak < 1.5 * points_bytes
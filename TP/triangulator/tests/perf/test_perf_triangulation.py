@@ -1,34 +1,39 @@
-"""Performance tests for triangulation."""
-import time
-from random import randint
+"""Benchmarks of the triangulation, run through ``bench``.
 
-from main import PointSet, Triangles, Triangulator
+Set TRIANGULATION_BENCH_BASELINE to a baseline saved by ``bench.py --save``
+to fail on regressions. Larger sizes, up to 10^7 points, are left to
+``python bench.py --sizes full``, and the full engine matrix to
+``python bench.py --stages triangulate --backends all``.
+"""
+import pytest
 
-fifty_points_pointset = PointSet(
-    50,
-    [
-        [randint(-50, 50).__float__(), randint(-50, 50).__float__()]
-        for _ in range(50)
-    ],
-)
+import bench
+from main import BACKENDS
 
+SIZES = (10, 1000, 10000)
+# Size of the engine comparison, small enough for the native engine.
+MATRIX_POINTS = 1000
 
-def test_triangulate_three_points_pointset():
-    """Test triangulation performance for 3 points."""
-    start = time.time()
-    pointset = PointSet(3, [[1.0, 2.0], [1.0, 6.0], [4.0, 4.0]])
 
-    triangles = Triangulator.triangulate(pointset)
-    end = time.time()
-    print(end - start)
-    assert triangles.n_triangles == 1
-    assert len(triangles.triangles) == 1
-    assert set(triangles.triangles[0]) == {0, 1, 2}
+@pytest.mark.parametrize("kind", bench.KINDS)
+@pytest.mark.parametrize("n_points", SIZES)
+def test_triangulate(kind, n_points):
+    """Benchmark the triangulation of a generated point set."""
+    result = bench.run_case('triangulate', kind, n_points, repeat=5,
+                            max_seconds=2.0)
+    print(bench.format_result(result))
+    assert len(result['samples']) >= 3
+    assert result['points_per_s'] > 0
+    bench.assert_no_regression(result)
 
-def test_triangulate_fifty_points_pointset():
-    """Test triangulation performance for 50 points."""
-    start = time.time()
-    triangles = Triangulator.triangulate(fifty_points_pointset)
-    end = time.time()
-    print(end - start)
-    assert triangles is not None
\ No newline at end of file
+
+@pytest.mark.parametrize("kind", bench.KINDS)
+@pytest.mark.parametrize("backend", [
+    name for name, engine in BACKENDS.items() if engine.available()])
+def test_backend_matrix(kind, backend):
+    """Benchmark each installed engine on every input family."""
+    result = bench.run_case('triangulate', kind, MATRIX_POINTS, repeat=5,
+                            max_seconds=2.0, backend=backend)
+    print(bench.format_result(result))
+    assert len(result['samples']) >= 3
+    bench.assert_no_regression(result)
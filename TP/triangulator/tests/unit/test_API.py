@@ -1,9 +1,16 @@
 """Tests for the PointSetManager API client."""
+import asyncio
+import json
 import struct
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from main import PointSetManager, PointSet, app
+import httpx
+import requests
+
+import asgi
+import main
+from main import PointSet, PointSetManager, Triangles, app, result_cache
 
 
 class PointSetManagerAPIClient:
@@ -45,6 +52,12 @@ class TestAPI(unittest.TestCase):
     def setUp(self):
         self.app = app.test_client()
         self.app.testing = True
+        result_cache.clear()
+        PointSetManager.reset()
+
+    def tearDown(self):
+        result_cache.clear()
+        PointSetManager.reset()
 
     @patch.object(PointSetManagerAPIClient, 'create_pointset')
     def test_create_pointset_success(self, mock_create):
@@ -173,17 +186,52 @@ class TestAPI(unittest.TestCase):
         assert response["status_code"] == 503
         assert response["code"] == "SERVICE_UNAVAILABLE"
 
-    @patch('requests.get')
-    def test_pointset_manager_retrieve_500(self, mock_get):
+    @patch('main.PointSetManager.session')
+    def test_pointset_manager_retrieve_500(self, mock_session):
         """Cover lines 179-191: Status code not 200/404"""
         mock_response = MagicMock()
         mock_response.status_code = 500
-        mock_get.return_value = mock_response
+        mock_session.return_value.get.return_value = mock_response
 
         with self.assertRaises(Exception) as cm:
             PointSetManager.retrieve("some-id")
         self.assertIn("PointSetManager returned 500", str(cm.exception))
 
+    @patch('main.PointSetManager.session')
+    def test_pointset_manager_retrieve_uses_timeouts(self, mock_session):
+        """Test retrieval goes through the pooled session with timeouts."""
+        mock_response = MagicMock()
+        mock_response.status_code = 404
+        mock_session.return_value.get.return_value = mock_response
+
+        self.assertIsNone(PointSetManager.retrieve("some-id"))
+        mock_session.return_value.get.assert_called_once_with(
+            f"{PointSetManager.BASE_URL}/pointset/some-id",
+            timeout=(PointSetManager.CONNECT_TIMEOUT,
+                     PointSetManager.READ_TIMEOUT),
+            stream=True,
+        )
+
+    @patch('main.PointSetManager.session')
+    def test_pointset_manager_retrieve_connection_error(self, mock_session):
+        """Test transport errors surface as ConnectionError."""
+        mock_session.return_value.get.side_effect = requests.ConnectionError()
+        with self.assertRaises(ConnectionError):
+            PointSetManager.retrieve("some-id")
+
+    def test_pointset_manager_session_is_shared(self):
+        """Test the pooled session is created once and configured."""
+        PointSetManager.close()
+        try:
+            session = PointSetManager.session()
+            self.assertIs(PointSetManager.session(), session)
+            adapter = session.get_adapter(PointSetManager.BASE_URL)
+            self.assertEqual(adapter.max_retries.total,
+                             PointSetManager.MAX_RETRIES)
+            self.assertEqual(adapter._pool_maxsize, PointSetManager.POOL_SIZE)
+        finally:
+            PointSetManager.close()
+
     def test_route_invalid_uuid(self):
         """Cover lines 249-250: ValueError on UUID"""
         response = self.app.get('/triangulation/not-a-uuid')
@@ -224,3 +272,133 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 500)
         self.assertEqual(response.json['code'], "TRIANGULATION_FAILED")
 
+
+    @patch('main.PointSetManager.retrieve')
+    def test_route_streams_triangles(self, mock_retrieve):
+        """Test the triangulation is streamed with the exact binary layout."""
+        pointset = PointSet(4, [[0, 0], [1, 0], [0, 1], [1, 1]])
+        mock_retrieve.return_value = pointset
+        response = self.app.get('/triangulation/123e4567-e89b-12d3-a456-426614174000')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertIsNone(response.content_length)
+        triangles = Triangles.from_binary(response.data)
+        self.assertEqual(triangles.pointset, pointset)
+        self.assertEqual(triangles.n_triangles, 2)
+
+    @patch('main.PointSetManager.retrieve')
+    @patch('main.Triangulator.triangulate')
+    def test_route_invalid_triangles(self, mock_triangulate, mock_retrieve):
+        """Test invalid triangles are reported instead of an empty body."""
+        pointset = PointSet(3, [[0, 0], [1, 0], [0, 1]])
+        mock_retrieve.return_value = pointset
+        mock_triangulate.return_value = Triangles(pointset, 1, [[0, 1, 5]])
+        response = self.app.get('/triangulation/123e4567-e89b-12d3-a456-426614174000')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json['code'], "TRIANGULATION_FAILED")
+
+    def test_route_wrong_method(self):
+        """Test a path served for another method answers 405."""
+        response = self.app.get('/triangulation')
+        self.assertEqual(response.status_code, 405)
+        allowed = [m.strip() for m in response.headers['Allow'].split(',')]
+        self.assertIn('POST', allowed)
+        self.assertNotIn('GET', allowed)
+
+    @patch('main.PointSetManager.retrieve')
+    def test_route_serves_cached_triangulation(self, mock_retrieve):
+        """Test a repeated request is served from the result cache."""
+        mock_retrieve.return_value = PointSet(4, [[0, 0], [1, 0], [0, 1], [1, 1]])
+        url = '/triangulation/123e4567-e89b-12d3-a456-426614174000'
+        first = self.app.get(url).data
+        hits = result_cache.hits
+        with patch('main.Triangulator.triangulate') as mock_triangulate:
+            second = self.app.get(url)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data, first)
+        self.assertEqual(result_cache.hits, hits + 1)
+        mock_retrieve.assert_called_once()
+        mock_triangulate.assert_not_called()
+
+    @patch('main.PointSetManager.retrieve')
+    def test_route_does_not_cache_errors(self, mock_retrieve):
+        """Test error responses are not cached."""
+        mock_retrieve.return_value = None
+        url = '/triangulation/123e4567-e89b-12d3-a456-426614174000'
+        self.app.get(url)
+        self.app.get(url)
+        self.assertEqual(mock_retrieve.call_count, 2)
+        self.assertEqual(len(result_cache), 0)
+
+
+class AsgiTestResponse:
+    """Expose an httpx response like a Flask test response."""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.data = response.content
+        self.content_length = (int(response.headers['content-length'])
+                               if 'content-length' in response.headers
+                               else None)
+        self.is_streamed = self.content_length is None
+        self.headers = response.headers
+
+    @property
+    def json(self):
+        return json.loads(self.data)
+
+
+class AsgiTestClient:
+    """Synchronous test client for the ASGI front end."""
+
+    def __init__(self, application):
+        self.application = application
+
+    def get(self, url):
+        return asyncio.run(self._get(url))
+
+    async def _get(self, url):
+        transport = httpx.ASGITransport(app=self.application)
+        async with httpx.AsyncClient(transport=transport,
+                                     base_url="http://testserver") as client:
+            return AsgiTestResponse(await client.get(url))
+
+
+unpatched_retrieve = asgi.retrieve
+
+
+async def retrieve_through_main(point_set_id):
+    """Delegate the async fetch to the (patched) synchronous retrieve."""
+    return main.PointSetManager.retrieve(point_set_id)
+
+
+class TestAPIAsgi(TestAPI):
+    """Run the API scenarios against the ASGI front end."""
+
+    def setUp(self):
+        super().setUp()
+        self.app = AsgiTestClient(asgi.app)
+        patcher = patch('asgi.retrieve', new=retrieve_through_main)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_route_unknown_path(self):
+        """Test paths outside the API are not found."""
+        response = self.app.get('/unknown')
+        self.assertEqual(response.status_code, 404)
+
+    @patch('asgi.client')
+    def test_retrieve_connection_error(self, mock_client):
+        """Test upstream transport errors surface as ConnectionError."""
+        mock_client.return_value.send = AsyncMock(
+            side_effect=httpx.ConnectError("refused"))
+        with self.assertRaises(ConnectionError):
+            asyncio.run(unpatched_retrieve("some-id"))
+
+    @patch('asgi.client')
+    def test_retrieve_parses_pointset(self, mock_client):
+        """Test the async fetch decodes the upstream body."""
+        pointset = PointSet(3, [[0, 0], [1, 0], [0, 1]])
+        mock_client.return_value.send = AsyncMock(return_value=httpx.Response(
+            200, content=pointset.to_binary()))
+        self.assertEqual(asyncio.run(unpatched_retrieve("some-id")), pointset)
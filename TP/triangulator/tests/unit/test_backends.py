@@ -0,0 +1,235 @@
+"""Tests for the triangulation backend registry and its selection."""
+import asyncio
+import contextlib
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import numpy as np
+import pytest
+
+import asgi
+from main import (
+    AUTO,
+    BACKENDS,
+    NATIVE,
+    SCIPY,
+    TRIANGLE,
+    Backend,
+    PointSet,
+    Triangles,
+    TriangulationStore,
+    Triangulator,
+    _delaunay,
+    app,
+    register_backend,
+    result_cache,
+    select_backend,
+)
+
+POINT_SET_ID = "123e4567-e89b-12d3-a456-426614174025"
+
+pointset = PointSet(50, np.random.default_rng(25).uniform(-1, 1, (50, 2)))
+
+
+def triangle_set(simplices):
+    """Get the triangles of simplices, whatever their vertex order."""
+    return {frozenset(t) for t in np.asarray(simplices).tolist()}
+
+
+@pytest.fixture(autouse=True)
+def clear_result_cache():
+    """Keep cached triangulations from leaking between tests."""
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+
+def test_registry_declares_capabilities():
+    """Test the built-in engines describe their capabilities and costs."""
+    assert {SCIPY, NATIVE, TRIANGLE} <= set(BACKENDS)
+    native = BACKENDS[NATIVE].describe()
+    assert native["available"] and native["exact"]
+    assert native["max_points"] > 0
+    assert BACKENDS[SCIPY].cost(1000) < BACKENDS[NATIVE].cost(1000)
+
+def test_auto_reserved():
+    """Test no engine can take the name of the selection policy."""
+    with pytest.raises(ValueError):
+        register_backend(Backend(AUTO, _delaunay))
+
+def test_select_explicit_backend():
+    """Test a named engine is used as is, an unknown one refused."""
+    assert select_backend(10**9, NATIVE) == NATIVE
+    with pytest.raises(ValueError, match="bogus"):
+        select_backend(10, 'bogus')
+
+def test_auto_picks_the_cheapest_available_backend():
+    """Test the policy compares costs among installed engines."""
+    fast = Backend('fast', _delaunay, overhead=1.0, per_point=0.0)
+    missing = Backend('missing', _delaunay, module='no_such_module_025')
+    with patch.dict(BACKENDS, {'fast': fast, 'missing': missing}):
+        assert select_backend(10) == SCIPY
+        assert select_backend(10**6) == 'fast'
+        with patch.object(fast, 'max_points', 1000):
+            assert select_backend(10**6) == SCIPY
+
+def test_auto_skips_unmeasured_backends():
+    """Test engines without measured costs are only used by name."""
+    with patch.object(BACKENDS[TRIANGLE], '_available', True):
+        assert not BACKENDS[TRIANGLE].measured
+        assert TRIANGLE not in {select_backend(n) for n in (10, 10**7)}
+        assert select_backend(10, TRIANGLE) == TRIANGLE
+
+def test_auto_without_scipy_uses_native():
+    """Test the policy falls back to the dependency-free engine."""
+    with patch.object(BACKENDS[SCIPY], '_available', False), \
+            patch.object(BACKENDS[TRIANGLE], '_available', False):
+        assert select_backend(10) == NATIVE
+        assert select_backend(10**6) == NATIVE
+
+@pytest.mark.parametrize("name", [SCIPY, NATIVE, AUTO])
+def test_backends_agree(name):
+    """Test each engine gives the Delaunay triangulation."""
+    expected = Triangulator.triangulate(pointset, SCIPY).indices
+    triangles = Triangulator.triangulate(pointset, name)
+    assert triangle_set(triangles.indices) == triangle_set(expected)
+
+def test_triangle_backend_agrees_with_scipy():
+    """Test the optional compiled engine, when installed."""
+    pytest.importorskip('triangle')
+    coords = pointset.coords
+    assert triangle_set(_delaunay(coords, TRIANGLE)) == \
+        triangle_set(_delaunay(coords, SCIPY))
+
+def test_requested_backend_is_used():
+    """Test a requested engine overrides the configured policy."""
+    with patch.object(BACKENDS[NATIVE], 'engine',
+                      wraps=BACKENDS[NATIVE].engine) as engine:
+        Triangulator.triangulate(pointset)
+        engine.assert_not_called()
+        Triangulator.triangulate(pointset, NATIVE)
+        engine.assert_called_once()
+
+def test_stored_results_are_kept_per_backend(tmp_path):
+    """Test a stored triangulation only answers the engine that made it."""
+    with patch.object(Triangulator, 'store',
+                      TriangulationStore(str(tmp_path))):
+        Triangulator.triangulate(pointset)
+        with patch('main._delaunay', wraps=_delaunay) as mock_delaunay:
+            Triangulator.triangulate(pointset)
+            mock_delaunay.assert_not_called()
+            Triangulator.triangulate(pointset, NATIVE)
+            Triangulator.triangulate(pointset, NATIVE)
+        assert mock_delaunay.call_count == 1
+        assert mock_delaunay.call_args.args[1] == NATIVE
+
+
+async def asgi_request(method, path, content=None):
+    """Send a request to the ASGI front end."""
+    transport = httpx.ASGITransport(app=asgi.app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://testserver") as client:
+        return await client.request(method, path, content=content)
+
+
+def flask_request(method, path, content=None):
+    """Send a request to the Flask front end."""
+    response = app.test_client().open(path, method=method, data=content)
+    return response.status_code, response.get_json(silent=True), \
+        response.data
+
+
+def send(front_end, method, path, content=None):
+    """Send a request to a front end.
+
+    Returns:
+        Tuple ``(status, json, body)``.
+
+    """
+    if front_end == 'flask':
+        return flask_request(method, path, content)
+    response = asyncio.run(asgi_request(method, path, content))
+    try:
+        payload = response.json()
+    except ValueError:
+        payload = None
+    return response.status_code, payload, response.content
+
+
+@contextlib.contextmanager
+def upstream(result=pointset):
+    """Serve a PointSet from the retrieval of both front ends."""
+    with patch('main.PointSetManager.retrieve', return_value=result) as blocking, \
+            patch('asgi.retrieve', AsyncMock(return_value=result)) as async_:
+        yield blocking, async_
+
+
+@pytest.fixture(params=['flask', 'asgi'])
+def front_end(request):
+    """Run each test against both front ends."""
+    return request.param
+
+
+def test_backends_route_lists_engines(front_end):
+    """Test clients can discover the engines they may select."""
+    status, payload, _ = send(front_end, 'GET', '/backends')
+    assert status == 200
+    assert payload["default"] == Triangulator.backend
+    names = [b["name"] for b in payload["backends"]]
+    assert names[:2] == [SCIPY, NATIVE]
+
+@pytest.mark.parametrize("path", [
+    f"/triangulation/{POINT_SET_ID}?backend={NATIVE}",
+    f"/triangulation?backend={NATIVE}",
+])
+def test_query_parameter_selects_the_backend(front_end, path):
+    """Test both routes triangulate with the requested engine."""
+    method = 'GET' if POINT_SET_ID in path else 'POST'
+    content = None if method == 'GET' else pointset.to_binary()
+    with upstream(), patch('main._delaunay', wraps=_delaunay) as mock_delaunay:
+        status, _, body = send(front_end, method, path, content)
+    assert status == 200
+    assert mock_delaunay.call_args.args[1] == NATIVE
+    assert Triangles.from_binary(body).n_triangles == \
+        Triangulator.triangulate(pointset).n_triangles
+
+def test_results_are_cached_per_backend(front_end):
+    """Test a cached default triangulation does not answer an override."""
+    path = f"/triangulation/{POINT_SET_ID}"
+    with upstream(), patch('main._delaunay', wraps=_delaunay) as mock_delaunay:
+        for _ in range(2):
+            assert send(front_end, 'GET', path)[0] == 200
+            assert send(front_end, 'GET',
+                        f"{path}?backend={NATIVE}")[0] == 200
+    assert [c.args[1] for c in mock_delaunay.call_args_list] == \
+        [select_backend(50), NATIVE]
+
+@pytest.mark.parametrize("method", ['GET', 'POST'])
+def test_unknown_backend_is_rejected(front_end, method):
+    """Test an unknown engine is a client error, before any work."""
+    path = (f"/triangulation/{POINT_SET_ID}" if method == 'GET'
+            else "/triangulation")
+    with upstream() as retrievals:
+        status, payload, _ = send(front_end, method, f"{path}?backend=bogus",
+                                  pointset.to_binary())
+    assert status == 400
+    assert payload["code"] == "INVALID_BACKEND"
+    for retrieve in retrievals:
+        retrieve.assert_not_called()
+
+def test_missing_backend_is_rejected(front_end):
+    """Test an engine that is not installed cannot be requested."""
+    with patch.object(BACKENDS[TRIANGLE], '_available', False):
+        status, payload, _ = send(
+            front_end, 'GET',
+            f"/triangulation/{POINT_SET_ID}?backend={TRIANGLE}")
+    assert status == 400
+    assert payload["code"] == "INVALID_BACKEND"
+    assert "not installed" in payload["message"]
+
+def test_masked_module_is_not_remembered():
+    """Test an engine masked for a while is available again afterwards."""
+    engine = Backend('masked', _delaunay, module='json')
+    with patch.dict('sys.modules', {'json': None}):
+        assert not engine.available()
+    assert engine.available()
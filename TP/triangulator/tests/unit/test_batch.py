@@ -0,0 +1,137 @@
+"""Tests for the batch triangulation endpoint."""
+import asyncio
+import json
+import struct
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+import asgi
+from main import PointSet, Triangles, app, result_cache
+
+IDS = [
+    "123e4567-e89b-12d3-a456-426614174000",
+    "123e4567-e89b-12d3-a456-426614174001",
+    "123e4567-e89b-12d3-a456-426614174002",
+]
+
+POINTSETS = {
+    IDS[0]: PointSet(4, [[0, 0], [1, 0], [0, 1], [1, 1]]),
+    IDS[1]: PointSet(3, [[0, 0], [2, 0], [0, 2]]),
+}
+
+
+def fake_retrieve(point_set_id):
+    """Serve the PointSets above, failing for the third ID."""
+    if point_set_id == IDS[2]:
+        raise ConnectionError("PointSetManager unavailable")
+    return POINTSETS.get(point_set_id)
+
+
+async def fake_async_retrieve(point_set_id):
+    """Asynchronous variant of fake_retrieve."""
+    return fake_retrieve(point_set_id)
+
+
+def parse_batch(data):
+    """Decode a batch response into ``(status, payload)`` records."""
+    (count,) = struct.unpack_from('<I', data)
+    offset = 4
+    records = []
+    for _ in range(count):
+        status, length = struct.unpack_from('<HI', data, offset)
+        offset += 6
+        records.append((status, data[offset:offset + length]))
+        offset += length
+    assert offset == len(data)
+    return records
+
+
+def flask_post(path, body):
+    """POST a body to the Flask app."""
+    response = app.test_client().post(path, data=body,
+                                      content_type='application/json')
+    return response.status_code, response.data
+
+
+async def _asgi_post(path, body):
+    transport = httpx.ASGITransport(app=asgi.app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://testserver") as client:
+        response = await client.post(path, content=body)
+        return response.status_code, response.content
+
+
+def asgi_post(path, body):
+    """POST a body to the ASGI app."""
+    return asyncio.run(_asgi_post(path, body))
+
+
+@pytest.fixture(params=['flask', 'asgi'])
+def post(request):
+    """Run each test against both front ends."""
+    result_cache.clear()
+    with patch('main.PointSetManager.retrieve', side_effect=fake_retrieve), \
+            patch('asgi.retrieve', new=fake_async_retrieve):
+        yield flask_post if request.param == 'flask' else asgi_post
+    result_cache.clear()
+
+
+def test_batch_returns_records_in_request_order(post):
+    """Test each ID gets its record, successes and errors alike."""
+    ids = [IDS[1], "not-a-uuid", IDS[0], IDS[2],
+           "123e4567-e89b-12d3-a456-426614174999"]
+    status, data = post('/triangulation/batch',
+                        json.dumps({"pointSetIds": ids}))
+    assert status == 200
+    records = parse_batch(data)
+    assert [s for s, _ in records] == [200, 400, 200, 503, 404]
+    assert Triangles.from_binary(records[0][1]).n_triangles == 1
+    assert Triangles.from_binary(records[2][1]).n_triangles == 2
+    assert json.loads(records[1][1])["code"] == "INVALID_POINTSET_ID"
+    assert json.loads(records[3][1])["code"] == "SERVICE_UNAVAILABLE"
+    assert json.loads(records[4][1])["code"] == "POINTSET_NOT_FOUND"
+
+def test_batch_matches_single_requests(post):
+    """Test batch payloads are the single-request response bodies."""
+    _, data = post('/triangulation/batch',
+                   json.dumps({"pointSetIds": IDS[:2]}))
+    for (status, payload), point_set_id in zip(parse_batch(data), IDS[:2],
+                                               strict=True):
+        assert status == 200
+        assert payload == result_cache.get(point_set_id)
+
+def test_empty_batch(post):
+    """Test an empty batch has no records."""
+    status, data = post('/triangulation/batch', '{"pointSetIds": []}')
+    assert status == 200
+    assert parse_batch(data) == []
+
+@pytest.mark.parametrize("body", [
+    'not json', '[]', '{"ids": []}', '{"pointSetIds": [1, 2]}',
+])
+def test_invalid_batch(post, body):
+    """Test malformed bodies are rejected."""
+    status, data = post('/triangulation/batch', body)
+    assert status == 400
+    assert json.loads(data)["code"] == "INVALID_BATCH"
+
+def test_batch_too_large(post):
+    """Test batches beyond the configured size are rejected."""
+    with patch('main.BATCH_MAX_IDS', 2), patch('asgi.BATCH_MAX_IDS', 2):
+        status, data = post('/triangulation/batch',
+                            json.dumps({"pointSetIds": IDS}))
+    assert status == 413
+    assert json.loads(data)["code"] == "BATCH_TOO_LARGE"
+
+def test_batch_body_too_large(post):
+    """Test an oversized body is refused before it is parsed."""
+    body = json.dumps({"pointSetIds": IDS + [" " * 100]})
+    with patch('main.BATCH_MAX_BODY', len(body) - 1), \
+            patch('asgi.BATCH_MAX_BODY', len(body) - 1), \
+            patch('json.loads') as mock_loads:
+        status, data = post('/triangulation/batch', body)
+    mock_loads.assert_not_called()
+    assert status == 413
+    assert json.loads(data)["code"] == "BATCH_TOO_LARGE"
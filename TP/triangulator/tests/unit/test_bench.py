@@ -0,0 +1,140 @@
+"""Tests for the benchmark harness."""
+import json
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import bench
+
+
+@pytest.mark.parametrize("kind", bench.KINDS)
+def test_generators_are_reproducible(kind):
+    """Test each generator gives the same points for the same seed."""
+    coords = bench.generate(kind, 500)
+    assert coords.shape == (500, 2)
+    assert coords.dtype == np.dtype('<f4')
+    assert np.array_equal(coords, bench.generate(kind, 500))
+    if kind != 'grid':
+        assert not np.array_equal(coords, bench.generate(kind, 500, seed=1))
+    assert np.isfinite(coords).all()
+
+def test_generator_shapes():
+    """Test the grid is an integer lattice and collinear points dominate."""
+    grid = bench.generate('grid', 100)
+    assert np.array_equal(grid, np.round(grid))
+    assert len(np.unique(grid, axis=0)) == 100
+    x, y = bench.generate('collinear', 10000).T.astype(np.float64)
+    on_lines = (y == 0) | (y == x) | (y == -x) | (y == 2 * x)
+    assert 0.98 < on_lines.mean() < 1
+    with pytest.raises(ValueError):
+        bench.generate('spiral', 10)
+
+def test_measure_batches_fast_calls():
+    """Test calls faster than the clock are timed in batches."""
+    now = [0.0]
+    calls = []
+
+    def clock():
+        return now[0]
+
+    def fn():
+        calls.append(None)
+        now[0] += 1e-5
+
+    samples = bench.measure(fn, warmup=2, repeat=4, clock=clock)
+    assert samples == pytest.approx([1e-5] * 4)
+    # 2 warm-up calls, then batches of 1, 10 and 100 calls.
+    assert len(calls) == 2 + 1 + 10 + 100 * 4
+
+def test_measure_stops_at_the_time_budget():
+    """Test slow calls stop being sampled past the time budget."""
+    now = [0.0]
+
+    def fn():
+        now[0] += 5.0
+
+    samples = bench.measure(fn, warmup=0, repeat=10, max_seconds=12.0,
+                            clock=lambda: now[0])
+    assert samples == [5.0, 5.0, 5.0]
+
+def test_run_case_reports_throughput(tmp_path):
+    """Test a case reports percentiles and throughput."""
+    result = bench.run_case('pointset.to_binary', 'uniform', 1000, repeat=3,
+                            directory=tmp_path)
+    assert bench.case_key(result) == 'pointset.to_binary/uniform/1000'
+    assert result['bytes'] == 4 + 8 * 1000
+    assert result['p50'] <= result['p90'] <= result['p99']
+    assert result['points_per_s'] == pytest.approx(1000 / result['p50'])
+    assert list(tmp_path.iterdir()) == []
+    with pytest.raises(ValueError):
+        bench.run_case('decode', 'uniform', 10)
+
+
+def make_result(stage, p50):
+    """Build a minimal result of the 'uniform' 10-point case."""
+    return {'stage': stage, 'kind': 'uniform', 'n_points': 10, 'p50': p50}
+
+
+def test_compare_finds_regressions(tmp_path):
+    """Test only cases slower than the threshold are reported."""
+    path = tmp_path / 'baseline.json'
+    bench.save(path, [make_result('triangulate', 1.0),
+                      make_result('triangles.to_binary', 1.0)])
+    baseline = bench.load(path)
+    assert baseline['environment']['numpy'] == np.__version__
+    results = [make_result('triangulate', 1.2),
+               make_result('triangles.to_binary', 1.3),
+               make_result('triangles.to_compact', 9.0)]
+    assert bench.compare(baseline, results, threshold=0.25) == \
+        [('triangles.to_binary/uniform/10', 1.0, 1.3)]
+
+def test_assert_no_regression_uses_the_configured_baseline(tmp_path):
+    """Test the perf tests only fail against a configured baseline."""
+    bench.assert_no_regression(make_result('triangulate', 100.0))
+    path = tmp_path / 'baseline.json'
+    path.write_text(json.dumps(
+        {'cases': {'triangulate/uniform/10': make_result('triangulate', 1)}}))
+    with patch.dict('os.environ', {bench.BASELINE_ENV: str(path)}):
+        bench.assert_no_regression(make_result('triangulate', 1.1))
+        with pytest.raises(AssertionError, match='triangulate/uniform/10'):
+            bench.assert_no_regression(make_result('triangulate', 2.0))
+
+def test_command_line_compare(tmp_path, capsys):
+    """Test the command line saves a baseline and exits 1 on regressions."""
+    path = tmp_path / 'baseline.json'
+    args = ['--sizes', '10', '--kinds', 'grid', '--stages',
+            'pointset.to_binary', '--repeat', '3']
+    assert bench.main([*args, '--save', str(path)]) == 0
+    # Two runs of a 10-point case may differ far more than the threshold.
+    assert bench.main([*args, '--compare', str(path),
+                       '--threshold', '1000']) == 0
+    baseline = bench.load(path)
+    baseline['cases']['pointset.to_binary/grid/10']['p50'] = 1e-12
+    path.write_text(json.dumps(baseline))
+    assert bench.main([*args, '--compare', str(path)]) == 1
+    assert 'pointset.to_binary/grid/10' in capsys.readouterr().out
+
+def test_command_line_backend_matrix(capsys):
+    """Test the triangulation is timed once per engine, codecs once."""
+    assert bench.main(['--sizes', '10', '--kinds', 'uniform', '--stages',
+                       'pointset.to_binary,triangulate', '--repeat', '3',
+                       '--backends', 'scipy,native']) == 0
+    lines = capsys.readouterr().out.splitlines()
+    stages = [line.split()[0] for line in lines[1:4]]
+    assert stages == ['pointset.to_binary', 'triangulate[scipy]',
+                      'triangulate[native]']
+    assert lines[-2].split() == ['kind', 'points', 'scipy', 'ms', 'native',
+                                 'ms', 'fastest']
+    assert lines[-1].split()[:2] == ['uniform', '10']
+    with pytest.raises(SystemExit):
+        bench.main(['--backends', 'bogus'])
+
+def test_backend_is_part_of_the_case_key():
+    """Test results of each engine are compared with their own baseline."""
+    result = bench.run_case('triangulate', 'grid', 10, repeat=3,
+                            backend='native')
+    assert bench.case_key(result) == 'triangulate/grid/10/native'
+    result = bench.run_case('pointset.to_binary', 'grid', 10, repeat=3,
+                            backend='native')
+    assert bench.case_key(result) == 'pointset.to_binary/grid/10'
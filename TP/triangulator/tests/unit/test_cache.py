@@ -0,0 +1,128 @@
+"""Tests for the triangulation caches."""
+import os
+from unittest.mock import patch
+
+import numpy as np
+
+from main import LRUCache, PointSet, TriangulationStore, Triangulator
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_hit_and_miss_counters():
+    """Test hits and misses are counted."""
+    cache = LRUCache(100)
+    assert cache.get("a") is None
+    cache.put("a", b"12345")
+    assert cache.get("a") == b"12345"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["bytes"] == 5
+
+def test_cache_evicts_least_recently_used_by_bytes():
+    """Test eviction is driven by total bytes, oldest entry first."""
+    cache = LRUCache(10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    cache.get("a")
+    cache.put("c", b"cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+    assert cache.evictions == 1
+    assert cache.size == 8
+
+def test_cache_rejects_oversized_value():
+    """Test a value larger than the cache is not stored."""
+    cache = LRUCache(4)
+    assert not cache.put("a", b"12345")
+    assert len(cache) == 0
+
+def test_cache_replaces_existing_key():
+    """Test re-caching a key accounts its size only once."""
+    cache = LRUCache(10)
+    cache.put("a", b"123")
+    cache.put("a", b"12345")
+    assert cache.size == 5
+    assert len(cache) == 1
+
+def test_cache_ttl_expiration():
+    """Test entries expire after their time-to-live."""
+    clock = FakeClock()
+    cache = LRUCache(100, ttl=10, clock=clock)
+    cache.put("a", b"123")
+    cache.put("b", b"456", ttl=30)
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.get("b") == b"456"
+    assert cache.expirations == 1
+    assert cache.size == 3
+
+def test_cache_disabled():
+    """Test a zero-sized cache never stores anything."""
+    cache = LRUCache(0)
+    assert not cache.put("a", b"1")
+    assert cache.get("a") is None
+
+
+def square(offset=0.0):
+    """Build a four-point PointSet."""
+    return PointSet(4, [[offset, 0], [1, 0], [0, 1], [1, 1]])
+
+def test_pointset_digest_matches_binary_representation():
+    """Test identical binary representations share a digest."""
+    assert square().digest() == square().digest()
+    assert square().digest() == PointSet.from_binary(square().to_binary()).digest()
+    assert square().digest() != square(0.5).digest()
+    assert PointSet(-1, []).digest() is None
+
+def test_store_roundtrip_across_instances(tmp_path):
+    """Test stored triangles are visible to another store instance."""
+    digest = square().digest()
+    TriangulationStore(str(tmp_path)).put(digest, [[0, 1, 2], [1, 3, 2]])
+    other = TriangulationStore(str(tmp_path))
+    assert other.get(digest).tolist() == [[0, 1, 2], [1, 3, 2]]
+    assert other.get(square(0.5).digest()) is None
+    assert other.stats() == {"hits": 1, "misses": 1, "writes": 0}
+
+def test_store_ignores_corrupt_entry(tmp_path):
+    """Test an entry of invalid size is treated as a miss."""
+    store = TriangulationStore(str(tmp_path))
+    digest = square().digest()
+    store.put(digest, [[0, 1, 2]])
+    with open(store._path(digest), 'ab') as f:
+        f.write(b'\x00')
+    assert store.get(digest) is None
+
+def test_store_prunes_least_recently_used(tmp_path):
+    """Test the oldest entries are removed past the size limit."""
+    store = TriangulationStore(str(tmp_path), max_bytes=24)
+    store.put("aa", [[0, 1, 2]])
+    os.utime(store._path("aa"), (0, 0))
+    store.put("bb", [[0, 1, 2]])
+    store.put("cc", [[0, 1, 2]])
+    assert store.get("aa") is None
+    assert store.get("bb") is not None
+    assert store.get("cc") is not None
+
+def test_triangulator_reuses_store_for_identical_geometry(tmp_path):
+    """Test identical geometry is triangulated only once."""
+    store = TriangulationStore(str(tmp_path))
+    with patch.object(Triangulator, 'store', store):
+        first = Triangulator.triangulate(square())
+        with patch('scipy.spatial.Delaunay') as mock_delaunay:
+            second = Triangulator.triangulate(square())
+    mock_delaunay.assert_not_called()
+    assert store.hits == 1
+    assert second == first
+    assert np.array_equal(second.indices, first.indices)
+    assert second.to_binary() == first.to_binary()
@@ -0,0 +1,119 @@
+"""Tests for coalescing of concurrent identical requests."""
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from main import PointSet, SingleFlight, app, inflight, result_cache
+
+POINTSET_ID = "123e4567-e89b-12d3-a456-426614174000"
+CONCURRENCY = 8
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until a condition holds."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def run_concurrently(target, count):
+    """Start ``count`` threads running ``target`` and return them."""
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_single_flight_shares_result():
+    """Test concurrent callers of a key share one execution."""
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def work():
+        calls.append(1)
+        release.wait()
+        return "result"
+
+    threads = run_concurrently(
+        lambda: results.append(flight.do("key", work)), CONCURRENCY)
+    wait_for(lambda: flight.coalesced == CONCURRENCY - 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["result"] * CONCURRENCY
+    assert flight.stats() == {"calls": 1, "coalesced": CONCURRENCY - 1,
+                              "in_flight": 0}
+
+
+def test_single_flight_shares_exception():
+    """Test the exception of the shared call reaches every caller."""
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def work():
+        release.wait()
+        raise ValueError("boom")
+
+    def call():
+        try:
+            flight.do("key", work)
+        except ValueError as err:
+            errors.append(err)
+
+    threads = run_concurrently(call, 3)
+    wait_for(lambda: flight.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3
+
+
+def test_single_flight_runs_again_after_completion():
+    """Test a finished call is not reused by later callers."""
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    with pytest.raises(KeyError):
+        flight.do("key", {}.__getitem__, "missing")
+    assert flight.coalesced == 0
+
+
+@patch('main.PointSetManager.retrieve')
+def test_route_coalesces_concurrent_requests(mock_retrieve):
+    """Test a burst of identical requests fetches and triangulates once."""
+    release = threading.Event()
+    pointset = PointSet(4, [[0, 0], [1, 0], [0, 1], [1, 1]])
+
+    def slow_retrieve(point_set_id):
+        release.wait()
+        return pointset
+
+    mock_retrieve.side_effect = slow_retrieve
+    result_cache.clear()
+    coalesced = inflight.coalesced
+    responses = []
+
+    def request():
+        response = app.test_client().get(f'/triangulation/{POINTSET_ID}')
+        responses.append((response.status_code, response.data))
+
+    try:
+        threads = run_concurrently(request, CONCURRENCY)
+        wait_for(lambda: inflight.coalesced - coalesced == CONCURRENCY - 1)
+        release.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        result_cache.clear()
+
+    mock_retrieve.assert_called_once_with(POINTSET_ID)
+    assert {status for status, _ in responses} == {200}
+    assert len({data for _, data in responses}) == 1
@@ -0,0 +1,200 @@
+"""Tests for the compact Triangles format and response negotiation."""
+import asyncio
+import gzip
+import struct
+import threading
+import zlib
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+import pytest
+
+import asgi
+from main import (
+    COMPACT,
+    OCTET_STREAM,
+    PointSet,
+    Triangles,
+    Triangulator,
+    _encode_body,
+    _negotiate,
+    app,
+    result_cache,
+)
+
+POINTSET_ID = "123e4567-e89b-12d3-a456-426614174019"
+
+rng = np.random.default_rng(19)
+pointset = PointSet(200, rng.uniform(-10, 10, size=(200, 2)))
+triangles = Triangulator.triangulate(pointset)
+
+
+def test_compact_roundtrip():
+    """Test the compact format decodes to the same Triangles."""
+    data = triangles.to_compact()
+    assert len(data) < len(triangles.to_binary())
+    assert Triangles.from_compact(data) == triangles
+
+def test_compact_without_points():
+    """Test points can be omitted and supplied back when decoding."""
+    data = triangles.to_compact(include_points=False)
+    assert len(data) == len(triangles.to_compact()) - 8 * pointset.n_points
+    assert Triangles.from_compact(data) is None
+    assert Triangles.from_compact(data, PointSet(3, [[0, 0], [1, 0], [0, 1]])) \
+        is None
+    assert Triangles.from_compact(data, pointset) == triangles
+
+def test_compact_extreme_indices():
+    """Test deltas spanning the whole uint32 range round-trip."""
+    ps = PointSet(2 ** 32 - 1, np.zeros((3, 2)))
+    t = Triangles(ps, 3, [[0, 2 ** 32 - 2, 1], [2 ** 32 - 2, 0, 7],
+                          [5, 5, 5]], trusted=True)
+    decoded = Triangles.from_compact(t.to_compact(False), ps)
+    assert decoded.triangles == t.triangles
+
+def test_compact_empty():
+    """Test a triangulation without triangles is encoded as its header."""
+    t = Triangles(PointSet(2, [[0, 0], [1, 1]]), 0, [])
+    assert Triangles.from_compact(t.to_compact()) == t
+    assert Triangles.from_compact(t.to_compact(False), t.pointset) == t
+
+@pytest.mark.parametrize("data", [
+    b'', struct.pack('<BII', 1, 3, 0),
+    triangles.to_compact()[:-1], triangles.to_compact() + b'\x00',
+    struct.pack('<BII', 1, 0, 1) + b'\x80\x80\x80\x80\x80\x01\x00\x00',
+    struct.pack('<BII', 1, 0, 1) + b'\x01\x00\x00',
+])
+def test_compact_rejects_malformed(data):
+    """Test truncated, oversized and out-of-range data are rejected."""
+    assert Triangles.from_compact(data) is None
+
+def test_compact_invalid_triangles():
+    """Test invalid triangles cannot be encoded."""
+    ps = PointSet(3, [[0, 0], [1, 0], [0, 1]])
+    assert Triangles(ps, 1, [[0, 1, 3]]).to_compact() is None
+
+
+@pytest.mark.parametrize("accept, accept_encoding, expected", [
+    (None, None, (OCTET_STREAM, True, None)),
+    ('*/*', 'identity', (OCTET_STREAM, True, None)),
+    (COMPACT, None, (COMPACT, True, None)),
+    (f'{COMPACT}; points=omit', 'gzip', (COMPACT, False, 'gzip')),
+    (f'{OCTET_STREAM}, {COMPACT};q=0.5', 'gzip;q=0.5, deflate',
+     (OCTET_STREAM, True, 'deflate')),
+    (f'{COMPACT};q=0, */*', 'gzip;q=0', (OCTET_STREAM, True, None)),
+    (f'{OCTET_STREAM}; points=omit', 'br', (OCTET_STREAM, True, None)),
+])
+def test_negotiate(accept, accept_encoding, expected):
+    """Test the plain format stays the default unless compact is asked."""
+    assert _negotiate(accept, accept_encoding) == expected
+
+
+def flask_get(headers):
+    """GET the triangulation from the Flask app."""
+    response = app.test_client().get(f'/triangulation/{POINTSET_ID}',
+                                     headers=headers)
+    return response.status_code, response.headers, response.data
+
+
+async def _asgi_get(headers):
+    transport = httpx.ASGITransport(app=asgi.app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://testserver") as client:
+        # httpx asks for compression by default; read the raw bytes as sent.
+        headers = {'Accept-Encoding': 'identity', **headers}
+        async with client.stream('GET', f'/triangulation/{POINTSET_ID}',
+                                 headers=headers) as response:
+            data = b''.join([chunk async for chunk in response.aiter_raw()])
+        return response.status_code, response.headers, data
+
+
+def asgi_get(headers):
+    """GET the triangulation from the ASGI app."""
+    return asyncio.run(_asgi_get(headers))
+
+
+async def fake_retrieve(point_set_id):
+    """Serve the module PointSet to the ASGI app."""
+    return pointset
+
+
+@pytest.fixture(params=['flask', 'asgi'])
+def get(request):
+    """Run each test against both front ends, cached or not."""
+    result_cache.clear()
+    with patch('main.PointSetManager.retrieve', return_value=pointset), \
+            patch('asgi.retrieve', new=fake_retrieve):
+        yield flask_get if request.param == 'flask' else asgi_get
+    result_cache.clear()
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_default_format_is_unchanged(get, cached):
+    """Test requests without preferences get the plain binary."""
+    if cached:
+        get({})
+    status, headers, data = get({})
+    assert status == 200
+    assert headers['Content-Type'] == OCTET_STREAM
+    assert 'Content-Encoding' not in headers
+    assert data == triangles.to_binary()
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_compact_response(get, cached):
+    """Test the compact format is served when asked for."""
+    if cached:
+        get({})
+    status, headers, data = get({'Accept': f'{COMPACT}; points=omit'})
+    assert status == 200
+    assert headers['Content-Type'] == f'{COMPACT}; points=omit'
+    assert 'Accept' in headers['Vary']
+    assert Triangles.from_compact(data, pointset) == triangles
+    # The plain body is still cached for later requests.
+    assert result_cache.get(POINTSET_ID) == triangles.to_binary()
+
+@pytest.mark.parametrize("coding, decompress", [
+    ('gzip', gzip.decompress), ('deflate', zlib.decompress),
+])
+def test_compressed_response(get, coding, decompress):
+    """Test responses are compressed when the client allows it."""
+    status, headers, data = get({'Accept': COMPACT,
+                                 'Accept-Encoding': coding})
+    assert status == 200
+    assert headers['Content-Encoding'] == coding
+    assert Triangles.from_compact(decompress(data)) == triangles
+    status, headers, data = get({'Accept-Encoding': coding})
+    assert headers['Content-Type'] == OCTET_STREAM
+    assert decompress(data) == triangles.to_binary()
+
+def test_compact_upload():
+    """Test the upload endpoint negotiates the format too."""
+    response = app.test_client().post(
+        '/triangulation', data=pointset.to_binary(),
+        headers={'Accept': f'{COMPACT}; points=omit'})
+    assert response.status_code == 200
+    assert Triangles.from_compact(response.data, pointset) == triangles
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_asgi_encoding_leaves_the_event_loop(cached):
+    """Test the ASGI app encodes and compresses off the event loop."""
+    threads = set()
+
+    def encode(*args, **kwargs):
+        threads.add(threading.get_ident())
+        body = _encode_body(*args, **kwargs)
+        chunks = (body,) if isinstance(body, bytes) else body
+        for chunk in chunks:
+            threads.add(threading.get_ident())
+            yield chunk
+
+    result_cache.clear()
+    with patch('asgi.retrieve', new=fake_retrieve):
+        if cached:
+            asgi_get({})
+        with patch('asgi._encode_body', new=encode):
+            status, _, data = asgi_get({'Accept-Encoding': 'gzip'})
+    result_cache.clear()
+    assert status == 200
+    assert gzip.decompress(data) == triangles.to_binary()
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,168 @@
+"""Tests for the native Delaunay engine, cross-checked against SciPy."""
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from scipy.spatial import ConvexHull, Delaunay
+
+import delaunay
+from main import NATIVE, PointSet, Triangulator
+
+rng = np.random.default_rng(11)
+
+
+def canonical(simplices):
+    """Get a triangulation as a sorted list of sorted vertex triples."""
+    return sorted(tuple(sorted(t)) for t in np.asarray(simplices).tolist())
+
+
+def assert_delaunay(coords, simplices):
+    """Check a triangulation is CCW, covers the hull and has empty circles."""
+    coords = np.asarray(coords, dtype=np.float64)
+    a, b, c = (coords[simplices[:, i]] for i in range(3))
+    areas = ((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1])
+             - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0]))
+    assert (areas > 0).all()
+    assert np.isclose(areas.sum() / 2, ConvexHull(coords).volume)
+    for t in simplices.tolist():
+        others = np.setdiff1d(np.arange(len(coords)), t)
+        assert all(delaunay.incircle(*coords[t].ravel(), *coords[v]) <= 0
+                   for v in others)
+
+
+@pytest.mark.parametrize("n", [3, 4, 10, 100, 2000])
+def test_random_points_match_scipy(n):
+    """Test random inputs give the same triangles as SciPy."""
+    coords = rng.uniform(-100, 100, size=(n, 2)).astype(np.float32)
+    native = delaunay.triangulate(coords)
+    assert canonical(native) == canonical(Delaunay(coords).simplices)
+
+def test_clustered_points_are_delaunay():
+    """Test points with widely varying density are triangulated exactly.
+
+    Qhull's floating-point result may differ inside the tiny cluster, so
+    only the triangle count is compared with SciPy.
+    """
+    coords = np.concatenate([
+        rng.normal(0, 1e-3, size=(100, 2)),
+        rng.normal(50, 10, size=(100, 2)),
+    ]).astype(np.float32)
+    native = delaunay.triangulate(coords)
+    assert len(native) == len(Delaunay(coords).simplices)
+    assert_delaunay(coords, native)
+
+def test_grid_is_delaunay():
+    """Test a cocircular grid gives a valid Delaunay triangulation."""
+    coords = np.array([[i, j] for i in range(12) for j in range(12)],
+                      dtype=np.float32)
+    simplices = delaunay.triangulate(coords)
+    assert len(simplices) == len(Delaunay(coords).simplices)
+    assert_delaunay(coords, simplices)
+
+def test_points_on_hull_edges():
+    """Test points inserted on the hull are kept in the triangulation."""
+    coords = np.array([[0, 0], [4, 0], [0, 4], [1, 0], [2, 0], [3, 0],
+                       [0, 1], [0, 2], [2, 2], [1, 1]], dtype=np.float32)
+    simplices = delaunay.triangulate(coords)
+    assert len(np.unique(simplices)) == len(coords)
+    assert_delaunay(coords, simplices)
+
+def test_duplicates_are_skipped():
+    """Test duplicate points are left out, like SciPy's coplanar points."""
+    coords = rng.uniform(0, 1, size=(50, 2)).astype(np.float32)
+    coords = np.concatenate([coords, coords[:10]])
+    native = delaunay.triangulate(coords)
+    assert len(native) == len(Delaunay(coords).simplices)
+    assert len(np.unique(native)) == 50
+
+@pytest.mark.parametrize("coords", [
+    [[0, 0], [1, 1]],
+    [[0, 0], [1, 1], [2, 2], [3, 3]],
+    [[1, 1], [1, 1], [1, 1]],
+    [[0, 0], [0, 0], [0, 1], [0, 2]],
+])
+def test_degenerate_inputs_have_no_triangles(coords):
+    """Test collinear and coincident inputs give no triangles."""
+    assert delaunay.triangulate(np.array(coords, dtype=np.float32)).shape \
+        == (0, 3)
+
+def test_predicates_are_exact():
+    """Test the predicates resolve cases the float filter cannot."""
+    assert delaunay.orient(0.5, 0.5, 12.0, 12.0, 24.0, 24.0) == 0
+    x = 0.5 + 2.0 ** -52
+    assert delaunay.orient(0.5, 0.5, 12.0, 12.0, x, 0.5) == -1
+    assert delaunay.orient(0.5, 0.5, 12.0, 12.0, 0.5, x) == 1
+    assert delaunay.incircle(0, 0, 1, 0, 0, 1, 1, 1) == 0
+    assert delaunay.incircle(0, 0, 1, 0, 0, 1, 1 - 2.0 ** -53, 1) == 1
+    assert delaunay.incircle(0, 0, 1, 0, 0, 1, 1 + 2.0 ** -52, 1) == -1
+
+def test_insertion_order_is_a_reproducible_permutation():
+    """Test the insertion order covers every point deterministically."""
+    coords = rng.uniform(0, 1, size=(500, 2))
+    order = delaunay.insertion_order(coords)
+    assert sorted(order.tolist()) == list(range(500))
+    assert np.array_equal(order, delaunay.insertion_order(coords))
+
+def test_triangulator_native_backend():
+    """Test the Triangulator can be switched to the native backend."""
+    pointset = PointSet(300, rng.uniform(-5, 5, size=(300, 2)))
+    scipy = Triangulator.triangulate(pointset)
+    with patch.object(Triangulator, 'backend', NATIVE), \
+            patch('scipy.spatial.Delaunay') as mock_delaunay:
+        native = Triangulator.triangulate(pointset)
+    mock_delaunay.assert_not_called()
+    assert native.trusted
+    assert native.validate(winding='ccw')
+    assert canonical(native.indices) == canonical(scipy.indices)
+
+def test_mesh_rebuilt_from_simplices_accepts_insertions():
+    """Test a mesh rebuilt from SciPy's output is usable for insertion."""
+    coords = rng.uniform(0, 1, size=(300, 2))
+    mesh = delaunay.Mesh.from_simplices(coords, Delaunay(coords[:250]).simplices)
+    for v in range(250, 300):
+        mesh.insert(v)
+    assert canonical(mesh.simplices()) == canonical(Delaunay(coords).simplices)
+
+@pytest.mark.parametrize("simplices", [
+    [],
+    [[0, 1, 2], [0, 3, 4]],
+    [[0, 1, 2], [0, 1, 3], [0, 1, 4]],
+])
+def test_mesh_rejects_invalid_simplices(simplices):
+    """Test empty, pinched and non-manifold triangulations are rejected."""
+    coords = [[0, 0], [1, 0], [0, 1], [-1, 0], [0, -1]]
+    with pytest.raises(ValueError):
+        delaunay.Mesh.from_simplices(coords, simplices)
+
+def test_mesh_remove_matches_scipy():
+    """Test removing interior and hull vertices gives SciPy's triangles."""
+    coords = rng.uniform(-1, 1, size=(200, 2))
+    mesh = delaunay.Mesh.from_simplices(coords, Delaunay(coords).simplices)
+    hull = np.unique(Delaunay(coords).convex_hull)[:5]
+    removed = np.unique(np.concatenate([hull, np.arange(0, 200, 17)]))
+    for v in removed.tolist():
+        assert mesh.remove(v)
+    assert not mesh.remove(int(removed[0]))
+    kept = np.setdiff1d(np.arange(200), removed)
+    expected = kept[Delaunay(coords[kept]).simplices]
+    assert canonical(mesh.simplices()) == canonical(expected)
+
+def test_mesh_remove_from_grid_stays_delaunay():
+    """Test removals among cocircular points keep the Delaunay property."""
+    coords = np.array([[i, j] for i in range(8) for j in range(8)],
+                      dtype=np.float64)
+    mesh = delaunay.Mesh.from_simplices(coords, delaunay.triangulate(coords))
+    removed = [0, 7, 27, 28, 36, 63, 3]
+    for v in removed:
+        assert mesh.remove(v)
+    kept = np.setdiff1d(np.arange(64), removed)
+    renumber = np.full(64, -1)
+    renumber[kept] = np.arange(len(kept))
+    assert_delaunay(coords[kept], renumber[mesh.simplices()])
+
+def test_mesh_remove_to_degenerate_fails():
+    """Test the hole of the last non-collinear vertex cannot be filled."""
+    coords = [[0, 0], [1, 0], [2, 0], [1, 1]]
+    mesh = delaunay.Mesh.from_simplices(coords, delaunay.triangulate(coords))
+    with pytest.raises(RuntimeError):
+        mesh.remove(3)
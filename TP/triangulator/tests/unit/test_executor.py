@@ -0,0 +1,112 @@
+"""Tests for the process-pool triangulation executor."""
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from scipy.spatial import Delaunay
+
+from main import (
+    ExecutorSaturated,
+    PointSet,
+    TriangulationExecutor,
+    Triangulator,
+    app,
+    result_cache,
+)
+
+POINTSET_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+rng = np.random.default_rng(10)
+pointset = PointSet(200, rng.uniform(-50, 50, size=(200, 2)))
+
+
+def shared_blocks():
+    """List the shared memory blocks currently present."""
+    return {name for name in os.listdir('/dev/shm') if name.startswith('psm_')}
+
+
+@pytest.fixture(scope='module')
+def executor():
+    """Start a one-worker executor sending every job to the pool."""
+    executor = TriangulationExecutor(1, threshold=0)
+    yield executor
+    executor.shutdown()
+
+
+def test_executor_matches_inline_triangulation(executor):
+    """Test pool results are identical to the inline computation."""
+    before = shared_blocks()
+    inline = Triangulator.triangulate(pointset)
+    with patch.object(Triangulator, 'executor', executor):
+        pooled = Triangulator.triangulate(pointset)
+    assert pooled.trusted
+    assert pooled.to_binary() == inline.to_binary()
+    assert executor.stats()["pending"] == 0
+    assert shared_blocks() == before
+
+def test_executor_warm_up_starts_workers(executor):
+    """Test warming up starts the pool and loads the backend."""
+    executor.warm_up()
+    assert executor._pool is not None
+    assert executor.stats()["pending"] == 0
+
+def test_executor_keeps_small_jobs_inline():
+    """Test jobs below the threshold never start the pool."""
+    executor = TriangulationExecutor(1, threshold=1000)
+    simplices = executor.run(pointset.coords)
+    assert executor._pool is None
+    assert len(simplices) == Triangulator.triangulate(pointset).n_triangles
+
+def test_executor_rejects_when_saturated():
+    """Test admission control rejects jobs past the queue depth."""
+    executor = TriangulationExecutor(1, threshold=0, max_pending=0)
+    with pytest.raises(ExecutorSaturated):
+        executor.run(pointset.coords)
+    assert executor.stats()["rejected"] == 1
+    assert executor._pool is None
+
+@patch('main.PointSetManager.retrieve')
+@patch('main.Triangulator.triangulate')
+def test_route_saturated_executor(mock_triangulate, mock_retrieve):
+    """Test a saturated executor is reported as 503."""
+    mock_retrieve.return_value = pointset
+    mock_triangulate.side_effect = ExecutorSaturated("Triangulation queue is full")
+    result_cache.clear()
+    response = app.test_client().get(f'/triangulation/{POINTSET_ID}')
+    assert response.status_code == 503
+    assert response.json['code'] == "SERVICE_UNAVAILABLE"
+
+def canonical(simplices):
+    """Get triangles as a sorted list of sorted vertex triples."""
+    return sorted(tuple(sorted(t)) for t in np.asarray(simplices).tolist())
+
+@pytest.mark.parametrize("tiles", [2, 5])
+def test_partitioned_matches_single_triangulation(executor, tiles):
+    """Test stitched strips give the triangles of one Delaunay call."""
+    coords = np.unique(np.concatenate([
+        rng.uniform(-50, 50, size=(3000, 2)),
+        rng.normal(0, 1e-2, size=(500, 2)),
+    ]).astype(np.float32), axis=0)
+    simplices = executor.run_partitioned(coords, tiles=tiles)
+    assert canonical(simplices) == canonical(Delaunay(coords).simplices)
+    assert executor.stats()["partition_fallbacks"] == 0
+
+def test_partitioned_falls_back_on_inconsistent_merge(executor):
+    """Test a merge failing the consistency check is redone in one piece."""
+    coords = np.unique(rng.uniform(0, 1, size=(500, 2)).astype(np.float32),
+                       axis=0)
+    fallbacks = executor.partition_fallbacks
+    with patch('main._is_triangulation', return_value=False):
+        simplices = executor.run_partitioned(coords, tiles=3)
+    assert executor.partition_fallbacks == fallbacks + 1
+    assert canonical(simplices) == canonical(Delaunay(coords).simplices)
+
+def test_executor_partitions_above_threshold():
+    """Test jobs above the partition threshold are split across workers."""
+    executor = TriangulationExecutor(2, threshold=0, partition_threshold=100)
+    with patch.object(executor, 'run_partitioned',
+                      return_value=[[0, 1, 2]]) as mock_partitioned:
+        assert executor.run(pointset.coords) == [[0, 1, 2]]
+    mock_partitioned.assert_called_once()
+    assert executor.stats()["pending"] == 0
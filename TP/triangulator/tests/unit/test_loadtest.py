@@ -0,0 +1,173 @@
+"""Tests for the load-test harness and its PointSetManager stand-in."""
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+import requests
+from werkzeug.serving import make_server
+
+import loadtest
+from main import PointSet, PointSetManager, app, result_cache
+
+pointset = PointSet(4, [[0, 0], [1, 0], [0, 1], [1, 1]])
+
+UNKNOWN_ID = "123e4567-e89b-12d3-a456-426614174022"
+
+
+@pytest.fixture
+def stand_in():
+    """Run a stand-in PointSetManager holding one PointSet."""
+    with loadtest.StandInPointSetManager(seed=22) as manager:
+        manager.point_set_id = manager.register(pointset.to_binary())
+        yield manager
+
+
+def test_stand_in_serves_pointsets(stand_in):
+    """Test retrievals follow the PointSetManager contract."""
+    response = requests.get(f"{stand_in.url}/pointset/{stand_in.point_set_id}")
+    assert response.status_code == 200
+    assert PointSet.from_binary(response.content) == pointset
+    response = requests.get(f"{stand_in.url}/pointset/{UNKNOWN_ID}")
+    assert response.status_code == 404
+    assert response.json()['code'] == 'POINTSET_NOT_FOUND'
+    response = requests.get(f"{stand_in.url}/pointset/not-a-uuid")
+    assert response.status_code == 400
+    assert stand_in.served == {200: 1, 404: 1, 400: 1}
+
+def test_stand_in_registers_pointsets(stand_in):
+    """Test POST /pointset stores valid PointSets only."""
+    other = PointSet(3, [[0, 0], [2, 0], [0, 2]])
+    response = requests.post(f"{stand_in.url}/pointset",
+                             data=other.to_binary())
+    assert response.status_code == 201
+    point_set_id = response.json()['pointSetId']
+    response = requests.get(f"{stand_in.url}/pointset/{point_set_id}")
+    assert PointSet.from_binary(response.content) == other
+    response = requests.post(f"{stand_in.url}/pointset", data=b'\x01')
+    assert response.status_code == 400
+
+def test_stand_in_injects_errors(stand_in):
+    """Test retrievals fail with 503 at the configured rate."""
+    stand_in.error_rate = 1.0
+    response = requests.get(f"{stand_in.url}/pointset/{stand_in.point_set_id}")
+    assert response.status_code == 503
+    assert response.json()['code'] == 'STORAGE_UNAVAILABLE'
+
+def test_populate_gives_distinct_sizes(stand_in):
+    """Test generated PointSets take the sizes in turn."""
+    ids = loadtest.populate(stand_in, 4, sizes=(10, 20), kind='clustered')
+    sizes = [PointSet.from_binary(stand_in.pointsets[i]).n_points
+             for i in ids]
+    assert sizes == [10, 20, 10, 20]
+    assert len(set(stand_in.pointsets[i] for i in ids)) == 4
+
+
+def test_summarize():
+    """Test percentiles cover successes and errors are broken down."""
+    records = [(i / 1000, 200, None) for i in range(1, 101)]
+    records += [(0.5, 404, 'POINTSET_NOT_FOUND'), (0.5, 503, 'UNAVAILABLE'),
+                (30.0, 0, loadtest.TIMEOUT)]
+    report = loadtest.summarize(records, 2.0, level=4)
+    assert report['requests'] == 103
+    assert report['throughput'] == 50.0
+    assert report['p50'] == pytest.approx(0.0505)
+    assert report['max'] == 0.1
+    assert report['errors'] == {'POINTSET_NOT_FOUND': 1, 'TIMEOUT': 1,
+                                'UNAVAILABLE': 1}
+    # A 404 is a correct answer, not a failure of the service.
+    assert report['error_rate'] == pytest.approx(2 / 103)
+    assert loadtest.summarize([], 1.0)['p99'] is None
+
+
+def level(level, throughput, p99=0.01, error_rate=0.0, rps=None,
+          target=None):
+    """Build a report of one load level."""
+    return {'level': level, 'throughput': throughput, 'p99': p99,
+            'error_rate': error_rate, 'rps': rps or throughput,
+            'target': target}
+
+
+@pytest.mark.parametrize("reports, slo, expected", [
+    ([level(1, 10), level(2, 19), level(4, 30)], None, (4, None)),
+    ([level(1, 10), level(2, 19), level(4, 19.5)], None, (2, 4)),
+    ([level(1, 10), level(2, 19, p99=0.3)], 0.2, (1, 2)),
+    ([level(1, 10), level(2, 19, error_rate=0.05)], None, (1, 2)),
+    ([level(10, 10, target=10), level(20, 15, target=20)], None, (10, 20)),
+    ([level(1, 10, p99=0.3)], 0.2, (None, 1)),
+])
+def test_saturation(reports, slo, expected):
+    """Test the first level that stops paying off is reported."""
+    capacity, saturated = loadtest.saturation(reports, slo)
+    assert (capacity and capacity['level'],
+            saturated and saturated['level']) == expected
+
+
+@pytest.fixture
+def service(stand_in):
+    """Serve the Flask app on a local port, backed by the stand-in."""
+    result_cache.clear()
+    PointSetManager.close()
+    PointSetManager.reset()
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with patch.object(PointSetManager, 'BASE_URL', stand_in.url):
+        yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    thread.join()
+    PointSetManager.close()
+    PointSetManager.reset()
+    result_cache.clear()
+
+
+def test_run_closed(service, stand_in):
+    """Test concurrent clients run for the duration."""
+    records, elapsed = loadtest.run_closed(
+        service, [stand_in.point_set_id], 2, 0.3, not_found_rate=0.5)
+    assert elapsed >= 0.3
+    codes = {code for _, _, code in records}
+    assert codes == {None, 'POINTSET_NOT_FOUND'}
+
+def test_run_open(service, stand_in):
+    """Test requests are sent at the target rate."""
+    records, elapsed = loadtest.run_open(
+        service, [stand_in.point_set_id], 40, 0.5)
+    assert len(records) == 20
+    assert all(status == 200 for _, status, _ in records)
+    assert elapsed >= 19 / 40
+
+def test_run_reports_unreachable_service():
+    """Test requests without a response are recorded by cause."""
+    url = f"http://127.0.0.1:{loadtest.free_port()}"
+    records, _ = loadtest.run_open(url, [UNKNOWN_ID], 10, 0.1)
+    assert records[0][1:] == (0, loadtest.CONNECTION_ERROR)
+
+
+def test_main_against_running_service(tmp_path, capsys):
+    """Test a sweep against a running service reports every level."""
+    port = loadtest.free_port()
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    result_cache.clear()
+    PointSetManager.close()
+    PointSetManager.reset()
+    try:
+        with patch.object(PointSetManager, 'BASE_URL',
+                          f"http://127.0.0.1:{port}"):
+            status = loadtest.main([
+                '--url', f"http://127.0.0.1:{server.server_port}",
+                '--manager-port', str(port), '--concurrency', '1,2',
+                '--duration', '0.2', '--pointsets', '3', '--sizes', '10',
+                '--save', str(tmp_path / 'load.json')])
+    finally:
+        server.shutdown()
+        PointSetManager.close()
+        PointSetManager.reset()
+        result_cache.clear()
+    assert status == 0
+    out = capsys.readouterr().out
+    assert out.splitlines()[0].split()[:2] == ['concurrency', 'requests']
+    assert 'aturated' in out
+    saved = json.loads((tmp_path / 'load.json').read_text())
+    assert [r['level'] for r in saved['levels']] == [1, 2]
@@ -0,0 +1,195 @@
+"""Tests for the metrics registry and the /metrics endpoint."""
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+import asgi
+from main import (
+    ERRORS,
+    STAGE_SECONDS,
+    Metrics,
+    PointSet,
+    PointSetManager,
+    app,
+    metrics,
+    result_cache,
+)
+
+POINTSET_ID = "123e4567-e89b-12d3-a456-426614174020"
+
+pointset = PointSet(4, [[0, 0], [1, 0], [0, 1], [1, 1]])
+
+
+def sample(text, series):
+    """Get the value of a series in an exposition, 0 when absent."""
+    for line in text.splitlines():
+        name, _, value = line.rpartition(' ')
+        if name == series:
+            return float(value)
+    return 0.0
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test observations land in the right buckets of the exposition."""
+    registry = Metrics()
+    seconds = registry.histogram('stage_seconds', 'Stage times.', (0.1, 1),
+                                 label='stage')
+    for value in (0.05, 0.1, 0.5, 3):
+        registry.observe(seconds, value, 'fetch')
+    text = registry.render()
+    assert '# TYPE stage_seconds histogram' in text
+    assert sample(text, 'stage_seconds_bucket{stage="fetch",le="0.1"}') == 2
+    assert sample(text, 'stage_seconds_bucket{stage="fetch",le="1.0"}') == 3
+    assert sample(text, 'stage_seconds_bucket{stage="fetch",le="+Inf"}') == 4
+    assert sample(text, 'stage_seconds_count{stage="fetch"}') == 4
+    assert sample(text, 'stage_seconds_sum{stage="fetch"}') == \
+        pytest.approx(3.65)
+
+def test_counters_and_unlabelled_series():
+    """Test counters and series without a label."""
+    registry = Metrics()
+    errors = registry.counter('errors_total', 'Errors.', label='code')
+    sizes = registry.histogram('sizes', 'Sizes.', (10,))
+    registry.inc(errors, 'A')
+    registry.inc(errors, 'A', 2)
+    registry.inc(errors, 'B')
+    registry.observe(sizes, 50)
+    text = registry.render()
+    assert sample(text, 'errors_total{code="A"}') == 3
+    assert sample(text, 'errors_total{code="B"}') == 1
+    assert sample(text, 'sizes_bucket{le="10.0"}') == 0
+    assert sample(text, 'sizes_count') == 1
+    assert text.endswith('\n')
+
+def test_thread_shards_are_summed():
+    """Test updates from several threads without locking add up."""
+    registry = Metrics()
+    calls = registry.counter('calls_total', 'Calls.')
+    seconds = registry.histogram('seconds', 'Times.', (1,))
+
+    def work():
+        for _ in range(1000):
+            registry.inc(calls)
+            with registry.time(seconds):
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    text = registry.render()
+    assert sample(text, 'calls_total') == 8000
+    assert sample(text, 'seconds_bucket{le="1.0"}') == 8000
+
+def test_shards_of_exited_threads_are_retired():
+    """Test threads started per request do not accumulate shards."""
+    registry = Metrics()
+    calls = registry.counter('calls_total', 'Calls.', label='route')
+    for _ in range(100):
+        thread = threading.Thread(target=registry.inc, args=(calls, 'a'))
+        thread.start()
+        thread.join()
+    registry.inc(calls, 'a')
+    assert len(registry._shards) == 1
+    assert sample(registry.render(), 'calls_total{route="a"}') == 101
+
+def test_collected_metrics_are_read_at_scrape():
+    """Test collected values are summed over their sources."""
+    registry = Metrics()
+    hits = {'hit': 1, 'miss': 2}
+    name = registry.collected('lookups_total', 'Lookups.', 'counter',
+                              lambda: hits, label='result')
+    registry.source(name, lambda: {'hit': 10})
+    registry.collected('absent', 'Nothing to report.', 'gauge',
+                       lambda: None)
+    hits['hit'] = 5
+    text = registry.render()
+    assert sample(text, 'lookups_total{result="hit"}') == 15
+    assert sample(text, 'lookups_total{result="miss"}') == 2
+    assert '# TYPE lookups_total counter' in text
+    assert 'absent' not in text
+
+
+@pytest.fixture
+def upstream():
+    """Serve the PointSet through a mocked PointSetManager session."""
+    result_cache.clear()
+    PointSetManager.reset()
+    response = MagicMock(status_code=200, headers={})
+    response.iter_content.return_value = [pointset.to_binary()]
+    with patch('main.PointSetManager.session') as mock_session:
+        mock_session.return_value.get.return_value = response
+        yield
+    result_cache.clear()
+    PointSetManager.reset()
+
+
+def stage_count(stage):
+    """Get the number of observations of a request stage."""
+    return sample(metrics.render(),
+                  f'{STAGE_SECONDS}_count{{stage="{stage}"}}')
+
+
+def test_request_stages_are_timed(upstream):
+    """Test a request records every stage and its input size."""
+    stages = ('fetch', 'decode', 'compute', 'encode', 'write')
+    before = {stage: stage_count(stage) for stage in stages}
+    client = app.test_client()
+    response = client.get(f'/triangulation/{POINTSET_ID}')
+    assert response.status_code == 200
+    assert response.data == result_cache.get(POINTSET_ID)
+    assert {stage: stage_count(stage) - before[stage]
+            for stage in stages} == dict.fromkeys(stages, 1)
+
+    # A cache hit skips the upstream and the triangulation.
+    response = client.get(f'/triangulation/{POINTSET_ID}')
+    assert response.status_code == 200
+    assert response.data == result_cache.get(POINTSET_ID)
+    assert stage_count('fetch') - before['fetch'] == 1
+    assert stage_count('write') - before['write'] == 2
+
+    text = client.get('/metrics').data.decode()
+    assert sample(text, 'triangulation_input_points_bucket{le="10.0"}') >= 1
+    assert sample(text, 'triangulation_result_cache_total{result="hit"}') \
+        >= 1
+    assert sample(text, 'triangulation_coalescing_total{result="executed"}') \
+        >= 2
+    assert sample(text, 'pointset_manager_circuit_state{state="closed"}') \
+        == 1
+
+
+def flask_get(path):
+    """GET a path from the Flask app."""
+    response = app.test_client().get(path)
+    return response.status_code, response.headers, response.data.decode()
+
+
+async def _asgi_get(path):
+    transport = httpx.ASGITransport(app=asgi.app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://testserver") as client:
+        response = await client.get(path)
+        return response.status_code, response.headers, response.text
+
+
+def asgi_get(path):
+    """GET a path from the ASGI app."""
+    return asyncio.run(_asgi_get(path))
+
+
+@pytest.mark.parametrize("get", [flask_get, asgi_get])
+def test_metrics_endpoint_counts_errors(get):
+    """Test error responses are counted by code on both front ends."""
+    series = f'{ERRORS}{{code="INVALID_POINTSET_ID"}}'
+    before = sample(metrics.render(), series)
+    status, _, _ = get('/triangulation/not-a-uuid')
+    assert status == 400
+    status, headers, text = get('/metrics')
+    assert status == 200
+    assert headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert f'# TYPE {ERRORS} counter' in text
+    assert sample(text, series) == before + 1
@@ -0,0 +1,146 @@
+"""Tests for the backend initialization and readiness probe."""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+import asgi
+from main import NATIVE, SCIPY, BackendState, Triangulator, app, init
+
+
+@pytest.fixture(autouse=True)
+def cold_backend():
+    """Give each test a cold backend state."""
+    with patch.object(Triangulator, 'state', BackendState()), \
+            patch.object(Triangulator, 'backend', SCIPY):
+        yield Triangulator.state
+
+
+async def asgi_get(path):
+    """Send a GET request to the ASGI front end."""
+    transport = httpx.ASGITransport(app=asgi.app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://testserver") as client:
+        return await client.get(path)
+
+
+def wait_ready(state, timeout=10.0):
+    """Wait for a background initialization to finish."""
+    deadline = time.monotonic() + timeout
+    while state.status == BackendState.WARMING:
+        assert time.monotonic() < deadline, "backend still warming"
+        time.sleep(0.01)
+
+
+def test_importing_main_keeps_the_backend_lazy():
+    """Test importing main does not import SciPy."""
+    env = {k: v for k, v in os.environ.items()
+           if k != 'TRIANGULATION_WARM_UP'}
+    code = "import sys, main; assert 'scipy.spatial' not in sys.modules"
+    subprocess.run([sys.executable, '-c', code], check=True, env=env,
+                   cwd=os.path.dirname(os.path.dirname(os.path.dirname(
+                       os.path.abspath(__file__)))))
+
+@pytest.mark.parametrize("warm_up", ['lazy', 'eager', 'background'])
+def test_importing_main_with_workers(warm_up):
+    """Test the executor workers do not start executors of their own."""
+    env = dict(os.environ, TRIANGULATION_WORKERS='2',
+               TRIANGULATION_WARM_UP=warm_up)
+    code = (
+        "import multiprocessing, time, main\n"
+        "state = main.Triangulator.state\n"
+        "while state.status == 'warming':\n"
+        "    time.sleep(0.01)\n"
+        "assert state.error is None, state.error\n"
+        "assert len(multiprocessing.active_children()) <= 2\n"
+        "main.Triangulator.executor.shutdown()\n"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True, env=env,
+                   timeout=60,
+                   cwd=os.path.dirname(os.path.dirname(os.path.dirname(
+                       os.path.abspath(__file__)))))
+
+def test_initialize_records_timings(cold_backend):
+    """Test eager initialization records import and warm-up timings."""
+    state = Triangulator.initialize()
+    assert state.ready
+    stats = state.stats()
+    assert stats["backend"] == SCIPY
+    assert stats["import_seconds"] >= 0
+    assert stats["warm_up_seconds"] >= 0
+    assert stats["error"] is None
+
+def test_initialize_without_warm_up(cold_backend):
+    """Test the warm-up triangulation can be skipped."""
+    with patch('main._delaunay') as mock_delaunay:
+        state = Triangulator.initialize(warm_up=False)
+    mock_delaunay.assert_not_called()
+    assert state.ready
+    assert state.warm_up_seconds is None
+
+def test_initialize_runs_once(cold_backend):
+    """Test a ready backend is not initialized again."""
+    Triangulator.initialize()
+    with patch('main._delaunay') as mock_delaunay:
+        Triangulator.initialize()
+    mock_delaunay.assert_not_called()
+
+def test_initialize_falls_back_to_native(cold_backend):
+    """Test a missing SciPy resolves to the native backend."""
+    with patch.dict(sys.modules, {'scipy.spatial': None}):
+        state = Triangulator.initialize()
+    assert state.ready
+    assert state.backend == NATIVE
+    assert Triangulator.backend == NATIVE
+
+def test_initialize_failure_is_retried(cold_backend):
+    """Test a failed initialization is reported and can be retried."""
+    with patch.object(Triangulator, 'backend', 'unknown'):
+        state = Triangulator.initialize()
+        assert state.status == BackendState.FAILED
+        assert "unknown" in state.error
+    assert Triangulator.initialize().ready
+
+def test_init_eager_warm_up(cold_backend):
+    """Test init() can initialize the backend before serving."""
+    init(warm_up='eager')
+    assert cold_backend.ready
+
+def test_init_lazy_warm_up(cold_backend):
+    """Test init() leaves a lazy backend cold."""
+    init(warm_up='lazy')
+    assert cold_backend.status == BackendState.COLD
+
+def test_ready_probe_starts_lazy_initialization(cold_backend):
+    """Test the first probe starts warming a lazy backend."""
+    client = app.test_client()
+    response = client.get('/ready')
+    assert response.status_code in (200, 503)
+    assert response.json["status"] in (BackendState.WARMING,
+                                       BackendState.READY)
+    wait_ready(cold_backend)
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.json["status"] == BackendState.READY
+    assert response.json["backend"] == SCIPY
+
+def test_ready_probe_reports_failure(cold_backend):
+    """Test a failed backend keeps the service out of rotation."""
+    with patch.object(Triangulator, 'backend', 'unknown'):
+        response = app.test_client().get('/ready')
+        wait_ready(cold_backend)
+    assert cold_backend.status == BackendState.FAILED
+    assert response.status_code == 503
+
+def test_asgi_ready_probe(cold_backend):
+    """Test the ASGI readiness probe."""
+    Triangulator.initialize()
+    response = asyncio.run(asgi_get('/ready'))
+    assert response.status_code == 200
+    assert response.json()["status"] == BackendState.READY
+    assert asyncio.run(asgi_get('/readiness')).status_code == 404
@@ -1,8 +1,21 @@
 """Tests for binary representation of points and triangles."""
+import mmap
+import os
 import struct
 from unittest.mock import patch
 
-from main import PointSet, Triangles
+import numpy as np
+import pytest
+
+from main import (
+    CCW,
+    CW,
+    PayloadTooLarge,
+    PointSet,
+    PointSetDecoder,
+    Triangles,
+    TrianglesWriter,
+)
 
 
 def test_triangle_to_binary_error():
@@ -105,9 +118,30 @@ def test_triangles_to_binary_exception():
     """Cover lines 114-115: Exception during pack"""
     ps = PointSet(3, [[0,0], [1,0], [0,1]])
     t = Triangles(ps, 1, [[0, 1, 2]])
-    with patch('struct.pack', side_effect=Exception("Pack error")):
+    with patch('main.np.empty', side_effect=Exception("Pack error")):
         assert t.to_binary() is None
 
+def test_triangles_to_binary_negative_index():
+    """Test binary conversion rejects negative vertex indices."""
+    ps = PointSet(3, [[0,0], [1,0], [0,1]])
+    t = Triangles(ps, 1, [[0, -1, 2]])
+    assert t.to_binary() is None
+
+def test_triangles_from_binary_truncated():
+    """Test deserialization rejects a triangle block shorter than declared."""
+    binary = Triangles(PointSet(3, [[0,0], [1,0], [0,1]]), 1,
+                       [[0, 1, 2]]).to_binary()
+    assert Triangles.from_binary(binary[:-1]) is None
+
+def test_pointset_binary_roundtrip_large():
+    """Test the array codec round-trips a large PointSet bit for bit."""
+    coords = [[float(i), float(-i) / 4] for i in range(10000)]
+    binary = PointSet(len(coords), coords).to_binary()
+    assert len(binary) == 4 + 8 * len(coords)
+    assert binary[:4] == struct.pack('<I', len(coords))
+    assert binary[-8:] == struct.pack('<ff', 9999.0, -9999.0 / 4)
+    assert PointSet.from_binary(binary).points == coords
+
 def test_triangles_from_binary_invalid_pointset():
     """Cover lines 147-148: PointSet deserialization fails"""
     # Data too short for PointSet
@@ -120,4 +154,202 @@ def test_triangles_from_binary_success():
     binary = t.to_binary()
     t2 = Triangles.from_binary(binary)
     assert t2 is not None
-    assert t2.n_triangles == 1
\ No newline at end of file
+    assert t2.n_triangles == 1
+
+
+def test_pointset_compact_storage():
+    """Test PointSet keeps its points in one contiguous float32 array."""
+    ps = PointSet(3, [[1.0, 2.0], [1.0, 6.0], [4.0, 4.0]])
+    assert not hasattr(ps, '__dict__')
+    assert ps.coords.dtype == np.dtype('<f4')
+    assert ps.coords.shape == (3, 2)
+    assert ps.coords.flags.c_contiguous
+    assert ps.points[1] == [1.0, 6.0]
+    assert list(ps.points) == [[1.0, 2.0], [1.0, 6.0], [4.0, 4.0]]
+
+def test_pointset_points_are_read_only():
+    """Test the points view cannot be used to mutate the PointSet."""
+    ps = PointSet(2, [[0.0, 0.0], [1.0, 0.0]])
+    with pytest.raises(TypeError):
+        ps.points[0] = [5.0, 5.0]
+    with pytest.raises(ValueError):
+        ps.coords[0, 0] = 5.0
+
+def test_pointset_from_binary_is_zero_copy():
+    """Test decoding exposes the wire buffer instead of copying it."""
+    binary = PointSet(3, [[1.0, 2.0], [1.0, 6.0], [4.0, 4.0]]).to_binary()
+    ps = PointSet.from_binary(binary)
+    assert np.shares_memory(ps.coords, np.frombuffer(binary, dtype=np.uint8))
+
+def test_triangles_compact_storage():
+    """Test Triangles keeps its indices in one contiguous uint32 array."""
+    ps = PointSet(3, [[0, 0], [1, 0], [0, 1]])
+    t = Triangles(ps, 1, np.array([[0, 1, 2]], dtype=np.int32))
+    assert not hasattr(t, '__dict__')
+    assert t.indices.dtype == np.dtype('<u4')
+    assert t.triangles == [[0, 1, 2]]
+    assert t.triangles[0] == [0, 1, 2]
+    assert t == Triangles(ps, 1, [[0, 1, 2]])
+    assert t != Triangles(ps, 1, [[0, 2, 1]])
+
+def test_triangles_validate_degenerate():
+    """Test validation rejects triangles with a repeated vertex."""
+    ps = PointSet(3, [[0, 0], [1, 0], [0, 1]])
+    t = Triangles(ps, 2, [[0, 1, 2], [0, 2, 2]])
+    assert not t.validate()
+    assert t.to_binary() is None
+
+def test_triangles_validate_count_mismatch():
+    """Test validation rejects a header count that differs from the data."""
+    ps = PointSet(3, [[0, 0], [1, 0], [0, 1]])
+    assert not Triangles(ps, 2, [[0, 1, 2]]).validate()
+
+def test_triangles_validate_winding():
+    """Test the optional winding check on triangle orientation."""
+    ps = PointSet(4, [[0, 0], [1, 0], [0, 1], [2, 0]])
+    ccw = Triangles(ps, 1, [[0, 1, 2]])
+    cw = Triangles(ps, 1, [[0, 2, 1]])
+    flat = Triangles(ps, 1, [[0, 1, 3]])
+    assert ccw.validate(CCW) and not ccw.validate(CW)
+    assert cw.validate(CW) and not cw.validate(CCW)
+    assert flat.validate() and not flat.validate(CCW)
+    assert cw.to_binary(winding=CCW) is None
+    with pytest.raises(ValueError):
+        ccw.validate('sideways')
+
+def test_triangles_trusted_skips_validation():
+    """Test trusted triangles are encoded without the validation pass."""
+    ps = PointSet(3, [[0, 0], [1, 0], [0, 1]])
+    t = Triangles(ps, 1, [[0, 2, 2]], trusted=True)
+    with patch.object(Triangles, 'validate') as mock_validate:
+        assert t.to_binary() is not None
+    mock_validate.assert_not_called()
+
+def test_triangles_iter_binary_matches_to_binary():
+    """Test streamed chunks concatenate to the exact binary representation."""
+    coords = [[float(i), float(i * i % 7)] for i in range(10)]
+    t = Triangles(PointSet(10, coords), 3, [[0, 1, 2], [3, 4, 5], [7, 8, 9]])
+    chunks = list(t.iter_binary(chunk_records=2))
+    assert b''.join(chunks) == t.to_binary()
+    # header, 5 point chunks, header, 2 triangle chunks
+    assert len(chunks) == 9
+    assert max(len(c) for c in chunks) <= 2 * 12
+
+def test_triangles_iter_binary_invalid():
+    """Test streaming an invalid Triangles reports it before any chunk."""
+    ps = PointSet(3, [[0, 0], [1, 0], [0, 1]])
+    assert Triangles(ps, 1, [[0, 1, 3]]).iter_binary() is None
+
+def buffer_of(array):
+    """Get the object ultimately holding the memory of an array view."""
+    while isinstance(array, np.ndarray) and array.base is not None:
+        array = array.base
+    return array.obj if isinstance(array, memoryview) else array
+
+def test_pointset_file_roundtrip(tmp_path):
+    """Test a PointSet file is mapped instead of read into memory."""
+    ps = PointSet(5, [[float(i), -float(i)] for i in range(5)])
+    path = tmp_path / 'points.bin'
+    assert ps.to_file(path, chunk_records=2) == len(ps.to_binary())
+    assert path.read_bytes() == ps.to_binary()
+    mapped = PointSet.from_file(path)
+    assert mapped == ps
+    assert isinstance(buffer_of(mapped.coords), mmap.mmap)
+    assert not mapped.coords.flags.writeable
+
+def test_from_file_invalid(tmp_path):
+    """Test empty and truncated files are reported like invalid bytes."""
+    path = tmp_path / 'invalid.bin'
+    path.write_bytes(b'')
+    assert PointSet.from_file(path) is None
+    path.write_bytes(struct.pack('<I', 2) + b'\x00' * 8)
+    assert PointSet.from_file(path) is None
+    assert Triangles.from_file(path) is None
+    with pytest.raises(OSError):
+        PointSet.from_file(tmp_path / 'missing.bin')
+    assert PointSet(-1, []).to_file(path) is None
+
+def test_triangles_file_roundtrip(tmp_path):
+    """Test Triangles files round-trip through zero-copy views."""
+    ps = PointSet(4, [[0, 0], [1, 0], [0, 1], [1, 1]])
+    t = Triangles(ps, 2, [[0, 1, 2], [1, 3, 2]])
+    path = tmp_path / 'triangles.bin'
+    assert t.to_file(path, winding=CCW) == len(t.to_binary())
+    mapped = Triangles.from_file(path)
+    assert mapped == t
+    assert isinstance(buffer_of(mapped.indices), mmap.mmap)
+    assert Triangles(ps, 1, [[0, 2, 1]]).to_file(path, winding=CCW) is None
+    assert Triangles.from_file(path) == t
+
+def test_triangles_writer_streams_chunks(tmp_path):
+    """Test triangles written chunk by chunk give the encoded Triangles."""
+    coords = [[float(i), float(i * i % 7)] for i in range(10)]
+    t = Triangles(PointSet(10, coords), 3, [[0, 1, 2], [3, 4, 5], [7, 8, 9]])
+    path = tmp_path / 'triangles.bin'
+    with TrianglesWriter(path, t.pointset) as writer:
+        writer.write(t.indices[:1])
+        writer.write([])
+        writer.write(t.indices[1:].tolist())
+        assert not path.exists()
+    assert writer.n_triangles == 3
+    assert path.read_bytes() == t.to_binary()
+
+def test_triangles_writer_discards_file_on_error(tmp_path):
+    """Test a failed writer leaves neither the file nor its temporary."""
+    path = tmp_path / 'triangles.bin'
+    with pytest.raises(ValueError), \
+            TrianglesWriter(path, PointSet(3, [[0, 0], [1, 0], [0, 1]])) \
+            as writer:
+        writer.write([[0, 1, 2]])
+        writer.write([[0, 1, 3]])
+    assert os.listdir(tmp_path) == []
+
+@pytest.mark.parametrize("chunk", [1, 3, 4, 5, 4096, 1 << 20])
+def test_pointset_decoder_any_chunking(chunk):
+    """Test chunks of any size decode to the encoded PointSet."""
+    ps = PointSet(1000, np.random.default_rng(24).uniform(size=(1000, 2)))
+    data = ps.to_binary()
+    decoder = PointSetDecoder(expected_bytes=len(data))
+    for start in range(0, len(data), chunk):
+        assert decoder.feed(data[start:start + chunk])
+    decoded = decoder.close()
+    assert decoded == ps
+    assert not decoded.coords.flags.writeable
+
+def test_pointset_decoder_empty_pointset():
+    """Test a header announcing no points is a complete PointSet."""
+    decoder = PointSetDecoder()
+    assert decoder.feed(struct.pack('<I', 0))
+    assert decoder.close() == PointSet(0, [])
+
+def test_pointset_decoder_rejects_count_before_allocation():
+    """Test oversized and inconsistent counts allocate nothing."""
+    header = struct.pack('<I', 2 ** 32 - 1)
+    with patch('main.np.empty') as mock_empty:
+        decoder = PointSetDecoder(max_points=1000)
+        assert not decoder.feed(header + b'\x00' * 8)
+        with pytest.raises(PayloadTooLarge):
+            decoder.close()
+        decoder = PointSetDecoder(expected_bytes=12)
+        assert not decoder.feed(header)
+        with pytest.raises(ValueError):
+            decoder.close()
+    mock_empty.assert_not_called()
+
+def test_pointset_decoder_detects_truncation_and_trailing_data():
+    """Test bodies shorter or longer than their count are rejected."""
+    data = PointSet(3, [[0, 0], [1, 0], [0, 1]]).to_binary()
+    decoder = PointSetDecoder()
+    assert decoder.feed(data[:-1])
+    with pytest.raises(ValueError):
+        decoder.close()
+    decoder = PointSetDecoder()
+    assert decoder.feed(data)
+    assert not decoder.feed(b'\x00')
+    assert not decoder.feed(b'')
+    with pytest.raises(ValueError):
+        decoder.close()
+    decoder = PointSetDecoder()
+    assert decoder.feed(data[:2])
+    with pytest.raises(ValueError):
+        decoder.close()
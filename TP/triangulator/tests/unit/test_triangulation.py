@@ -1,12 +1,21 @@
 """Tests for triangulation functionality."""
 import sys
+import time
 from unittest.mock import patch
 
+import numpy as np
+import pytest
+from scipy.spatial import QhullError
+
 from main import (
+    SCIPY,
+    DegeneratePointSet,
+    NonFiniteCoordinates,
     PointSet,
     PointSetManager,
     Triangles,
     Triangulator,
+    _delaunay,
     app,
 )
 
@@ -23,6 +32,7 @@ def test_triangulate_empty_pointset(mock_triangulate, mock_retrieve):
 
     assert triangles == Triangles(pointset, 0, [])
 
+
 @patch("main.PointSetManager.retrieve")
 @patch("main.Triangulator.triangulate")
 def test_triangulate_two_points_pointset(mock_triangulate, mock_retrieve):
@@ -35,6 +45,7 @@ def test_triangulate_two_points_pointset(mock_triangulate, mock_retrieve):
 
     assert triangles == Triangles(pointset, 0, [])
 
+
 @patch("main.PointSetManager.retrieve")
 @patch("main.Triangulator.triangulate")
 def test_triangulate_three_points_pointset(mock_triangulate, mock_retrieve):
@@ -47,6 +58,7 @@ def test_triangulate_three_points_pointset(mock_triangulate, mock_retrieve):
 
     assert triangles == Triangles(pointset, 1, [[0,1,2]])
 
+
 @patch("main.PointSetManager.retrieve")
 @patch("main.Triangulator.triangulate")
 def test_triangulate_invalid_pointset(mock_triangulate, mock_retrieve):
@@ -61,6 +73,7 @@ def test_triangulate_invalid_pointset(mock_triangulate, mock_retrieve):
 
     assert response.status_code == 500
 
+
 @patch("main.PointSetManager.retrieve")
 @patch("main.Triangulator.triangulate")
 def test_triangulate_collinear_points(mock_triangulate, mock_retrieve):
@@ -73,16 +86,169 @@ def test_triangulate_collinear_points(mock_triangulate, mock_retrieve):
 
     assert triangles == Triangles(pointset, 1, [[0,1,2]])
 
+
 def test_triangulator_few_points():
     """Test triangulation with few points."""
     ps = PointSet(2, [[0,0], [1,0]])
     t = Triangulator.triangulate(ps)
     assert t.n_triangles == 0
 
+
 def test_triangulator_import_error_simulation():
-    """Test triangulation with missing scipy/numpy dependencies."""
+    """Test triangulation falls back to the native backend without scipy."""
     ps = PointSet(3, [[0,0], [1,0], [0,1]])
-    # Simulate missing scipy/numpy by patching sys.modules
-    with patch.dict(sys.modules, {'scipy.spatial': None, 'numpy': None}):
+    # Simulate missing scipy by patching sys.modules; numpy is imported by
+    # main itself and used by the input preprocessing.
+    with patch.dict(sys.modules, {'scipy.spatial': None}):
+        t = Triangulator.triangulate(ps)
+        assert t.n_triangles == 1
+        assert t.validate()
+
+
+def test_triangulator_output_is_trusted():
+    """Test triangulation output skips validation when encoded."""
+    ps = PointSet(4, [[0, 0], [1, 0], [0, 1], [1, 1]])
+    t = Triangulator.triangulate(ps)
+    assert t.trusted
+    assert t.validate()
+    assert not Triangles.from_binary(t.to_binary()).trusted
+
+
+def test_triangulator_duplicates_map_to_first_occurrence():
+    """Test duplicate points are triangulated once, in the original order."""
+    square = [[0, 0], [1, 0], [0, 1], [1, 1]]
+    ps = PointSet(7, [[1, 0], *square, [1, 0], [-0.0, 1]])
+    t = Triangulator.triangulate(ps)
+    assert t.n_triangles == 2
+    assert set(np.unique(t.indices).tolist()) == {0, 1, 3, 4}
+    assert t.validate()
+
+
+def test_triangulator_heavy_duplicates():
+    """Test a PointSet made of a few repeated points stays cheap."""
+    ps = PointSet(30000, np.tile([[0, 0], [1, 0], [0, 1]], (10000, 1)))
+    with patch('main._delaunay', wraps=_delaunay) as mock_delaunay:
         t = Triangulator.triangulate(ps)
-        assert t.n_triangles == 0
\ No newline at end of file
+    assert t.indices.tolist() in ([[0, 1, 2]], [[1, 2, 0]], [[2, 0, 1]],
+                                  [[0, 2, 1]], [[2, 1, 0]], [[1, 0, 2]])
+    assert len(mock_delaunay.call_args.args[0]) == 3
+
+
+@pytest.mark.parametrize("points", [
+    [[0, 0], [1, 1], [2, 2], [3, 3], [-5, -5]],
+    [[2, 3], [2, 3], [2, 3], [2, 3]],
+    [[0, 0], [0, 0], [5, 5]],
+])
+def test_triangulator_degenerate_inputs_skip_backend(points):
+    """Test collinear and too-small inputs never reach the backend."""
+    with patch('main._delaunay') as mock_delaunay:
+        t = Triangulator.triangulate(PointSet(len(points), points))
+    mock_delaunay.assert_not_called()
+    assert t.n_triangles == 0
+    assert t.to_binary() is not None
+
+
+@pytest.mark.parametrize("value", [np.nan, np.inf, -np.inf])
+def test_triangulator_rejects_non_finite(value):
+    """Test NaN and infinite coordinates are rejected."""
+    ps = PointSet(3, [[0, 0], [1, value], [0, 1]])
+    with pytest.raises(NonFiniteCoordinates):
+        Triangulator.triangulate(ps)
+
+
+@patch("main.PointSetManager.retrieve")
+def test_route_non_finite_coordinates(mock_retrieve):
+    """Test non-finite coordinates are reported with their own code."""
+    mock_retrieve.return_value = PointSet(3, [[0, 0], [1, np.nan], [0, 1]])
+    response = app.test_client().get(
+        "/triangulation/123e4567-e89b-12d3-a456-426614174042")
+    assert response.status_code == 400
+    assert response.json["code"] == "NON_FINITE_COORDINATES"
+
+
+def test_qhull_failure_falls_back_to_native():
+    """Test inputs rejected by Qhull are triangulated exactly."""
+    coords = np.array([[0, 0], [1, 0], [0, 1]], dtype=np.float32)
+    with patch('scipy.spatial.Delaunay', side_effect=QhullError("flat")):
+        assert len(_delaunay(coords)) == 1
+
+
+def test_nearly_collinear_points_skip_backend():
+    """Test points off a line by a float32 rounding step are collinear."""
+    rng = np.random.default_rng(15)
+    x = rng.uniform(0, 1, 20000).astype(np.float32)
+    coords = np.column_stack([x, x * np.float32(0.5)])
+    nudged = rng.choice(len(coords), 50, replace=False)
+    coords[nudged, 1] = np.nextafter(coords[nudged, 1], np.float32(2))
+    start = time.perf_counter()
+    t = Triangulator.triangulate(PointSet(len(coords), coords))
+    assert time.perf_counter() - start < 1.0
+    assert t.n_triangles == 0
+
+
+def test_flat_points_are_triangulated():
+    """Test points clearly off a line are not taken as collinear."""
+    ps = PointSet(4, [[0, 0], [1000, 0], [2000, 0], [1000, 0.01]])
+    assert Triangulator.triangulate(ps).n_triangles == 2
+
+
+def test_large_qhull_failure_is_refused():
+    """Test Qhull failures too large for the exact engine are reported."""
+    ps = PointSet(4, [[0, 0], [1, 0], [0, 1], [1, 1]])
+    with patch('scipy.spatial.Delaunay', side_effect=QhullError("flat")), \
+            patch('main.FALLBACK_MAX_POINTS', 3), \
+            patch("main.PointSetManager.retrieve", return_value=ps):
+        with pytest.raises(DegeneratePointSet):
+            Triangulator.triangulate(ps, SCIPY)
+        response = app.test_client().get(
+            "/triangulation/123e4567-e89b-12d3-a456-426614174015"
+            f"?backend={SCIPY}")
+    assert response.status_code == 400
+    assert response.json["code"] == "DEGENERATE_POINTSET"
+
+
+def canonical(indices):
+    """Get triangles as a sorted list of sorted vertex triples."""
+    return sorted(tuple(sorted(t)) for t in np.asarray(indices).tolist())
+
+
+def test_triangulator_update_matches_full_triangulation():
+    """Test an edited PointSet is triangulated like from scratch."""
+    rng = np.random.default_rng(16)
+    ps = PointSet(500, rng.uniform(0, 10, size=(500, 2)))
+    added = rng.uniform(-1, 11, size=(8, 2))
+    removed = [0, 3, 250, 499]
+    t = Triangulator.update(Triangulator.triangulate(ps), added, removed)
+    kept = np.delete(np.asarray(ps.coords), removed, axis=0)
+    assert t.pointset == PointSet(504, np.concatenate([kept, added]))
+    assert t.trusted
+    assert t.validate(winding="ccw")
+    assert canonical(t.indices) == \
+        canonical(Triangulator.triangulate(t.pointset).indices)
+
+
+def test_triangulator_update_duplicate_takes_over():
+    """Test a duplicate replaces a removed point in the triangulation."""
+    ps = PointSet(5, [[0, 0], [1, 0], [0, 1], [1, 1], [1, 0]])
+    t = Triangulator.update(Triangulator.triangulate(ps), removed=[1])
+    assert t.n_triangles == 2
+    assert set(np.unique(t.indices).tolist()) == {0, 1, 2, 3}
+    assert t.validate()
+
+
+def test_triangulator_update_to_degenerate():
+    """Test edits leaving collinear points give no triangles."""
+    ps = PointSet(4, [[0, 0], [1, 0], [2, 0], [1, 1]])
+    t = Triangulator.update(Triangulator.triangulate(ps), removed=[3])
+    assert t.n_triangles == 0
+    t = Triangulator.update(t, added=[[1, -1]])
+    assert t.n_triangles == 2
+
+
+def test_triangulator_update_rejects_invalid_delta():
+    """Test invalid deltas are rejected."""
+    t = Triangulator.triangulate(PointSet(3, [[0, 0], [1, 0], [0, 1]]))
+    with pytest.raises(NonFiniteCoordinates):
+        Triangulator.update(t, added=[[np.nan, 0]])
+    with pytest.raises(IndexError):
+        Triangulator.update(t, removed=[3])
@@ -0,0 +1,184 @@
+"""Tests for the direct-upload triangulation endpoint."""
+import asyncio
+import io
+import json
+import struct
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+import pytest
+
+import asgi
+from main import PayloadTooLarge, PointSet, Triangles, Triangulator, app
+
+rng = np.random.default_rng(14)
+pointset = PointSet(100, rng.uniform(-10, 10, size=(100, 2)))
+
+
+class ReadOnlyStream:
+    """Stream without ``readinto``, returning short reads."""
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self.data.read(min(size, 7) if size > 0 else size)
+
+
+def test_from_stream_roundtrip():
+    """Test a PointSet decodes from a stream like from its bytes."""
+    data = pointset.to_binary()
+    assert PointSet.from_stream(io.BytesIO(data)) == pointset
+    decoded = PointSet.from_stream(ReadOnlyStream(data))
+    assert decoded == pointset
+    assert not decoded.coords.flags.writeable
+
+@pytest.mark.parametrize("data", [
+    b'\x01\x00', struct.pack('<I', 2) + b'\x00' * 12,
+    pointset.to_binary() + b'\x00',
+])
+def test_from_stream_rejects_malformed_body(data):
+    """Test truncated bodies and trailing bytes are rejected."""
+    with pytest.raises(ValueError):
+        PointSet.from_stream(io.BytesIO(data))
+
+def test_from_stream_checks_size_before_reading():
+    """Test the point count is checked before the coordinates are read."""
+    stream = io.BytesIO(struct.pack('<I', 1000) + b'\x00' * 8)
+    with pytest.raises(PayloadTooLarge):
+        PointSet.from_stream(stream, max_points=999)
+    assert stream.tell() == 4
+
+
+def flask_post(body, chunked=False):
+    """POST a body to the Flask app."""
+    client = app.test_client()
+    if chunked:
+        # As set by servers that decode chunked request bodies.
+        response = client.post(
+            '/triangulation', input_stream=io.BytesIO(body),
+            headers={'Transfer-Encoding': 'chunked'},
+            environ_overrides={'wsgi.input_terminated': True})
+    else:
+        response = client.post('/triangulation', data=body)
+    return response.status_code, response.data
+
+
+async def _asgi_post(body):
+    transport = httpx.ASGITransport(app=asgi.app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://testserver") as client:
+        response = await client.post('/triangulation', content=body)
+        return response.status_code, response.content
+
+
+def asgi_post(body, chunked=False):
+    """POST a body to the ASGI app."""
+    return asyncio.run(_asgi_post(body))
+
+
+@pytest.fixture(params=['flask', 'asgi'])
+def post(request):
+    """Run each test against both front ends."""
+    return flask_post if request.param == 'flask' else asgi_post
+
+
+def test_upload_returns_triangles(post):
+    """Test an uploaded PointSet is triangulated without the upstream."""
+    with patch('main.PointSetManager.retrieve') as mock_retrieve:
+        status, data = post(pointset.to_binary())
+    mock_retrieve.assert_not_called()
+    assert status == 200
+    assert data == Triangulator.triangulate(pointset).to_binary()
+    assert Triangles.from_binary(data).validate()
+
+def test_upload_malformed_body(post):
+    """Test a malformed body is reported as 400."""
+    status, data = post(pointset.to_binary()[:-1])
+    assert status == 400
+    assert json.loads(data)["code"] == "INVALID_POINTSET"
+
+def test_upload_too_large(post):
+    """Test a body above the configured size is reported as 413."""
+    body = pointset.to_binary()
+    with patch('main.MAX_UPLOAD_BYTES', len(body) - 1), \
+            patch('asgi.MAX_UPLOAD_BYTES', len(body) - 1):
+        status, data = post(body)
+    assert status == 413
+    assert json.loads(data)["code"] == "PAYLOAD_TOO_LARGE"
+
+def test_chunked_upload_too_large():
+    """Test a body without Content-Length is bounded by its point count."""
+    body = pointset.to_binary()
+    with patch('main.MAX_UPLOAD_BYTES', len(body) - 1):
+        status, data = flask_post(body, chunked=True)
+    assert status == 413
+    with patch('main.MAX_UPLOAD_BYTES', len(body)):
+        status, data = flask_post(body, chunked=True)
+    assert status == 200
+
+def asgi_upload(messages, headers=()):
+    """Run an upload on the ASGI app with the given receive messages.
+
+    Returns:
+        Tuple ``(sent, remaining)`` of the sent messages and the number of
+        receive messages left unread.
+
+    """
+    pending = list(messages)
+    sent = []
+
+    async def receive():
+        return pending.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/triangulation',
+             'query_string': b'', 'headers': list(headers)}
+    asyncio.run(asgi.app(scope, receive, send))
+    return sent, len(pending)
+
+
+def chunks(data, size):
+    """Split a body into ASGI request messages."""
+    parts = [data[i:i + size] for i in range(0, len(data), size)]
+    return [{'type': 'http.request', 'body': part,
+             'more_body': i < len(parts) - 1}
+            for i, part in enumerate(parts)]
+
+def test_asgi_upload_is_decoded_incrementally():
+    """Test a body sent in small chunks is triangulated."""
+    sent, remaining = asgi_upload(chunks(pointset.to_binary(), 5))
+    assert sent[0]['status'] == 200
+    assert remaining == 0
+    body = b''.join(m.get('body', b'') for m in sent[1:])
+    assert body == Triangulator.triangulate(pointset).to_binary()
+
+def test_asgi_upload_limit_applies_as_bytes_arrive():
+    """Test a chunked body is refused once its count header is received."""
+    body = pointset.to_binary()
+    with patch('asgi.MAX_UPLOAD_BYTES', len(body) - 1):
+        sent, remaining = asgi_upload(chunks(body, 8))
+    assert sent[0]['status'] == 413
+    assert remaining == len(chunks(body, 8)) - 1
+
+def test_asgi_upload_checks_content_length():
+    """Test a body announced too large is refused before it is read."""
+    body = pointset.to_binary()
+    headers = [(b'content-length', str(len(body)).encode())]
+    with patch('asgi.MAX_UPLOAD_BYTES', len(body) - 1):
+        sent, remaining = asgi_upload(chunks(body, 8), headers)
+    assert sent[0]['status'] == 413
+    assert remaining == len(chunks(body, 8))
+
+def test_asgi_upload_client_disconnect():
+    """Test a client leaving mid-body gets no error response."""
+    messages = chunks(pointset.to_binary(), 64)[:2]
+    messages.append({'type': 'http.disconnect'})
+    with patch('main.Triangulator.triangulate') as mock_triangulate:
+        sent, remaining = asgi_upload(messages)
+    mock_triangulate.assert_not_called()
+    assert sent == []
+    assert remaining == 0
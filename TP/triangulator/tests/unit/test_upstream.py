@@ -0,0 +1,231 @@
+"""Tests for the PointSet cache, streaming decoder and circuit breaker."""
+import asyncio
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import asgi
+import loadtest
+from main import (
+    CircuitBreaker,
+    CircuitOpen,
+    PayloadTooLarge,
+    PointSet,
+    PointSetManager,
+    app,
+    result_cache,
+)
+
+pointset = PointSet(4, [[0, 0], [1, 0], [0, 1], [1, 1]])
+changed = PointSet(3, [[0, 0], [2, 0], [0, 2]])
+
+UNKNOWN_ID = "123e4567-e89b-12d3-a456-426614174023"
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_consecutive_failures():
+    """Test the circuit opens at the threshold and rejects calls."""
+    breaker = CircuitBreaker(3, 10, clock=FakeClock())
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.failure()
+    breaker.success()
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["rejections"] == 1
+
+def test_breaker_lets_one_trial_through_after_reset():
+    """Test a single trial call decides whether the circuit closes."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(1, 10, clock=clock)
+    breaker.failure()
+    clock.now = 10
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 15
+    assert not breaker.allow()
+    clock.now = 20
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+def test_breaker_disabled():
+    """Test a zero threshold never opens the circuit."""
+    breaker = CircuitBreaker(0, 10)
+    for _ in range(100):
+        breaker.failure()
+    assert breaker.allow()
+
+
+def async_retrieve(point_set_id):
+    """Retrieve through the ASGI app's non-blocking client."""
+    async def run():
+        try:
+            return await asgi.retrieve(point_set_id)
+        finally:
+            await asgi.close()
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def stand_in():
+    """Run a stand-in PointSetManager holding one PointSet."""
+    with loadtest.StandInPointSetManager() as manager:
+        manager.point_set_id = manager.register(pointset.to_binary())
+        yield manager
+
+
+@pytest.fixture(params=['flask', 'asgi'])
+def retrieve(request, stand_in):
+    """Retrieve PointSets from the stand-in through each front end."""
+    PointSetManager.close()
+    PointSetManager.reset()
+    breaker = CircuitBreaker(2, 60)
+    with patch.object(PointSetManager, 'BASE_URL', stand_in.url), \
+            patch.object(PointSetManager, 'MAX_RETRIES', 0), \
+            patch.object(PointSetManager, 'breaker', breaker):
+        yield (PointSetManager.retrieve if request.param == 'flask'
+               else async_retrieve)
+    PointSetManager.close()
+    PointSetManager.reset()
+
+
+def test_unchanged_pointset_is_revalidated(retrieve, stand_in):
+    """Test a cached PointSet costs a 304 instead of its body."""
+    assert retrieve(stand_in.point_set_id) == pointset
+    assert retrieve(stand_in.point_set_id) == pointset
+    assert stand_in.served == {200: 1, 304: 1}
+    stand_in.replace(stand_in.point_set_id, changed.to_binary())
+    assert retrieve(stand_in.point_set_id) == changed
+    assert stand_in.served == {200: 2, 304: 1}
+
+def test_fresh_pointset_skips_upstream(retrieve, stand_in):
+    """Test cached PointSets are served without a request while fresh."""
+    with patch.object(PointSetManager, 'CACHE_TTL', 60):
+        assert retrieve(stand_in.point_set_id) == pointset
+        stand_in.replace(stand_in.point_set_id, changed.to_binary())
+        assert retrieve(stand_in.point_set_id) == pointset
+    assert stand_in.served == {200: 1}
+
+def test_pointsets_without_etag_are_not_cached(retrieve, stand_in):
+    """Test PointSets that cannot be revalidated are fetched each time."""
+    stand_in.etags = False
+    assert retrieve(stand_in.point_set_id) == pointset
+    assert retrieve(stand_in.point_set_id) == pointset
+    assert stand_in.served == {200: 2}
+    assert len(PointSetManager.cache) == 0
+
+def test_not_found_is_cached_briefly(retrieve, stand_in):
+    """Test unknown PointSets are not asked for again within the TTL."""
+    with patch.object(PointSetManager, 'NEGATIVE_TTL', 0.2):
+        assert retrieve(UNKNOWN_ID) is None
+        stand_in.replace(UNKNOWN_ID, pointset.to_binary())
+        assert retrieve(UNKNOWN_ID) is None
+        assert stand_in.served == {404: 1}
+        time.sleep(0.25)
+        assert retrieve(UNKNOWN_ID) == pointset
+
+def test_circuit_opens_when_upstream_is_down(retrieve, stand_in):
+    """Test retrievals fail fast once upstream failed repeatedly."""
+    stand_in.error_rate = 1.0
+    for _ in range(2):
+        with pytest.raises(ConnectionError) as info:
+            retrieve(stand_in.point_set_id)
+        assert not isinstance(info.value, CircuitOpen)
+    with pytest.raises(CircuitOpen):
+        retrieve(stand_in.point_set_id)
+    assert stand_in.served == {503: 2}
+    # Cached answers do not need the circuit.
+    with patch.object(PointSetManager, 'NEGATIVE_TTL', 60):
+        PointSetManager.cache.put(UNKNOWN_ID, (None, None, float('inf')), 1)
+        assert retrieve(UNKNOWN_ID) is None
+
+def test_large_pointset_is_streamed(retrieve, stand_in):
+    """Test a body spanning many chunks decodes to the PointSet."""
+    large = PointSet(300000, np.random.default_rng(24).uniform(
+        -1, 1, size=(300000, 2)))
+    stand_in.replace(UNKNOWN_ID, large.to_binary())
+    assert retrieve(UNKNOWN_ID) == large
+
+def test_oversized_pointset_is_refused(retrieve, stand_in):
+    """Test PointSets above MAX_POINTS are refused, not cached."""
+    with patch.object(PointSetManager, 'MAX_POINTS', 3), \
+            pytest.raises(PayloadTooLarge):
+        retrieve(stand_in.point_set_id)
+    assert len(PointSetManager.cache) == 0
+
+
+def test_route_fails_fast_while_circuit_is_open(stand_in):
+    """Test the route answers SERVICE_UNAVAILABLE while the circuit is open."""
+    result_cache.clear()
+    breaker = CircuitBreaker(1, 60)
+    breaker.failure()
+    with patch.object(PointSetManager, 'breaker', breaker), \
+            patch.object(PointSetManager, 'BASE_URL', stand_in.url):
+        response = app.test_client().get(
+            f'/triangulation/{stand_in.point_set_id}')
+    assert response.status_code == 503
+    assert response.json['code'] == 'SERVICE_UNAVAILABLE'
+    assert stand_in.served == {}
+
+def test_interrupted_trial_reopens_the_circuit(retrieve, stand_in):
+    """Test a trial ending in a non-transport error frees the trial slot."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(1, 10, clock=clock)
+    breaker.failure()
+    clock.now = 10
+    with patch.object(PointSetManager, 'breaker', breaker):
+        with patch.object(PointSetManager, 'decoder',
+                          side_effect=RuntimeError("decoder bug")), \
+                pytest.raises(RuntimeError):
+            retrieve(stand_in.point_set_id)
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpen):
+            retrieve(stand_in.point_set_id)
+        clock.now = 20
+        assert retrieve(stand_in.point_set_id) == pointset
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_abandoned_call_only_counts_as_a_trial():
+    """Test abandoning a call changes nothing unless it is the trial."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(1, 10, clock=clock)
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.failure()
+    clock.now = 10
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+def test_not_modified_without_cached_pointset_is_fetched(retrieve, stand_in):
+    """Test a 304 with the PointSet evicted meanwhile gets the body."""
+    assert retrieve(stand_in.point_set_id) == pointset
+    etag = PointSetManager.cache.get(stand_in.point_set_id)[1]
+    # Evicted between the lookup and the answer to the conditional GET.
+    PointSetManager.cache.clear()
+    with patch.object(PointSetManager, 'request_headers',
+                      return_value={'If-None-Match': etag}):
+        assert retrieve(stand_in.point_set_id) == pointset
+    assert stand_in.served == {200: 2, 304: 1}
+    assert PointSetManager.breaker.state == CircuitBreaker.CLOSED